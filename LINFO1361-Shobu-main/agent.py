@@ -1,3 +1,5 @@
+import threading
+
 class Agent:
     """Represents an AI agent playing the Shobu game.
 
@@ -8,16 +10,23 @@ class Agent:
     Attributes:
         player (int): The player ID this agent represents (0 or 1).
         game (ShobuGame): An instance of the Shobu game the agent is playing on.
+        ponder (bool): Whether the agent keeps thinking in a background thread while its opponent plays.
+        ponder_thread (threading.Thread): The thread running `ponder_search`, or None.
+        ponder_stop (threading.Event): Set to ask `ponder_search` to return.
     """
-    def __init__(self, player, game):
+    def __init__(self, player, game, ponder=False):
         """Initializes an Agent instance.
 
         Args:
             player (int): The player ID this agent represents (0 or 1).
             game (ShobuGame): The Shobu game instance the agent will play on.
+            ponder (bool, optional): Whether the agent ponders on the time of its opponent. Defaults to False.
         """
         self.player = player
         self.game = game
+        self.ponder = ponder
+        self.ponder_thread = None
+        self.ponder_stop = threading.Event()
     
     def play(self, state, remaining_time):
         """Determines the action the agent will take in the given game state.
@@ -35,4 +44,44 @@ class Agent:
         Raises:
             NotImplementedError: If the method is not overridden in a subclass.
         """
-        raise NotImplementedError
\ No newline at end of file
+        raise NotImplementedError
+
+    def start_pondering(self, state):
+        """Starts `ponder_search` on a state in a background thread, stopping the previous one first.
+
+        Args:
+            state (ShobuState): The state to think about, usually the one after the action just played and the
+                predicted reply of the opponent.
+        """
+        self.stop_pondering()
+        self.ponder_thread = threading.Thread(target=self.ponder_search, args=(state,), daemon=True)
+        self.ponder_thread.start()
+
+    def stop_pondering(self):
+        """Stops the background thread started by `start_pondering`, if any, and waits for it to return.
+
+        Must be called before the data shared with `ponder_search` is used again, e.g. at the beginning of `play`.
+        """
+        if self.ponder_thread is not None:
+            self.ponder_stop.set()
+            self.ponder_thread.join()
+            self.ponder_thread = None
+            self.ponder_stop.clear()
+
+    def ponder_search(self, state):
+        """Thinks about a state in the background until `ponder_stop` is set.
+
+        The default implementation does nothing. Agents supporting pondering override it to run their search and keep
+        its results for the next call of `play`. Since the agents of `main.py` share one interpreter, a pondering
+        thread competes with the opponent for the CPU there; pondering pays off when each agent runs in its own process.
+
+        Args:
+            state (ShobuState): The state to think about.
+        """
+
+    def close(self):
+        """Releases the resources of the agent that outlive a game, such as helper processes or shared memory.
+
+        The default implementation does nothing. `main.py` calls it at the end of every game; an agent closed this way
+        must still be able to play the next game.
+        """
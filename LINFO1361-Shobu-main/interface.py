@@ -271,7 +271,7 @@ def update_ui(state: ShobuState, text: str = None, highlight: list = []):
 class HumanAgent(Agent):
 
     def __init__(self, player):
-        self.player = player
+        super().__init__(player, None)
 
     def play(self, state, remaining_time):
         return get_human_move(state)
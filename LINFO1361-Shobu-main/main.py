@@ -1,6 +1,9 @@
 from random_agent import RandomAgent
 from template_alphabeta import AlphaBetaAgent
 from template_uct import UCTAgent
+from uct_array import ArrayUCTAgent, ROLLOUT_LENGTH
+from uct_parallel import RootParallelUCTAgent, TreeParallelUCTAgent
+from uct_value import ValueUCTAgent
 from template_contest import AI
 from template_contest_1 import AI as AI1
 from template_contest_2 import AI as AI2
@@ -22,10 +25,28 @@ def get_agents(args, display):
             return RandomAgent(player, ShobuGame())
         elif agent_name == "alphabeta":
             return AlphaBetaAgent(player, ShobuGame(), 2)
+        elif agent_name == "alphabeta-pvs":
+            return AlphaBetaAgent(player, ShobuGame(), 2, search="pvs")
         elif agent_name == "mcts":
             return UCTAgent(player, ShobuGame(), 1000)
+        elif agent_name == "mcts-array":
+            return ArrayUCTAgent(player, ShobuGame())
+        elif agent_name == "mcts-trunc":
+            return ArrayUCTAgent(player, ShobuGame(), rollout_length=ROLLOUT_LENGTH)
+        elif agent_name == "mcts-par":
+            return RootParallelUCTAgent(player, ShobuGame())
+        elif agent_name == "mcts-tree":
+            return TreeParallelUCTAgent(player, ShobuGame())
+        elif agent_name == "mcts-value":
+            return ValueUCTAgent(player, ShobuGame())
         elif agent_name == "agent":
             return AI(player, ShobuGame())
+        elif agent_name == "agent-pvs":
+            return AI(player, ShobuGame(), search="pvs")
+        elif agent_name == "agent-ponder":
+            return AI(player, ShobuGame(), ponder=True)
+        elif agent_name == "agent-smp":
+            return AI(player, ShobuGame(), workers=4)
         elif agent_name == "agent1":
             return AI1(player, ShobuGame())
         elif agent_name == "agent2":
@@ -84,7 +105,7 @@ def main(agent_white, agent_black, display=False, log_file=None, play_time=600):
                 if log_file is not None:
                     logs.append(create_log(action, n_moves))
 
-                if action not in game.actions(state):
+                if not game.is_legal(state, action):
                     raise Exception(f"Invalid action: {action}")
                 
                 state = game.result(state, action)
@@ -101,6 +122,11 @@ def main(agent_white, agent_black, display=False, log_file=None, play_time=600):
         if log_file is not None:
             write_logs(logs, log_file)
         raise e
+    finally:
+        agent_white.stop_pondering()
+        agent_black.stop_pondering()
+        agent_white.close()
+        agent_black.close()
     
     if remaining_time_0 <= 0:
         state = state._replace(utility=-1)
@@ -143,8 +169,8 @@ def replay_game(actions, delay_time=0.0, display=True, start_turn=0):
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description='Shobu game')
-    parser.add_argument('-w', '--white', type=str, default="random", help='White player ["random | human | alphabeta | mcts | agent"]')
-    parser.add_argument('-b', '--black', type=str, default="random", help='Black player ["random | human | alphabeta | mcts | agent"]')
+    parser.add_argument('-w', '--white', type=str, default="random", help='White player ["random | human | alphabeta | alphabeta-pvs | mcts | mcts-array | mcts-trunc | mcts-par | mcts-tree | mcts-value | agent | agent-pvs | agent-ponder | agent-smp"]')
+    parser.add_argument('-b', '--black', type=str, default="random", help='Black player ["random | human | alphabeta | alphabeta-pvs | mcts | mcts-array | mcts-trunc | mcts-par | mcts-tree | mcts-value | agent | agent-pvs | agent-ponder | agent-smp"]')
     parser.add_argument('-t', '--time', type=int, default=600, help='Time per game for each player (in seconds)')
     parser.add_argument('-d', '--display', action='store_true', help='Display game')
     parser.add_argument('-l', '--logs', type=str, default=None, help='path to log file to record the game')
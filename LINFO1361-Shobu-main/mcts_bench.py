@@ -0,0 +1,75 @@
+from shobu import ShobuGame
+from uct_array import ArrayUCTAgent, MOVES_TO_GO, ROLLOUT_LENGTH
+from uct_parallel import RootParallelUCTAgent, TreeParallelUCTAgent
+from uct_value import ValueUCTAgent
+
+import argparse
+import time
+
+def get_agent(name, player, workers):
+    """Builds a time-budgeted UCT agent: "array" or "trunc" (single process, full or truncated playouts), "root" or "tree"
+    (parallel), or "value" (value model)."""
+    if name == "array":
+        return ArrayUCTAgent(player, ShobuGame())
+    elif name == "trunc":
+        return ArrayUCTAgent(player, ShobuGame(), rollout_length=ROLLOUT_LENGTH)
+    elif name == "root":
+        return RootParallelUCTAgent(player, ShobuGame(), workers)
+    elif name == "tree":
+        return TreeParallelUCTAgent(player, ShobuGame(), workers)
+    elif name == "value":
+        return ValueUCTAgent(player, ShobuGame())
+    raise Exception(f"Invalid agent: {name}")
+
+def play_game(game, agents, move_time, stats):
+    """Plays a game with the same time per move for both agents and returns the winner (0, 1, or -1 for a draw).
+
+    The number of iterations and the search time of every move are added to `stats`, by agent. The agents are closed
+    at the end of the game, as in `main.py`.
+    """
+    state = game.initial
+    try:
+        while not game.is_terminal(state):
+            agent = agents[state.to_move]
+            start = time.perf_counter()
+            action = agent.play(state, move_time * MOVES_TO_GO)
+            elapsed = time.perf_counter() - start
+            iterations, total = stats[agent]
+            stats[agent] = (iterations + agent.iterations, total + elapsed)
+            state = game.result(state, action)
+    finally:
+        for agent in agents:
+            agent.close()
+    utility = game.utility(state, 0)
+    return 0 if utility == 1 else 1 if utility == -1 else -1
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Playouts per second and win rate of the time-budgeted UCT agents')
+    parser.add_argument('-a', '--agent', type=str, default="root", help='Tested agent ["array | trunc | root | tree | value"]')
+    parser.add_argument('-o', '--opponent', type=str, default="array", help='Reference agent ["array | trunc | root | tree | value"]')
+    parser.add_argument('-w', '--workers', type=int, default=4, help='Number of processes of the parallel agents')
+    parser.add_argument('-t', '--time', type=float, default=1.0, help='Time per move (in seconds)')
+    parser.add_argument('-n', '--n', type=int, default=10, help='Number of games, the colors alternating')
+    args = parser.parse_args()
+
+    game = ShobuGame()
+    tested = [get_agent(args.agent, player, args.workers) for player in range(2)]
+    reference = [get_agent(args.opponent, player, args.workers) for player in range(2)]
+    stats = {agent: (0, 0.0) for agent in tested + reference}
+    wins = losses = draws = 0
+    for i in range(args.n):
+        agents = (tested[0], reference[1]) if i % 2 == 0 else (reference[0], tested[1])
+        winner = play_game(game, agents, args.time, stats)
+        if winner == -1:
+            draws += 1
+        elif agents[winner] in tested:
+            wins += 1
+        else:
+            losses += 1
+
+    def playouts_per_second(agents):
+        iterations = sum(stats[agent][0] for agent in agents)
+        return iterations / max(sum(stats[agent][1] for agent in agents), 1e-9)
+
+    print(f"{args.agent}: {playouts_per_second(tested):.1f} playouts/s, {args.opponent}: {playouts_per_second(reference):.1f} playouts/s")
+    print(f"{args.agent} against {args.opponent} over {args.n} games: {wins} wins, {losses} losses, {draws} draws")
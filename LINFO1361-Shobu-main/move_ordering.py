@@ -0,0 +1,127 @@
+from shobu import ShobuGame, DIRECTIONS, encode_action
+
+import heapq
+
+MAX_PLY = 64
+
+def compute_active_tables(rays):
+    """Precomputes the path and the landing position of an active move from the low byte of its action code.
+
+    Args:
+        rays (dict): The ray table of `ShobuGame`.
+
+    Returns:
+        tuple: Two lists of 256 entries indexed by `code & 0xFF` (active stone, direction and length): the 16-bit
+            mask of the positions the active stone goes through and the position a pushed stone lands on, -1 if
+            it is pushed off the board.
+    """
+    paths = [0] * 256
+    landings = [-1] * 256
+    for (stone, direction, length), (_, path, landing) in rays.items():
+        index = (stone << 4) | (DIRECTIONS.index(direction) << 1) | (length - 1)
+        paths[index] = path
+        landings[index] = landing
+    return paths, landings
+
+ACTIVE_PATHS, ACTIVE_LANDINGS = compute_active_tables(ShobuGame.rays)
+
+class MoveOrdering:
+    """Orders the actions of an alpha-beta search with cheap heuristics.
+
+    The actions are given in stages: the hinted action (transposition table or principal variation move) first, then
+    the moves pushing a stone off the board, the other pushing moves, the killer moves of the ply and finally the other
+    quiet moves by decreasing history score. The stages are split in a single pass over the action codes of the state,
+    and the quiet moves are only ordered once the previous stages are exhausted, so nothing is sorted when a cutoff
+    happens early.
+
+    Attributes:
+        killers (List[List[int]]): The codes of the last two quiet actions that caused a cutoff at each ply.
+        history (List[int]): The history score of each action code, increased every time it causes a cutoff.
+    """
+
+    def __init__(self):
+        """Initializes empty killer and history tables."""
+        self.killers = [[-1, -1] for _ in range(MAX_PLY)]
+        self.history = [0] * 65536
+
+    def new_search(self):
+        """Clears the killers, which are relative to the root, and halves the history scores of the previous searches."""
+        self.killers = [[-1, -1] for _ in range(MAX_PLY)]
+        self.history = [score >> 1 for score in self.history]
+
+    def is_pushing(self, state, code):
+        """Checks if the action of the given code pushes a stone in the state."""
+        opponent_stones = state.bitboards[(state.to_move + 1) % 2]
+        return ((opponent_stones >> ((code >> 4) & 0x30)) & ACTIVE_PATHS[code & 0xFF]) != 0
+
+    def ordered_actions(self, state, ply, first=None):
+        """Yields the legal actions of a state, the most promising first.
+
+        Args:
+            state (ShobuState): The state to order the actions of.
+            ply (int): The depth of the state in the search tree.
+            first (ShobuAction, optional): An action to search first if it is legal, e.g. the transposition table move.
+
+        Yields:
+            ShobuAction: The legal actions of the state, each one once.
+        """
+        actions_by_code = ShobuGame.actions_by_code
+        first_code = -1 if first is None else encode_action(first)
+        killers = self.killers[ply] if ply < MAX_PLY else ()
+        prioritized = {first_code, *killers}
+
+        # A single pass over the codes finds the hinted action, the legal quiet killers and the other stages
+        opponent_stones = state.bitboards[(state.to_move + 1) % 2]
+        found = set()
+        pushing_off = []
+        pushing = []
+        quiet = []
+        for code in state.action_codes:
+            if code == first_code:
+                found.add(code)
+            elif (opponent_stones >> ((code >> 4) & 0x30)) & ACTIVE_PATHS[code & 0xFF]:
+                if ACTIVE_LANDINGS[code & 0xFF] < 0:
+                    pushing_off.append(code)
+                else:
+                    pushing.append(code)
+            elif code in prioritized:
+                found.add(code)
+            else:
+                quiet.append(code)
+
+        if first_code in found:
+            found.remove(first_code)
+            yield actions_by_code[first_code]
+        for code in pushing_off:
+            yield actions_by_code[code]
+        for code in pushing:
+            yield actions_by_code[code]
+        for code in killers:
+            if code in found:
+                found.remove(code)
+                yield actions_by_code[code]
+
+        history = self.history
+        heap = [(-history[code], code) for code in quiet]
+        heapq.heapify(heap)
+        while heap:
+            yield actions_by_code[heapq.heappop(heap)[1]]
+
+    def record_cutoff(self, state, action, ply, depth):
+        """Records a quiet action that caused a cutoff as killer of its ply and increases its history score.
+
+        Args:
+            state (ShobuState): The state the action was played in.
+            action (ShobuAction): The action that caused the cutoff.
+            ply (int): The depth of the state in the search tree.
+            depth (int): The remaining search depth below the state, deeper cutoffs weighing more.
+        """
+        code = encode_action(action)
+        if self.is_pushing(state, code):
+            return
+        if ply < MAX_PLY:
+            killers = self.killers[ply]
+            if killers[0] != code:
+                killers[1] = killers[0]
+                killers[0] = code
+        self.history[code] += depth * depth
@@ -0,0 +1,55 @@
+from shobu import ShobuGame
+from template_contest import AI
+from perft import POSITIONS, get_state
+
+import argparse
+import contextlib
+import io
+import time
+
+def timed_search(agent, state, depth):
+    """Searches a state with iterative deepening up to the given depth.
+
+    Returns the elapsed time, the processor time of the agent's process, which is the time the search would take if
+    every process had its own core, and the value of the state.
+    """
+    agent.table.new_search()
+    agent.ordering.new_search()
+    agent.pv_moves = dict()
+    start = time.perf_counter()
+    start_cpu = time.process_time()
+    agent.start_helpers(state, float("inf"))
+    value = None
+    for reached, value, _ in agent.iterative_deepening(state):
+        if reached >= depth:
+            break
+    agent.stop_helpers()
+    return time.perf_counter() - start, time.process_time() - start_cpu, value
+
+def run(game, name, depth, workers, search):
+    """Compares the time of a fixed depth search of a stored position with 1 and more processes."""
+    state = get_state(game, name)
+    baseline = None
+    for count in workers:
+        agent = AI(state.to_move, ShobuGame(), search=search, workers=count)
+        with contextlib.redirect_stdout(io.StringIO()):
+            timed_search(agent, state, 1)
+            agent.table.clear()
+        elapsed, cpu, value = timed_search(agent, state, depth)
+        agent.close()
+        if baseline is None:
+            baseline = (elapsed, cpu)
+        print(f"{name} depth {depth} [{count} process{'es' if count > 1 else ''}]: {elapsed:.3f}s ({cpu:.3f}s of main process), value {value}, speedup {baseline[0] / elapsed:.2f} ({baseline[1] / cpu:.2f})")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Speedup of the Lazy SMP search of the contest agent')
+    parser.add_argument('-d', '--depth', type=int, default=3, help='Depth of the search')
+    parser.add_argument('-p', '--position', type=str, default="all", help=f'Stored position ["all | {" | ".join(POSITIONS)}"]')
+    parser.add_argument('-w', '--workers', type=int, nargs='+', default=[1, 2, 4, 8], help='Numbers of processes to compare, the first one being the reference')
+    parser.add_argument('-s', '--search', type=str, default="minimax", help='Search core ["minimax | pvs"]')
+    args = parser.parse_args()
+
+    game = ShobuGame()
+    names = list(POSITIONS) if args.position == "all" else [args.position]
+    for name in names:
+        run(game, name, args.depth, args.workers, args.search)
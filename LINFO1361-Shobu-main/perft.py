@@ -0,0 +1,200 @@
+from shobu import ShobuAction, ShobuState, ShobuGame, ShobuPosition, board_to_bitboards, compute_piece_counts, compute_center_counts
+
+import argparse
+import time
+
+# Positions given as (board, to_move, count_boring_actions), the board being the set view of `ShobuState.board`
+POSITIONS = {
+    "initial": (
+        [[{0, 1, 2, 3}, {12, 13, 14, 15}], [{0, 1, 2, 3}, {12, 13, 14, 15}], [{0, 1, 2, 3}, {12, 13, 14, 15}], [{0, 1, 2, 3}, {12, 13, 14, 15}]],
+        0, 0
+    ),
+    "opening": (
+        [[{2, 4, 6, 7}, {8, 9, 11, 14}], [{0, 1, 3, 10}, {5, 12, 14, 15}], [{1, 2, 3, 4}, {6, 10, 12, 14}], [{0, 1, 7, 11}, {5, 6, 8, 15}]],
+        0, 0
+    ),
+    "middlegame": (
+        [[{5, 9, 10, 11}, {7, 12, 13, 15}], [{4, 10, 11, 15}, {7, 12, 13, 14}], [{5, 7, 10}, {1, 6, 9, 14}], [{0, 5, 6}, {7, 8, 10, 14}]],
+        1, 1
+    ),
+    "endgame": (
+        [[{8, 10, 11}, {13, 14}], [{8, 13, 14}, {10, 12}], [{1, 3, 7, 13}, {0, 4, 10}], [{7, 12}, {3, 5, 6, 11}]],
+        0, 5
+    ),
+}
+
+# Number of leaves at each depth, a terminal position counting as a single leaf
+REFERENCE_COUNTS = {
+    "initial": [1, 232, 50508, 8675832],
+    "opening": [1, 109, 14525, 1522281],
+    "middlegame": [1, 96, 9743, 973756],
+    "endgame": [1, 84, 6414, 558960],
+}
+
+def get_state(game, name):
+    """Builds the `ShobuState` of a stored position."""
+    board, to_move, count_boring_actions = POSITIONS[name]
+    return ShobuState(to_move=to_move, utility=None, bitboards=board_to_bitboards(board), actions=None, count_boring_actions=count_boring_actions, game=game)
+
+def perft_state(game, state, depth):
+    """Counts the leaves at the given depth by creating a new state with `unchecked_result` at each node."""
+    if depth == 0 or game.is_terminal(state):
+        return 1
+    if depth == 1:
+        return len(state.actions)
+    return sum(perft_state(game, game.unchecked_result(state, action), depth - 1) for action in state.actions)
+
+def perft_position(position, depth):
+    """Counts the leaves at the given depth by playing the actions on a single position with make/unmake."""
+    if depth == 0 or position.is_terminal():
+        return 1
+    if depth == 1:
+        return len(position.actions())
+    nodes = 0
+    for action in position.actions():
+        token = position.make(action)
+        nodes += perft_position(position, depth - 1)
+        position.unmake(token)
+    return nodes
+
+def reference_actions(board, player):
+    """Computes the legal actions of a set view board with the original set-based generator.
+
+    This implementation is kept as an oracle for the optimized generator of `ShobuGame` and is much slower.
+    """
+    opponent = (player + 1) % 2
+    actions = []
+    for passive_board_j in range(2):
+        passive_board_id = 2*player + passive_board_j
+        player_passive_stones = board[passive_board_id][player]
+        all_passive_stones = player_passive_stones.union(board[passive_board_id][opponent])
+        passive_moves_dict = dict()
+        for player_passive_stone in player_passive_stones:
+            for direction, max_length in ShobuGame.autorised_moves[player_passive_stone]:
+                for length in range(1, max_length+1):
+                    if player_passive_stone + length * direction in all_passive_stones:
+                        break
+                    passive_moves_dict.setdefault((direction, length), []).append(player_passive_stone)
+
+        for active_board_i in range(2):
+            active_board_id = 2*active_board_i + (passive_board_j+1)%2
+            player_active_stones = board[active_board_id][player]
+            opponent_active_stones = board[active_board_id][opponent]
+            all_active_stones = player_active_stones.union(opponent_active_stones)
+            for player_active_stone in player_active_stones:
+                for direction, max_length in ShobuGame.autorised_moves[player_active_stone]:
+                    pushing = False
+                    moved_player_active_stone = player_active_stone
+                    for length in range(1, max_length+1):
+                        if (direction, length) not in passive_moves_dict:
+                            break
+                        moved_player_active_stone += direction
+                        if moved_player_active_stone in player_active_stones:
+                            break
+                        if not pushing and moved_player_active_stone in opponent_active_stones:
+                            pushing = True
+                        if pushing:
+                            moved_opponent_active_stone = moved_player_active_stone + direction
+                            if abs((moved_opponent_active_stone % 4) - (moved_player_active_stone % 4)) > 1 or moved_opponent_active_stone not in all_active_stones:
+                                actions.extend(ShobuAction(passive_board_id, passive_stone, active_board_id, player_active_stone, direction, length) for passive_stone in passive_moves_dict[(direction, length)])
+                            else:
+                                break
+                        else:
+                            actions.extend(ShobuAction(passive_board_id, passive_stone, active_board_id, player_active_stone, direction, length) for passive_stone in passive_moves_dict[(direction, length)])
+    return actions
+
+def reference_result(board, player, action):
+    """Plays an action on a set view board with the original set-based rules and returns the new board and
+    whether a stone was pushed."""
+    next_board = [[set(board[i][0]), set(board[i][1])] for i in range(4)]
+    passive_board_id, passive_stone_id, active_board_id, active_stone_id, direction, length = action
+    opponent = (player + 1) % 2
+
+    next_board[passive_board_id][player].remove(passive_stone_id)
+    next_board[passive_board_id][player].add(passive_stone_id + length * direction)
+
+    player_active_stones = next_board[active_board_id][player]
+    opponent_active_stones = next_board[active_board_id][opponent]
+    pushed_stone = -1
+    for l in range(1, length+1):
+        if active_stone_id + l*direction in opponent_active_stones:
+            pushed_stone = active_stone_id + l*direction
+            break
+    player_active_stones.remove(active_stone_id)
+    player_active_stones.add(active_stone_id + length * direction)
+    if pushed_stone >= 0:
+        opponent_active_stones.remove(pushed_stone)
+        landing = active_stone_id + (length+1) * direction
+        if 0 <= landing <= 15 and abs((active_stone_id + length * direction)%4 - landing%4) <= 1:
+            opponent_active_stones.add(landing)
+    return next_board, pushed_stone >= 0
+
+def check(game, state, depth):
+    """Walks the tree to the given depth and compares, at every node, the actions and the children of `ShobuGame`
+    with the reference set-based implementation, and the incremental evaluation features with recounted ones.
+
+    Returns:
+        int: The number of leaves, as counted by `perft_state`.
+
+    Raises:
+        AssertionError: At the first node where both implementations disagree.
+    """
+    if depth == 0 or game.is_terminal(state):
+        return 1
+    board = state.board
+    expected = reference_actions(board, state.to_move)
+    assert sorted(state.actions) == sorted(expected), f"Actions differ in {state}"
+    nodes = 0
+    for action in state.actions:
+        child = game.unchecked_result(state, action)
+        next_board, pushing = reference_result(board, state.to_move, action)
+        assert board_to_bitboards(next_board) == child.bitboards, f"Results of {action} differ in {state}"
+        assert child.count_boring_actions == (0 if pushing else state.count_boring_actions + 1), f"Counters of {action} differ in {state}"
+        piece_counts = compute_piece_counts(child.bitboards)
+        assert (child.piece_counts, child.min_pieces, child.center_counts) == (piece_counts, (min(piece_counts[0]), min(piece_counts[1])), compute_center_counts(child.bitboards)), f"Features of {action} differ in {state}"
+        nodes += check(game, child, depth - 1)
+    return nodes
+
+def run(game, name, depth, mode, divide):
+    """Runs perft on a stored position and reports the number of leaves, the speed and the reference count."""
+    state = get_state(game, name)
+    start = time.perf_counter()
+    if divide:
+        nodes = 0
+        for action in sorted(state.actions):
+            if mode == "position":
+                position = ShobuPosition(state, game)
+                position.make(action)
+                count = perft_position(position, depth - 1)
+            elif mode == "check":
+                count = check(game, game.unchecked_result(state, action), depth - 1)
+            else:
+                count = perft_state(game, game.unchecked_result(state, action), depth - 1)
+            print(f"{action.passive_board_id}:{action.passive_stone_id}:{action.active_board_id}:{action.active_stone_id}:{action.direction}:{action.length} {count}")
+            nodes += count
+    elif mode == "position":
+        nodes = perft_position(ShobuPosition(state, game), depth)
+    elif mode == "check":
+        nodes = check(game, state, depth)
+    else:
+        nodes = perft_state(game, state, depth)
+    elapsed = time.perf_counter() - start
+
+    reference = REFERENCE_COUNTS[name][depth] if depth < len(REFERENCE_COUNTS[name]) else None
+    status = "" if reference is None else (" OK" if nodes == reference else f" MISMATCH (expected {reference})")
+    print(f"{name} depth {depth} [{mode}]: {nodes} nodes in {elapsed:.3f}s ({nodes / max(elapsed, 1e-9):.0f} nodes/s){status}")
+    return reference is None or nodes == reference
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Perft for the Shobu move generator')
+    parser.add_argument('-d', '--depth', type=int, default=2, help='Depth of the perft')
+    parser.add_argument('-p', '--position', type=str, default="all", help=f'Stored position ["all | {" | ".join(POSITIONS)}"]')
+    parser.add_argument('-m', '--mode', type=str, default="state", help='Tree walk ["state | position | check"], check compares every node with the reference set-based implementation')
+    parser.add_argument('--divide', action='store_true', help='Print the number of leaves below each root action')
+    args = parser.parse_args()
+
+    game = ShobuGame()
+    names = list(POSITIONS) if args.position == "all" else [args.position]
+    success = all([run(game, name, args.depth, args.mode, args.divide) for name in names])
+    if not success:
+        raise SystemExit(1)
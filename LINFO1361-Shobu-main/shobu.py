@@ -1,4 +1,7 @@
-from typing import NamedTuple, List, Set
+from typing import NamedTuple
+from array import array
+import random
+import math
 
 class ShobuAction(NamedTuple):
     """Represents an action in the Shobu game, encompassing both passive and active moves.
@@ -29,23 +32,128 @@ class ShobuAction(NamedTuple):
     direction: int
     length: int
 
-class ShobuState(NamedTuple):
+LOW_SQUARES = [tuple(k for k in range(8) if (mask >> k) & 1) for mask in range(256)]
+HIGH_SQUARES = [tuple(k + 8 for k in range(8) if (mask >> k) & 1) for mask in range(256)]
+
+def squares_of(mask):
+    """Returns the tuple of positions whose bit is set in a 16-bit board mask, in increasing order."""
+    return LOW_SQUARES[mask & 0xFF] + HIGH_SQUARES[mask >> 8]
+
+def compute_zobrist_keys(seed=1361):
+    """Draws the random 64-bit keys used for the Zobrist hashing of positions.
+
+    Args:
+        seed (int, optional): The seed of the generator, fixed so that keys are the same in every process.
+
+    Returns:
+        tuple: A list of 64 keys per player, indexed like the bits of the bitboards, and the key of player 1 to move.
+    """
+    generator = random.Random(seed)
+    keys = [[generator.getrandbits(64) for _ in range(64)] for _ in range(2)]
+    return keys, generator.getrandbits(64)
+
+ZOBRIST_KEYS, ZOBRIST_TO_MOVE = compute_zobrist_keys()
+
+def compute_zobrist_key(bitboards, to_move):
+    """Computes from scratch the Zobrist key of a position.
+
+    Args:
+        bitboards (Tuple[int, int]): The bitboards of player 0 and player 1.
+        to_move (int): The ID of the player who is next to move.
+
+    Returns:
+        int: The 64-bit key, XOR of the keys of every stone and of the side to move.
+    """
+    key = ZOBRIST_TO_MOVE if to_move == 1 else 0
+    for player in range(2):
+        player_keys = ZOBRIST_KEYS[player]
+        stones = bitboards[player]
+        while stones:
+            low = stones & -stones
+            key ^= player_keys[low.bit_length() - 1]
+            stones ^= low
+    return key
+
+def board_to_bitboards(board):
+    """Converts a set view of the 4 boards into the packed bitboard representation.
+
+    Args:
+        board (List[List[Set[int]]]): The 4 boards, each one being a list of the positions of player 0's
+            stones and of player 1's stones.
+
+    Returns:
+        Tuple[int, int]: The bitboards of player 0 and player 1. The stones of a player on board `i` are stored
+            in the 16 bits starting at bit `16*i`, bit `16*i + k` being set if the player has a stone on position `k`.
+    """
+    bitboards = [0, 0]
+    for board_id, stones in enumerate(board):
+        for player in range(2):
+            for stone in stones[player]:
+                bitboards[player] |= 1 << ((board_id << 4) + stone)
+    return bitboards[0], bitboards[1]
+
+def bitboards_to_board(bitboards):
+    """Converts packed bitboards back into the set view of the 4 boards.
+
+    Args:
+        bitboards (Tuple[int, int]): The bitboards of player 0 and player 1 (see `board_to_bitboards`).
+
+    Returns:
+        List[List[Set[int]]]: The 4 boards, each one being a list of the positions of player 0's stones and
+            of player 1's stones.
+    """
+    return [[set(squares_of((bitboards[player] >> (board_id << 4)) & 0xFFFF)) for player in range(2)] for board_id in range(4)]
+
+# Central positions (5, 6, 9 and 10) of the 4 boards
+CENTER_MASK = 0x0660066006600660
+
+def compute_piece_counts(bitboards):
+    """Counts the stones of each player on each board.
+
+    Args:
+        bitboards (Tuple[int, int]): The bitboards of player 0 and player 1.
+
+    Returns:
+        tuple: The counts of player 0 and of player 1, each one being a tuple of 4 counts indexed by board.
+    """
+    return tuple(tuple(bin((bitboards[player] >> (board_id << 4)) & 0xFFFF).count("1") for board_id in range(4)) for player in range(2))
+
+def compute_center_counts(bitboards):
+    """Counts the stones of each player on the central positions of the boards (see `CENTER_MASK`)."""
+    return (bin(bitboards[0] & CENTER_MASK).count("1"), bin(bitboards[1] & CENTER_MASK).count("1"))
+
+class ShobuState:
     """Represents the current state of a Shobu game.
 
     Attributes:
         to_move (int): The ID of the player who is next to move (0 or 1).
         utility (int): The utility score of the game, from the perspective of player 0. A score of 1
             indicates a win for player 0, -1 indicates a loss, and 0 typically indicates an ongoing
-            game or a draw.
-        board (List[List[Set[int], Set[int]]]): A representation of the 4 boards in the game.
-            Each board is represented as a list containing two sets: the first set contains positions
-            of player 0's stones, and the second set contains positions of player 1's stones. The
-            positions on each board are numbered from 0 to 15, starting from the bottom left corner.
+            game or a draw. Computed on first access and memoized when the state was created with `utility=None`.
+        bitboards (Tuple[int, int]): The stones of player 0 and of player 1. Each player's stones are packed
+            in one int holding a 16-bit mask per board: bit `16*i + k` is set if the player has a stone on
+            position `k` of board `i`.
         actions (List[ShobuAction]): A list of legal actions (`ShobuAction` objects) available to the player who is
-            next to move, based on the current state.
+            next to move, based on the current state. Computed on first access, from `action_codes` if they are
+            already computed, and memoized when the state was created with `actions=None`.
         count_boring_actions (int): A counter that tracks the number of consecutive actions taken
             that do not result in pushing a stone during the active move. This can be used for determining stalemate or
             draw conditions.
+        action_codes (array): The legal actions as an `array('H')` of 16-bit codes (see `encode_action`), computed on
+            first access, from `actions` if they are already computed, and memoized. Code that keeps many states
+            alive (e.g. search trees) can use it instead of `actions` to store 2 bytes per action.
+        zobrist_key (int): The 64-bit Zobrist key of the position (stones and player to move), also used as the hash
+            of the state. Two states are equal if they have the same stones, player to move and `count_boring_actions`.
+        piece_counts (Tuple[Tuple[int, ...], Tuple[int, ...]]): The number of stones of each player on each board,
+            `piece_counts[player][board_id]`. Like `min_pieces` and `center_counts`, it is derived from the parent
+            state by `ShobuGame.unchecked_result` instead of being recounted.
+        min_pieces (Tuple[int, int]): The smallest number of stones of each player among the 4 boards.
+        center_counts (Tuple[int, int]): The number of stones of each player on the central positions (5, 6, 9 and 10)
+            of the boards.
+        board (List[List[Set[int], Set[int]]]): A read-only set view of the 4 boards, built from `bitboards` on
+            first access. Each board is represented as a list containing two sets: the first set contains positions
+            of player 0's stones, and the second set contains positions of player 1's stones. The
+            positions on each board are numbered from 0 to 15, starting from the bottom left corner.
 
     The game layout is as follows, with the boards arranged in a 2x2 grid:
 
@@ -71,12 +179,235 @@ class ShobuState(NamedTuple):
                 [{0, 1, 2, 3}, {12, 13, 14, 15}],
                 [{0, 1, 2, 3}, {12, 13, 14, 15}]
             ]
+
+        which corresponds to the bitboards (0x000F000F000F000F, 0xF000F000F000F000).
+    """
+    __slots__ = ("to_move", "bitboards", "count_boring_actions", "zobrist_key", "piece_counts", "min_pieces", "center_counts", "_utility", "_actions", "_action_codes", "_board", "_game")
+
+    def __init__(self, to_move, utility, bitboards, actions, count_boring_actions, game=None, zobrist_key=None, piece_counts=None, min_pieces=None, center_counts=None):
+        """Initializes a state.
+
+        Args:
+            to_move (int): The ID of the player who is next to move.
+            utility (int or None): The utility of the state, or None to compute it lazily.
+            bitboards (Tuple[int, int]): The bitboards of player 0 and player 1.
+            actions (List[ShobuAction] or None): The legal actions of the state, or None to compute them lazily.
+            count_boring_actions (int): The number of consecutive actions without any pushed stone.
+            game (ShobuGame, optional): The game used to compute `utility` and `actions` lazily. Required if one of them is None.
+            zobrist_key (int, optional): The Zobrist key of the position, computed from scratch if not given.
+            piece_counts (tuple, optional): The stone counts of each player on each board, computed from scratch if not given.
+            min_pieces (tuple, optional): The smallest stone count of each player, computed from `piece_counts` if not given.
+            center_counts (tuple, optional): The central stone counts of each player, computed from scratch if not given.
+        """
+        self.to_move = to_move
+        self.bitboards = bitboards
+        self.count_boring_actions = count_boring_actions
+        self.zobrist_key = compute_zobrist_key(bitboards, to_move) if zobrist_key is None else zobrist_key
+        self.piece_counts = compute_piece_counts(bitboards) if piece_counts is None else piece_counts
+        self.min_pieces = (min(self.piece_counts[0]), min(self.piece_counts[1])) if min_pieces is None else min_pieces
+        self.center_counts = compute_center_counts(bitboards) if center_counts is None else center_counts
+        self._utility = utility
+        self._actions = actions
+        self._action_codes = None
+        self._board = None
+        self._game = game
+
+    @property
+    def actions(self):
+        if self._actions is None:
+            if self._action_codes is not None:
+                actions_by_code = ShobuGame.actions_by_code
+                self._actions = [actions_by_code[code] for code in self._action_codes]
+            else:
+                self._actions = self._game.compute_actions(self.bitboards, self.to_move)
+        return self._actions
+
+    @property
+    def action_codes(self):
+        if self._action_codes is None:
+            if self._actions is not None:
+                self._action_codes = array("H", map(ShobuGame.codes_by_action.__getitem__, self._actions))
+            else:
+                self._action_codes = self._game.compute_action_codes(self.bitboards, self.to_move)
+        return self._action_codes
+
+    @property
+    def utility(self):
+        if self._utility is None:
+            self._utility = self._game.compute_utility(self.bitboards, self.to_move, self.actions)
+        return self._utility
+
+    @property
+    def board(self):
+        if self._board is None:
+            self._board = bitboards_to_board(self.bitboards)
+        return self._board
+
+    def _replace(self, **changes):
+        """Returns a copy of the state with the given fields replaced, like `NamedTuple._replace`.
+
+        Lazy fields that are not replaced are not computed.
+        """
+        fields = {
+            "to_move": self.to_move,
+            "utility": self._utility,
+            "bitboards": self.bitboards,
+            "actions": self._actions,
+            "count_boring_actions": self.count_boring_actions,
+            "game": self._game,
+            "zobrist_key": self.zobrist_key,
+            "piece_counts": self.piece_counts,
+            "min_pieces": self.min_pieces,
+            "center_counts": self.center_counts,
+        }
+        if "bitboards" in changes or "to_move" in changes:
+            fields["zobrist_key"] = None
+        if "bitboards" in changes:
+            fields["piece_counts"] = fields["min_pieces"] = fields["center_counts"] = None
+        fields.update(changes)
+        return ShobuState(**fields)
+
+    def __hash__(self):
+        return self.zobrist_key
+
+    def __eq__(self, other):
+        if not isinstance(other, ShobuState):
+            return NotImplemented
+        return self.zobrist_key == other.zobrist_key and self.to_move == other.to_move and self.bitboards == other.bitboards and self.count_boring_actions == other.count_boring_actions
+
+    def __repr__(self):
+        return f"ShobuState(to_move={self.to_move}, utility={self.utility}, bitboards=({self.bitboards[0]:#018x}, {self.bitboards[1]:#018x}), count_boring_actions={self.count_boring_actions})"
+
+DIRECTIONS = (4, 5, 1, -3, -4, -5, -1, 3)
+
+def compute_ray_table(autorised_moves):
+    """Precomputes the squares covered by every legal move of a stone.
+
+    Args:
+        autorised_moves (list of sets): The `(direction, max_length)` pairs allowed for each position.
+
+    Returns:
+        dict: Maps `(stone, direction, length)` to a tuple `(destination, path, landing)` where `destination` is
+            the position reached by the stone, `path` is the 16-bit mask of the positions it goes through
+            (destination included) and `landing` is the position a stone pushed by this move ends on, or -1 if
+            it is pushed off the board.
+    """
+    rays = dict()
+    for stone, moves in enumerate(autorised_moves):
+        row, col = stone // 4, stone % 4
+        for direction, max_length in moves:
+            delta_col = (direction + 1) % 4 - 1
+            delta_row = (direction - delta_col) // 4
+            path = 0
+            for length in range(1, max_length+1):
+                destination = stone + length * direction
+                path |= 1 << destination
+                landing_row = row + (length+1) * delta_row
+                landing_col = col + (length+1) * delta_col
+                landing = destination + direction if 0 <= landing_row <= 3 and 0 <= landing_col <= 3 else -1
+                rays[(stone, direction, length)] = (destination, path, landing)
+    return rays
+
+def compute_direction_masks(rays):
+    """Precomputes, for each direction, the 16-bit masks of the positions from which a stone stays on the
+    board after moving 1, 2 and 3 times in that direction.
+
+    Args:
+        rays (dict): The ray table returned by `compute_ray_table`.
+
+    Returns:
+        list of tuple: One `(direction, reach_1, reach_2, reach_3)` tuple per direction, where `reach_l` has
+            bit `k` set if position `k + l*direction` is on the same board as position `k`.
+    """
+    direction_masks = []
+    for direction in DIRECTIONS:
+        reach_1 = reach_2 = reach_3 = 0
+        for stone in range(16):
+            if (stone, direction, 1) in rays:
+                reach_1 |= 1 << stone
+            if (stone, direction, 2) in rays:
+                reach_2 |= 1 << stone
+                if rays[(stone, direction, 2)][2] >= 0:
+                    reach_3 |= 1 << stone
+        direction_masks.append((direction, reach_1, reach_2, reach_3))
+    return direction_masks
+
+def compute_center_gains(rays):
+    """Precomputes the change of the number of central stones of a player when one of its stones moves.
+
+    Args:
+        rays (dict): The ray table returned by `compute_ray_table`.
+
+    Returns:
+        dict: Maps `(stone, direction, length)` to -1, 0 or 1.
+    """
+    return {(stone, direction, length): ((CENTER_MASK >> destination) & 1) - ((CENTER_MASK >> stone) & 1) for (stone, direction, length), (destination, _, _) in rays.items()}
+
+DIRECTION_INDEX = {direction: index for index, direction in enumerate(DIRECTIONS)}
+
+def compute_ray_list(rays):
+    """Stores the ray table in a list indexed like the low byte of the action codes.
+
+    Args:
+        rays (dict): The ray table returned by `compute_ray_table`.
+
+    Returns:
+        list: 256 entries indexed by `stone << 4 | direction index << 1 | length - 1` (see `encode_action`), holding
+            the `(destination, path, landing)` tuple of the ray, or None if the move leaves the board.
+    """
+    ray_list = [None] * 256
+    for (stone, direction, length), ray in rays.items():
+        ray_list[(stone << 4) | (DIRECTION_INDEX[direction] << 1) | (length - 1)] = ray
+    return ray_list
+
+PLAYOUT_SAMPLING_TRIES = 64   # Rejected samples after which a random playout enumerates the legal actions instead
+PLAYOUT_CUTOFF_SCALE = 2.0    # Difference of minimum stone counts scored tanh(1) at the end of a truncated playout
+
+def encode_action(action):
+    """Packs an action into a 16-bit int.
+
+    From the most to the least significant bits: passive board (2 bits), passive stone (4 bits), active board
+    (2 bits), active stone (4 bits), index of the direction in `DIRECTIONS` (3 bits) and length minus one (1 bit).
+
+    Args:
+        action (ShobuAction): The action to encode.
+
+    Returns:
+        int: The code of the action, between 0 and 65535.
+    """
+    passive_board_id, passive_stone_id, active_board_id, active_stone_id, direction, length = action
+    return (passive_board_id << 14) | (passive_stone_id << 10) | (active_board_id << 8) | (active_stone_id << 4) | (DIRECTION_INDEX[direction] << 1) | (length - 1)
+
+def compute_action_table(make_action=ShobuAction):
+    """Precomputes every action that can appear in a game, so that move generation does not have to
+    build new action objects.
+
+    Args:
+        make_action (callable, optional): Builds an action from its 6 fields. Defaults to `ShobuAction`.
+
+    Returns:
+        dict: Maps `(passive_board_id, active_board_id, direction, length)` to a list of 16 lists of 16 actions,
+            the action moving the active stone `a` and the passive stone `p` being at index `[a][p]`.
     """
-    to_move: int
-    utility: int
-    board: List[List[Set[int]]]
-    actions: List[ShobuAction]
-    count_boring_actions: int
+    action_table = dict()
+    for passive_board_id in range(4):
+        for active_board_id in ((passive_board_id + 1) % 2, (passive_board_id + 1) % 2 + 2):
+            for direction in DIRECTIONS:
+                for length in (1, 2):
+                    action_table[(passive_board_id, active_board_id, direction, length)] = [
+                        [make_action(passive_board_id, passive_stone_id, active_board_id, active_stone_id, direction, length) for passive_stone_id in range(16)]
+                        for active_stone_id in range(16)
+                    ]
+    return action_table
+
+def compute_actions_by_code(action_table):
+    """Returns the list mapping each 16-bit action code to its `ShobuAction` (None for unused codes)."""
+    actions_by_code = [None] * 65536
+    for board_actions in action_table.values():
+        for stone_actions in board_actions:
+            for action in stone_actions:
+                actions_by_code[encode_action(action)] = action
+    return actions_by_code
 
 class ShobuGame:
     """Represents the game logic and state management for a game of Shobu.
@@ -86,6 +417,14 @@ class ShobuGame:
 
     Attributes:
         autorised_moves (list of sets): A precomputed list of legal moves for stones based on their position on the board.
+        rays (dict): For each position, direction and length, the destination, the mask of the positions on the path and the landing position of a pushed stone.
+        direction_masks (list of tuples): For each direction, the bitboard masks of the positions from which a stone can move 1, 2 or 3 times in that direction.
+        center_gains (dict): For each position, direction and length, the change of the number of central stones of the moved stone's owner.
+        action_table (dict): The precomputed `ShobuAction` objects, indexed by boards, direction and length, then by stones.
+        action_code_table (dict): The same table holding the 16-bit codes of the actions (see `encode_action`).
+        actions_by_code (list): The `ShobuAction` of each 16-bit code.
+        codes_by_action (dict): The 16-bit code of each `ShobuAction`.
+        ray_list (list): The rays indexed by the low byte of the action codes (see `compute_ray_list`).
         max_count_boring_actions (int): The maximum number of moves without any pushed stone before the game is considered a draw.
         initial (ShobuState): The initial state of the game with the board setup and starting player.
 
@@ -93,10 +432,17 @@ class ShobuGame:
         to_move(state): Returns the player whose turn it is to move.
         actions(state): Returns a list of legal actions for the current state.
         result(state, action): Returns the state that results from executing the given action on the current state.
+        unchecked_result(state, action): Same as `result`, for actions known to be legal.
+        is_legal(state, action): Checks in constant time if an action is legal in the current state.
+        apply_action(bitboards, player, zobrist_key, action): Moves the stones of a legal action on the bitboards.
         is_terminal(state): Checks if the game has reached a terminal state.
         utility(state, player): Return the utility of a terminal state for a given player.
-        compute_actions(board, player): Computes and returns all legal actions for the given player on the current board.
-        compute_utility(board, player, actions): Computes the utility of the current board state for the given player.
+        compute_actions(bitboards, player): Computes and returns all legal actions for the given player on the current board.
+        compute_action_codes(bitboards, player): Same as `compute_actions`, returning the 16-bit codes of the actions in an array.
+        compute_pushing_actions(bitboards, player): Computes the legal actions that push an opponent stone.
+        compute_utility(bitboards, player, actions): Computes the utility of the current board state for the given player.
+        sample_action(player_stones, opponent_stones, player): Draws a uniformly random legal action without listing the actions.
+        random_playout(bitboards, player, count_boring_actions, max_actions, cutoff_evaluation): Plays random actions on the bitboards and returns the utility reached.
     """
 
     autorised_moves = [
@@ -125,6 +471,15 @@ class ShobuGame:
         {(-4, 2), (-5, 2), (-1, 2)}
     ]
 
+    rays = compute_ray_table(autorised_moves)
+    direction_masks = compute_direction_masks(rays)
+    center_gains = compute_center_gains(rays)
+    action_table = compute_action_table()
+    action_code_table = compute_action_table(lambda *fields: encode_action(fields))
+    actions_by_code = compute_actions_by_code(action_table)
+    codes_by_action = {action: code for code, action in enumerate(actions_by_code) if action is not None}
+    ray_list = compute_ray_list(rays)
+
     def __init__(self, max_count_boring_actions=50):
         """Initializes a new game of Shobu.
 
@@ -138,8 +493,8 @@ class ShobuGame:
             [{0, 1, 2, 3}, {12, 13, 14, 15}],
             [{0, 1, 2, 3}, {12, 13, 14, 15}]
         ]
-        actions = self.compute_actions(board, 0)
-        self.initial = ShobuState(to_move=0, utility=0, board=board, actions=actions, count_boring_actions=0)
+        bitboards = board_to_bitboards(board)
+        self.initial = ShobuState(to_move=0, utility=None, bitboards=bitboards, actions=None, count_boring_actions=0, game=self)
 
     def to_move(self, state):
         """Determines the player whose turn it is to move.
@@ -175,55 +530,148 @@ class ShobuGame:
         Returns:
             ShobuState: The state resulting from the execution of the action.
         """
-        if action not in state.actions:
+        if not self.is_legal(state, action):
             return state
 
-        board = state.board
-        next_board = [
-            [set(board[0][0]), set(board[0][1])],
-            [set(board[1][0]), set(board[1][1])],
-            [set(board[2][0]), set(board[2][1])],
-            [set(board[3][0]), set(board[3][1])],
-        ]
-        
+        return self.unchecked_result(state, action)
+
+    def unchecked_result(self, state, action):
+        """
+        Computes the state resulting from taking a specific action in the given state, without checking that the
+        action is legal.
+
+        This is meant for search code playing actions taken from `state.actions`. Actions coming from outside
+        (e.g. another agent) must go through `result`.
+
+        Args:
+            state (ShobuState): The current state of the game.
+            action (ShobuAction): The legal action to be executed.
+
+        Returns:
+            ShobuState: The state resulting from the execution of the action.
+        """
+        player = state.to_move
+        opponent = (player + 1) % 2
+        next_bitboards, zobrist_key, pushing, pushed_off = self.apply_action(state.bitboards, player, state.zobrist_key, action)
+
+        # The evaluation features are updated from the ones of the parent state
+        _, passive_stone_id, active_board_id, active_stone_id, direction, length = action
+        center_counts = state.center_counts
+        piece_counts = state.piece_counts
+        min_pieces = state.min_pieces
+        if pushing:
+            center_counts = compute_center_counts(next_bitboards)
+            if pushed_off:
+                opponent_counts = list(piece_counts[opponent])
+                opponent_counts[active_board_id] -= 1
+                opponent_counts = tuple(opponent_counts)
+                opponent_min = min(min_pieces[opponent], opponent_counts[active_board_id])
+                piece_counts = (piece_counts[0], opponent_counts) if opponent == 1 else (opponent_counts, piece_counts[1])
+                min_pieces = (min_pieces[0], opponent_min) if opponent == 1 else (opponent_min, min_pieces[1])
+        else:
+            center_gains = ShobuGame.center_gains
+            center_gain = center_gains[(passive_stone_id, direction, length)] + center_gains[(active_stone_id, direction, length)]
+            if center_gain:
+                center_counts = (center_counts[0] + center_gain, center_counts[1]) if player == 0 else (center_counts[0], center_counts[1] + center_gain)
+
+        # The actions and the utility of the new state are only computed if they are accessed
+        return ShobuState(to_move=opponent, utility=None, bitboards=next_bitboards, actions=None, count_boring_actions=0 if pushing else state.count_boring_actions+1, game=self, zobrist_key=zobrist_key,
+                          piece_counts=piece_counts, min_pieces=min_pieces, center_counts=center_counts)
+
+    def is_legal(self, state, action):
+        """Checks if an action is legal in the given state.
+
+        The check is done in constant time on the bitboards, without computing nor scanning `state.actions`.
+
+        Args:
+            state (ShobuState): The current state of the game.
+            action: The action to check. Anything that is not a legal `ShobuAction` (or an equal tuple) is illegal.
+
+        Returns:
+            bool: True if the action is in the legal actions of the state, False otherwise.
+        """
+        if not isinstance(action, tuple) or len(action) != 6:
+            return False
         passive_board_id, passive_stone_id, active_board_id, active_stone_id, direction, length = action
         player = state.to_move
+        if (passive_board_id, active_board_id, direction, length) not in ShobuGame.action_table or passive_board_id // 2 != player:
+            return False
+        passive_ray = ShobuGame.rays.get((passive_stone_id, direction, length))
+        active_ray = ShobuGame.rays.get((active_stone_id, direction, length))
+        if passive_ray is None or active_ray is None:
+            return False
+
+        player_stones = state.bitboards[player]
+        opponent_stones = state.bitboards[(player + 1) % 2]
+
+        # The passive stone must be moved on an empty path
+        passive_offset = passive_board_id << 4
+        if not (player_stones >> (passive_offset + passive_stone_id)) & 1:
+            return False
+        if ((player_stones | opponent_stones) >> passive_offset) & passive_ray[1]:
+            return False
+
+        # The active stone cannot push its own stones, more than one stone, nor a stone that has a stone behind it
+        active_offset = active_board_id << 4
+        if not (player_stones >> (active_offset + active_stone_id)) & 1:
+            return False
+        _, path, landing = active_ray
+        if (player_stones >> active_offset) & path:
+            return False
+        pushed_stones = (opponent_stones >> active_offset) & path
+        if pushed_stones:
+            if pushed_stones & (pushed_stones - 1):
+                return False
+            if landing >= 0 and ((player_stones | opponent_stones) >> (active_offset + landing)) & 1:
+                return False
+        return True
+
+    def apply_action(self, bitboards, player, zobrist_key, action):
+        """Moves the stones of a legal action on the bitboards, without checking its legality.
+
+        Args:
+            bitboards (tuple): The bitboards of both players before the action.
+            player (int): The player playing the action.
+            zobrist_key (int): The Zobrist key of the position before the action.
+            action (ShobuAction): The action to apply.
+
+        Returns:
+            tuple: The bitboards and the Zobrist key after the action, whether a stone was pushed, and whether
+                it was pushed off the board.
+        """
+        passive_board_id, passive_stone_id, active_board_id, active_stone_id, direction, length = action
+        rays = ShobuGame.rays
         opponent = (player + 1) % 2
+        player_stones = bitboards[player]
+        opponent_stones = bitboards[opponent]
 
         # Act passive move
-        passive_board = next_board[passive_board_id]
-        player_passive_stones = passive_board[player]
-        
-        player_passive_stones.remove(passive_stone_id)
-        player_passive_stones.add(passive_stone_id + length * direction)
+        passive_offset = passive_board_id << 4
+        passive_destination = rays[(passive_stone_id, direction, length)][0]
+        player_stones ^= (1 << (passive_offset + passive_stone_id)) | (1 << (passive_offset + passive_destination))
+        player_keys = ZOBRIST_KEYS[player]
+        zobrist_key ^= ZOBRIST_TO_MOVE ^ player_keys[passive_offset + passive_stone_id] ^ player_keys[passive_offset + passive_destination]
 
         # Act active move
-        active_board = next_board[active_board_id]
-        player_active_stones = active_board[player]
-        opponent_active_stones = active_board[opponent]
-
-        pushing = False
-        opponent_active_stone = -1
-        for l in range(1, length+1):
-            if active_stone_id + l*direction in opponent_active_stones:
-                pushing = True
-                opponent_active_stone = active_stone_id + l*direction
-                break
-        
-        player_active_stones.remove(active_stone_id)
-        player_active_stones.add(active_stone_id + length * direction)
+        active_offset = active_board_id << 4
+        active_destination, path, landing = rays[(active_stone_id, direction, length)]
+        player_stones ^= (1 << (active_offset + active_stone_id)) | (1 << (active_offset + active_destination))
+        zobrist_key ^= player_keys[active_offset + active_stone_id] ^ player_keys[active_offset + active_destination]
 
+        # At most one opponent stone lies on the path of a legal active move
+        pushed_stone = (opponent_stones >> active_offset) & path
+        pushing = pushed_stone != 0
+        pushed_off = pushing and landing < 0
         if pushing:
-            opponent_active_stones.remove(opponent_active_stone)
-            new_opponent_active_stone = active_stone_id + (length+1) * direction
-            if new_opponent_active_stone >= 0 and new_opponent_active_stone <= 15 and abs((active_stone_id + length * direction)%4 - (new_opponent_active_stone)%4) <= 1:
-                opponent_active_stones.add(active_stone_id + (length+1) * direction)
-            
-        next_to_move = opponent
-        next_actions = self.compute_actions(next_board, next_to_move)
-        next_utility = self.compute_utility(next_board, next_to_move, next_actions)
+            opponent_keys = ZOBRIST_KEYS[opponent]
+            opponent_stones ^= pushed_stone << active_offset
+            zobrist_key ^= opponent_keys[active_offset + pushed_stone.bit_length() - 1]
+            if landing >= 0:
+                opponent_stones |= 1 << (active_offset + landing)
+                zobrist_key ^= opponent_keys[active_offset + landing]
 
-        return ShobuState(to_move=next_to_move, utility=next_utility, board=next_board, actions=next_actions, count_boring_actions=0 if pushing else state.count_boring_actions+1)
+        next_bitboards = (player_stones, opponent_stones) if player == 0 else (opponent_stones, player_stones)
+        return next_bitboards, zobrist_key, pushing, pushed_off
 
     def is_terminal(self, state):
         """Checks if the game has reached a terminal state.
@@ -238,7 +686,7 @@ class ShobuGame:
         Returns:
             bool: True if the game has reached a terminal state, False otherwise.
         """
-        return state.utility != 0 or state.count_boring_actions >= self.max_count_boring_actions
+        return state.count_boring_actions >= self.max_count_boring_actions or state.utility != 0
 
     def utility(self, state, player):
         """Computes the utility of a terminal state for a given player.
@@ -262,14 +710,14 @@ class ShobuGame:
         return state.utility if player == 0 else -state.utility
     
     def display(self, state):
-        def get_row_str(board, i):
+        def get_row_str(board_id, i):
+            white_stones = (state.bitboards[0] >> (board_id << 4)) & 0xFFFF
+            black_stones = (state.bitboards[1] >> (board_id << 4)) & 0xFFFF
             s = ""
             for j in range(0, 4):
-                white_stones = board[0]
-                black_stones = board[1]
-                if i*4 + j in white_stones:
+                if (white_stones >> (i*4 + j)) & 1:
                     s += "W"
-                elif i*4 + j in black_stones:
+                elif (black_stones >> (i*4 + j)) & 1:
                     s += "B"
                 else:
                     s += "."
@@ -277,86 +725,166 @@ class ShobuGame:
 
         s = ""
         for i in range(3, -1, -1):
-            s += f"{get_row_str(state.board[2], i)}   {get_row_str(state.board[3], i)}\n"
+            s += f"{get_row_str(2, i)}   {get_row_str(3, i)}\n"
         s += f"\n{'-'*11}\n\n"
         for i in range(3, -1, -1):
-            s += f"{get_row_str(state.board[0], i)}   {get_row_str(state.board[1], i)}\n"
+            s += f"{get_row_str(0, i)}   {get_row_str(1, i)}\n"
         
         print(s)
 
-    def compute_actions(self, board, player):
+    def compute_actions(self, bitboards, player):
         """Computes all legal actions for the given player on the current board.
 
+        The moves of all the stones of a board are computed at once for each direction and length, by shifting
+        the bitboards of the board.
+
         Args:
-            board (list): The game board represented as a list of sets.
+            bitboards (tuple): The bitboards of both players (see `ShobuState.bitboards`). The set view of the
+                boards (`ShobuState.board`) is also accepted and converted.
             player (int): The player number (0 or 1).
 
         Returns:
             list of ShobuAction: A list of all legal actions for the player.
         """
+        if not isinstance(bitboards, tuple):
+            bitboards = board_to_bitboards(bitboards)
+        return self.generate_actions(bitboards, player, ShobuGame.action_table)
+
+    def compute_pushing_actions(self, bitboards, player):
+        """Computes the legal actions of the given player whose active move pushes an opponent stone.
+
+        This is the move generation of quiescence searches: only the pushing moves are generated, without building
+        the other actions.
+
+        Args:
+            bitboards (tuple): The bitboards of both players (see `ShobuState.bitboards`).
+            player (int): The player number (0 or 1).
+
+        Returns:
+            list of ShobuAction: The pushing actions, in the same order as in `compute_actions`.
+        """
+        return self.generate_actions(bitboards, player, ShobuGame.action_table, pushing_only=True)
+
+    def compute_action_codes(self, bitboards, player):
+        """Computes the codes of all legal actions for the given player on the current board.
+
+        This is the compact counterpart of `compute_actions`: each action takes 2 bytes instead of a reference to
+        a `ShobuAction`. Use `decode_action` to get the actions back.
+
+        Args:
+            bitboards (tuple): The bitboards of both players (see `ShobuState.bitboards`).
+            player (int): The player number (0 or 1).
+
+        Returns:
+            array: An `array('H')` of action codes, in the same order as `compute_actions`.
+        """
+        return array("H", self.generate_actions(bitboards, player, ShobuGame.action_code_table))
+
+    def generate_actions(self, bitboards, player, action_table, pushing_only=False):
+        """Generates the legal actions for the given player, taking them from a precomputed action table.
+
+        Args:
+            bitboards (tuple): The bitboards of both players.
+            player (int): The player number (0 or 1).
+            action_table (dict): `ShobuGame.action_table` or `ShobuGame.action_code_table`.
+            pushing_only (bool, optional): Only generate the actions whose active move pushes a stone. Defaults to False.
+
+        Returns:
+            list: The entries of `action_table` for all legal actions.
+        """
         opponent = (player + 1) % 2
-        autorised_moves = ShobuGame.autorised_moves
+        direction_masks = ShobuGame.direction_masks
+        low_squares = LOW_SQUARES
+        high_squares = HIGH_SQUARES
+        player_stones = bitboards[player]
+        opponent_stones = bitboards[opponent]
 
         actions = []
-        actions_append = actions.append
+        actions_extend = actions.extend
 
         for passive_board_j in range(2):
             passive_board_id = 2*player + passive_board_j
-            player_passive_stones = board[passive_board_id][player]
-            opponent_passive_stones = board[passive_board_id][opponent]
-            all_passive_stones = player_passive_stones.union(opponent_passive_stones)
+            passive_offset = passive_board_id << 4
+            player_passive_stones = (player_stones >> passive_offset) & 0xFFFF
+            all_passive_stones = player_passive_stones | ((opponent_stones >> passive_offset) & 0xFFFF)
+
+            # Stones that can make a passive move, for each direction and length: the path must be empty
             passive_moves_dict = dict()
-            for player_passive_stone in player_passive_stones:
-                for direction, max_length in autorised_moves[player_passive_stone]:
-                    for length in range(1, max_length+1):
-                        if player_passive_stone + length * direction in all_passive_stones:
-                            break
-                        else:
-                            if (direction, length) in passive_moves_dict:
-                                passive_moves_dict[(direction, length)].append(player_passive_stone)
-                            else:
-                                passive_moves_dict[(direction, length)] = [player_passive_stone]
+            for direction, reach_1, reach_2, _ in direction_masks:
+                if direction > 0:
+                    blocked_1 = all_passive_stones >> direction
+                    blocked_2 = all_passive_stones >> 2*direction
+                else:
+                    blocked_1 = all_passive_stones << -direction
+                    blocked_2 = all_passive_stones << -2*direction
+                movable_1 = player_passive_stones & reach_1 & ~blocked_1
+                if movable_1:
+                    movable_2 = movable_1 & reach_2 & ~blocked_2
+                    passive_moves_dict[direction] = (
+                        low_squares[movable_1 & 0xFF] + high_squares[movable_1 >> 8],
+                        low_squares[movable_2 & 0xFF] + high_squares[movable_2 >> 8],
+                    )
 
             for active_board_i in range(2):
                 active_board_id = 2*active_board_i + (passive_board_j+1)%2
-                player_active_stones = board[active_board_id][player]
-                opponent_active_stones = board[active_board_id][opponent]
-                all_active_stones = player_active_stones.union(opponent_active_stones)
-                for player_active_stone in player_active_stones:
-                    for direction, max_length in autorised_moves[player_active_stone]:
-                        pushing = False
-                        moved_player_active_stone = player_active_stone
-                        for length in range(1, max_length+1):
-                            if (direction, length) not in passive_moves_dict:
-                                break
-                            moved_player_active_stone += direction
-                            if moved_player_active_stone in player_active_stones:
-                                break
-                            if not pushing and moved_player_active_stone in opponent_active_stones:
-                                pushing = True
-                            if pushing:
-                                moved_opponent_active_stone = moved_player_active_stone + direction
-                                if abs((moved_opponent_active_stone % 4) - (moved_player_active_stone % 4)) > 1 or moved_opponent_active_stone not in all_active_stones:
-                                    for passive_stone in passive_moves_dict[(direction, length)]:
-                                        actions_append(ShobuAction(passive_board_id, passive_stone, active_board_id, player_active_stone, direction, length))
-                                else:
-                                    break
-                            else:
-                                for passive_stone in passive_moves_dict[(direction, length)]:
-                                    actions_append(ShobuAction(passive_board_id, passive_stone, active_board_id, player_active_stone, direction, length))
+                active_offset = active_board_id << 4
+                player_active_stones = (player_stones >> active_offset) & 0xFFFF
+                opponent_active_stones = (opponent_stones >> active_offset) & 0xFFFF
+                all_active_stones = player_active_stones | opponent_active_stones
+                for direction, reach_1, reach_2, reach_3 in direction_masks:
+                    if direction not in passive_moves_dict:
+                        continue
+                    passive_stones_1, passive_stones_2 = passive_moves_dict[direction]
+                    # Positions k such that position k + l*direction holds a stone
+                    if direction > 0:
+                        player_1 = player_active_stones >> direction
+                        player_2 = player_active_stones >> 2*direction
+                        opponent_1 = opponent_active_stones >> direction
+                        opponent_2 = opponent_active_stones >> 2*direction
+                        all_2 = all_active_stones >> 2*direction
+                        all_3 = all_active_stones >> 3*direction
+                    else:
+                        player_1 = player_active_stones << -direction
+                        player_2 = player_active_stones << -2*direction
+                        opponent_1 = opponent_active_stones << -direction
+                        opponent_2 = opponent_active_stones << -2*direction
+                        all_2 = all_active_stones << -2*direction
+                        all_3 = all_active_stones << -3*direction
+
+                    # A stone cannot push its own stones, nor a stone that has another stone behind it
+                    movable_1 = player_active_stones & reach_1 & ~player_1 & ~(opponent_1 & reach_2 & all_2)
+                    if not movable_1:
+                        continue
+                    moving_1 = movable_1 & opponent_1 if pushing_only else movable_1
+                    if moving_1:
+                        board_actions = action_table[(passive_board_id, active_board_id, direction, 1)]
+                        for player_active_stone in low_squares[moving_1 & 0xFF] + high_squares[moving_1 >> 8]:
+                            actions_extend(map(board_actions[player_active_stone].__getitem__, passive_stones_1))
+
+                    if not passive_stones_2:
+                        continue
+                    movable_2 = movable_1 & reach_2 & ~player_2 & ~((opponent_1 | opponent_2) & reach_3 & all_3)
+                    if pushing_only:
+                        movable_2 &= opponent_1 | opponent_2
+                    if not movable_2:
+                        continue
+                    board_actions = action_table[(passive_board_id, active_board_id, direction, 2)]
+                    for player_active_stone in low_squares[movable_2 & 0xFF] + high_squares[movable_2 >> 8]:
+                        actions_extend(map(board_actions[player_active_stone].__getitem__, passive_stones_2))
 
         return actions
 
-    def compute_utility(self, board, player, actions):
+    def compute_utility(self, bitboards, player, actions):
         """
         Computes the utility of the current board state for the given player.
 
         This method is used to evaluate the state for end-game conditions.
 
         Args:
-            board (list): The game board represented as a list of sets.
+            bitboards (tuple): The bitboards of both players (see `ShobuState.bitboards`). The set view of the
+                boards (`ShobuState.board`) is also accepted and converted.
             player (int): The player number (0 or 1).
-            actions (list of ShobuAction): The possible actions for the player.
+            actions (list of ShobuAction): The possible actions for the player, or their codes (see `compute_action_codes`).
 
         Returns:
             int: The utility value of the board state for the player. -1 for a loss, 1 for a win, or 0 if the game continues or is a draw.
@@ -364,10 +892,260 @@ class ShobuGame:
         if len(actions) == 0:
             return -1 if player == 0 else 1
 
-        for white_stones, black_stones in board:
-            if len(white_stones) == 0:
+        if not isinstance(bitboards, tuple):
+            bitboards = board_to_bitboards(bitboards)
+
+        white_stones, black_stones = bitboards
+        for board_offset in (0, 16, 32, 48):
+            if not (white_stones >> board_offset) & 0xFFFF:
                 return -1
-            if len(black_stones) == 0:
+            if not (black_stones >> board_offset) & 0xFFFF:
                 return 1
         
-        return 0
\ No newline at end of file
+        return 0
+
+    def sample_action(self, player_stones, opponent_stones, player):
+        """Draws a uniformly random legal action of a position, without listing the legal actions.
+
+        A passive stone, an active stone on a board of the other color, a direction and a length are drawn
+        uniformly among the stones of the player, and the draw is repeated until the move is legal (rejection
+        sampling). Since every legal action is drawn in exactly one way, the accepted action is uniform among the
+        legal actions. After `PLAYOUT_SAMPLING_TRIES` rejections, the legal actions are listed instead, which also
+        detects the positions without any legal action.
+
+        Args:
+            player_stones (int): The bitboard of the player to move.
+            opponent_stones (int): The bitboard of its opponent.
+            player (int): The player to move (0 or 1).
+
+        Returns:
+            tuple: The passive board offset and stone, the active board offset and stone and the index of the ray
+                in `ray_list` (`direction index << 1 | length - 1`) of the action, or None if there is none.
+        """
+        ray_list = ShobuGame.ray_list
+        low_squares = LOW_SQUARES
+        high_squares = HIGH_SQUARES
+        random_float = random.random
+        all_stones = player_stones | opponent_stones
+
+        # Passive board j is board 2*player + j, its active boards are the boards of the other color
+        counts = [bin((player_stones >> (board_id << 4)) & 0xFFFF).count("1") for board_id in range(4)]
+        passive_0 = counts[2*player]
+        passive_1 = counts[2*player + 1]
+        active_0 = counts[1] + counts[3]
+        active_1 = counts[0] + counts[2]
+        pairs_0 = passive_0 * active_0
+        total = (pairs_0 + passive_1 * active_1) << 4
+
+        for _ in range(PLAYOUT_SAMPLING_TRIES if total else 0):
+            draw = int(random_float() * total)
+            ray_index = draw & 0xF
+            draw >>= 4
+            if draw < pairs_0:
+                passive_board_id = 2*player
+                active_count = active_0
+                active_board_id = 1
+            else:
+                draw -= pairs_0
+                passive_board_id = 2*player + 1
+                active_count = active_1
+                active_board_id = 0
+            passive_index, active_index = divmod(draw, active_count)
+            if active_index >= counts[active_board_id]:
+                active_index -= counts[active_board_id]
+                active_board_id += 2
+
+            # The passive stone must be moved on an empty path
+            passive_offset = passive_board_id << 4
+            mask = (player_stones >> passive_offset) & 0xFFFF
+            squares = low_squares[mask & 0xFF]
+            passive_stone = squares[passive_index] if passive_index < len(squares) else high_squares[mask >> 8][passive_index - len(squares)]
+            ray = ray_list[(passive_stone << 4) | ray_index]
+            if ray is None or (all_stones >> passive_offset) & ray[1]:
+                continue
+
+            # The active stone cannot push its own stones, more than one stone, nor a stone that has a stone behind it
+            active_offset = active_board_id << 4
+            mask = (player_stones >> active_offset) & 0xFFFF
+            squares = low_squares[mask & 0xFF]
+            active_stone = squares[active_index] if active_index < len(squares) else high_squares[mask >> 8][active_index - len(squares)]
+            ray = ray_list[(active_stone << 4) | ray_index]
+            if ray is None:
+                continue
+            _, path, landing = ray
+            if (player_stones >> active_offset) & path:
+                continue
+            pushed_stones = (opponent_stones >> active_offset) & path
+            if pushed_stones and (pushed_stones & (pushed_stones - 1) or (landing >= 0 and (all_stones >> (active_offset + landing)) & 1)):
+                continue
+            return passive_offset, passive_stone, active_offset, active_stone, ray_index
+
+        bitboards = (player_stones, opponent_stones) if player == 0 else (opponent_stones, player_stones)
+        codes = self.generate_actions(bitboards, player, ShobuGame.action_code_table)
+        if not codes:
+            return None
+        code = random.choice(codes)
+        return (code >> 10) & 0x30, (code >> 10) & 0xF, (code >> 4) & 0x30, (code >> 4) & 0xF, code & 0xF
+
+    def random_playout(self, bitboards, player, count_boring_actions, max_actions=100, cutoff_evaluation=False):
+        """Plays uniformly random legal actions from a position until the game ends or `max_actions` actions are played.
+
+        The actions are drawn with `sample_action` and played on two local bitboards: no `ShobuState` and no list
+        of actions is created, except when `sample_action` falls back on listing the actions.
+
+        Args:
+            bitboards (tuple): The bitboards of both players.
+            player (int): The player to move (0 or 1).
+            count_boring_actions (int): The number of consecutive actions without any pushed stone.
+            max_actions (int, optional): The maximum number of actions played. Defaults to 100.
+            cutoff_evaluation (bool, optional): Whether an unfinished game is scored by the difference between the
+                minimum stone counts of player 0 and player 1 over the boards, squashed to ]-1, 1[ by
+                tanh(difference / `PLAYOUT_CUTOFF_SCALE`), instead of 0. Defaults to False.
+
+        Returns:
+            float: The utility of the position reached (see `compute_utility`): 1 if player 0 has won, -1 if player 1
+                has won, 0 for a draw, and 0 or the cutoff evaluation for an unfinished game.
+        """
+        ray_list = ShobuGame.ray_list
+        max_count_boring_actions = self.max_count_boring_actions
+        player_stones = bitboards[player]
+        opponent_stones = bitboards[(player + 1) % 2]
+
+        # The end of the game is checked in the order of `compute_utility`
+        action = self.sample_action(player_stones, opponent_stones, player)
+        if action is None:
+            return -1 if player == 0 else 1
+        white_stones, black_stones = bitboards
+        for board_offset in (0, 16, 32, 48):
+            if not (white_stones >> board_offset) & 0xFFFF:
+                return -1
+            if not (black_stones >> board_offset) & 0xFFFF:
+                return 1
+
+        for _ in range(max_actions):
+            if count_boring_actions >= max_count_boring_actions:
+                return 0
+            passive_offset, passive_stone, active_offset, active_stone, ray_index = action
+            player_stones ^= (1 << (passive_offset + passive_stone)) | (1 << (passive_offset + ray_list[(passive_stone << 4) | ray_index][0]))
+            destination, path, landing = ray_list[(active_stone << 4) | ray_index]
+            player_stones ^= (1 << (active_offset + active_stone)) | (1 << (active_offset + destination))
+            pushed_stone = (opponent_stones >> active_offset) & path
+            if pushed_stone:
+                count_boring_actions = 0
+                opponent_stones ^= pushed_stone << active_offset
+                if landing >= 0:
+                    opponent_stones |= 1 << (active_offset + landing)
+                elif not (opponent_stones >> active_offset) & 0xFFFF:
+                    return 1 if player == 0 else -1
+            else:
+                count_boring_actions += 1
+            player = (player + 1) % 2
+            player_stones, opponent_stones = opponent_stones, player_stones
+            action = self.sample_action(player_stones, opponent_stones, player)
+            if action is None:
+                return -1 if player == 0 else 1
+        if not cutoff_evaluation or count_boring_actions >= max_count_boring_actions:
+            return 0
+        white_stones, black_stones = (player_stones, opponent_stones) if player == 0 else (opponent_stones, player_stones)
+        white_min = min(bin((white_stones >> board_offset) & 0xFFFF).count("1") for board_offset in (0, 16, 32, 48))
+        black_min = min(bin((black_stones >> board_offset) & 0xFFFF).count("1") for board_offset in (0, 16, 32, 48))
+        return math.tanh((white_min - black_min) / PLAYOUT_CUTOFF_SCALE)
+
+class ShobuPosition:
+    """A mutable Shobu position for depth-first searches.
+
+    Instead of creating a new `ShobuState` for every node, a search can play and take back actions on a single
+    position with `make` and `unmake`. Only the bitboards, the Zobrist key, the counters and the piece counts
+    of the boards touched by the action are updated.
+
+    Attributes:
+        game (ShobuGame): The game the position belongs to.
+        to_move (int): The ID of the player who is next to move (0 or 1).
+        bitboards (Tuple[int, int]): The bitboards of player 0 and player 1 (see `ShobuState.bitboards`).
+        count_boring_actions (int): The number of consecutive actions without any pushed stone.
+        zobrist_key (int): The Zobrist key of the position.
+        piece_counts (List[List[int]]): The number of stones of each player on each board, `piece_counts[player][board_id]`.
+        center_counts (Tuple[int, int]): The number of stones of each player on the central positions of the boards.
+    """
+    __slots__ = ("game", "to_move", "bitboards", "count_boring_actions", "zobrist_key", "piece_counts", "center_counts", "_actions")
+
+    def __init__(self, state, game):
+        """Initializes a position from a state.
+
+        Args:
+            state (ShobuState): The state to start from.
+            game (ShobuGame): The game the state belongs to.
+        """
+        self.game = game
+        self.to_move = state.to_move
+        self.bitboards = state.bitboards
+        self.count_boring_actions = state.count_boring_actions
+        self.zobrist_key = state.zobrist_key
+        self.piece_counts = [list(counts) for counts in state.piece_counts]
+        self.center_counts = state.center_counts
+        self._actions = state._actions
+
+    def actions(self):
+        """Returns the legal actions of the player to move, computed once per position."""
+        if self._actions is None:
+            self._actions = self.game.compute_actions(self.bitboards, self.to_move)
+        return self._actions
+
+    def utility(self):
+        """Returns the utility of the position from the perspective of player 0 (see `ShobuState.utility`)."""
+        return self.game.compute_utility(self.bitboards, self.to_move, self.actions())
+
+    def is_terminal(self):
+        """Checks if the position is terminal (see `ShobuGame.is_terminal`)."""
+        return self.count_boring_actions >= self.game.max_count_boring_actions or self.utility() != 0
+
+    def make(self, action):
+        """Plays a legal action on the position.
+
+        Args:
+            action (ShobuAction): The action to play. Its legality is not checked.
+
+        Returns:
+            tuple: The undo token to give to `unmake` to take the action back.
+        """
+        player = self.to_move
+        opponent = (player + 1) % 2
+        token = (self.bitboards, self.zobrist_key, self.count_boring_actions, self._actions, self.center_counts, -1)
+        self.bitboards, self.zobrist_key, pushing, pushed_off = self.game.apply_action(self.bitboards, player, self.zobrist_key, action)
+        self.to_move = opponent
+        self._actions = None
+        _, passive_stone_id, active_board_id, active_stone_id, direction, length = action
+        if pushing:
+            self.count_boring_actions = 0
+            self.center_counts = compute_center_counts(self.bitboards)
+            if pushed_off:
+                self.piece_counts[opponent][active_board_id] -= 1
+                token = token[:5] + (active_board_id,)
+        else:
+            self.count_boring_actions += 1
+            center_gains = ShobuGame.center_gains
+            center_gain = center_gains[(passive_stone_id, direction, length)] + center_gains[(active_stone_id, direction, length)]
+            if center_gain:
+                center_counts = self.center_counts
+                self.center_counts = (center_counts[0] + center_gain, center_counts[1]) if player == 0 else (center_counts[0], center_counts[1] + center_gain)
+        return token
+
+    def unmake(self, token):
+        """Takes back the last action played with `make`.
+
+        Args:
+            token (tuple): The undo token returned by `make`.
+        """
+        self.bitboards, self.zobrist_key, self.count_boring_actions, self._actions, self.center_counts, captured_board_id = token
+        if captured_board_id >= 0:
+            self.piece_counts[self.to_move][captured_board_id] += 1
+        self.to_move = (self.to_move + 1) % 2
+
+    def to_state(self):
+        """Returns a `ShobuState` snapshot of the position."""
+        return ShobuState(to_move=self.to_move, utility=None, bitboards=self.bitboards, actions=self._actions, count_boring_actions=self.count_boring_actions, game=self.game, zobrist_key=self.zobrist_key,
+                          piece_counts=tuple(tuple(counts) for counts in self.piece_counts), center_counts=self.center_counts)
+
+def decode_action(code):
+    """Returns the `ShobuAction` of a 16-bit action code (see `encode_action`)."""
+    return ShobuGame.actions_by_code[code]
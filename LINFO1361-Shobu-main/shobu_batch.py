@@ -0,0 +1,271 @@
+import numpy as np
+
+from shobu import ShobuGame, ShobuState, DIRECTIONS
+
+BIT = np.array([1 << k for k in range(16)], dtype=np.uint16)
+POPCOUNT = np.array([bin(mask).count("1") for mask in range(1 << 16)], dtype=np.int32)
+
+def compute_nth_bit_table():
+    """Precomputes the position of the n-th set bit of every 16-bit mask.
+
+    Returns:
+        np.ndarray: A (65536, 16) array where entry `[mask, n]` is the position of the n-th (0-based) set bit of
+            `mask`, or 0 if `mask` has less than `n + 1` set bits.
+    """
+    masks = np.arange(1 << 16, dtype=np.int32)
+    bits = (masks[:, None] >> np.arange(16)) & 1
+    ranks = np.cumsum(bits, axis=1) - 1
+    table = np.zeros((1 << 16, 16), dtype=np.int8)
+    rows, positions = np.nonzero(bits)
+    table[rows, ranks[rows, positions]] = positions
+    return table
+
+NTH_BIT = compute_nth_bit_table()
+
+def compute_ray_arrays(rays):
+    """Converts `ShobuGame.rays` into arrays indexed by `[stone, direction index, length - 1]`.
+
+    Returns:
+        tuple: The destinations, the path masks and the landing positions of pushed stones (-1 if pushed off the
+            board). Entries of moves leaving the board are 0 and never used.
+    """
+    destinations = np.zeros((16, 8, 2), dtype=np.int64)
+    paths = np.zeros((16, 8, 2), dtype=np.uint16)
+    landings = np.zeros((16, 8, 2), dtype=np.int64)
+    for (stone, direction, length), (destination, path, landing) in rays.items():
+        index = (stone, DIRECTIONS.index(direction), length - 1)
+        destinations[index] = destination
+        paths[index] = path
+        landings[index] = landing
+    return destinations, paths, landings
+
+RAY_DESTINATIONS, RAY_PATHS, RAY_LANDINGS = compute_ray_arrays(ShobuGame.rays)
+
+def back(masks, direction, length):
+    """Shifts board masks so that bit `k` tells whether position `k + length*direction` is set.
+
+    Positions leaving the board give meaningless bits, they must be filtered with the reach masks.
+    """
+    offset = length * direction
+    return masks >> offset if offset > 0 else masks << -offset
+
+class ShobuBatch:
+    """A batch of N Shobu positions stored in NumPy arrays, played in lockstep.
+
+    Move generation, move sampling and move application are done for all the positions at once with array
+    operations, which amortizes the Python overhead of `ShobuGame` over the whole batch. This is meant for random
+    playouts and self-play data generation.
+
+    The legal moves of a position are grouped by passive board (2), active board (2), direction (8) and length (2).
+    In each of these 64 groups, every stone able to make the passive move can be combined with every stone able to
+    make the active move, so a group is described by two 16-bit masks. Moves are exchanged as the 16-bit action
+    codes of `shobu.encode_action`.
+
+    Attributes:
+        game (ShobuGame): The game whose rules are applied.
+        stones (np.ndarray): A (N, 2, 4) uint16 array, `stones[n, player, board_id]` being the mask of the
+            player's stones on the board (bit `k` for position `k`).
+        to_move (np.ndarray): A (N,) array of the player to move in each position.
+        count_boring_actions (np.ndarray): A (N,) array of the number of consecutive actions without any push.
+    """
+
+    def __init__(self, game, stones, to_move, count_boring_actions):
+        """Initializes a batch from its arrays.
+
+        Args:
+            game (ShobuGame): The game whose rules are applied.
+            stones (np.ndarray): The (N, 2, 4) uint16 stone masks.
+            to_move (np.ndarray): The (N,) players to move.
+            count_boring_actions (np.ndarray): The (N,) counters of actions without any push.
+        """
+        self.game = game
+        self.stones = np.asarray(stones, dtype=np.uint16)
+        self.to_move = np.asarray(to_move, dtype=np.int64)
+        self.count_boring_actions = np.asarray(count_boring_actions, dtype=np.int64)
+
+    @classmethod
+    def from_states(cls, game, states):
+        """Builds a batch from a list of `ShobuState`."""
+        stones = np.array([[[(state.bitboards[player] >> (board_id << 4)) & 0xFFFF for board_id in range(4)] for player in range(2)] for state in states], dtype=np.uint16)
+        to_move = np.array([state.to_move for state in states], dtype=np.int64)
+        count_boring_actions = np.array([state.count_boring_actions for state in states], dtype=np.int64)
+        return cls(game, stones, to_move, count_boring_actions)
+
+    def to_states(self):
+        """Returns the positions of the batch as a list of `ShobuState`."""
+        states = []
+        for n in range(len(self.to_move)):
+            bitboards = tuple(sum(int(self.stones[n, player, board_id]) << (board_id << 4) for board_id in range(4)) for player in range(2))
+            states.append(ShobuState(to_move=int(self.to_move[n]), utility=None, bitboards=bitboards, actions=None, count_boring_actions=int(self.count_boring_actions[n]), game=self.game))
+        return states
+
+    def copy(self):
+        """Returns an independent copy of the batch."""
+        return ShobuBatch(self.game, self.stones.copy(), self.to_move.copy(), self.count_boring_actions.copy())
+
+    def __len__(self):
+        return len(self.to_move)
+
+    def legal_move_masks(self):
+        """Computes the legal moves of every position, grouped as described in the class documentation.
+
+        Returns:
+            tuple: Two (N, 64) uint16 arrays: the masks of the passive stones and of the active stones of each group.
+                Group `g = ((passive_board_j*2 + active_board_i)*8 + direction_index)*2 + length - 1` combines the
+                passive board `2*to_move + passive_board_j` with the active board `2*active_board_i + 1 - passive_board_j`.
+        """
+        rows = np.arange(len(self.to_move))
+        own = self.stones[rows, self.to_move]
+        opponent = self.stones[rows, 1 - self.to_move]
+        occupied = own | opponent
+        passive_boards = 2 * self.to_move[:, None] + np.arange(2)
+        own_passive = own[rows[:, None], passive_boards]
+        occupied_passive = occupied[rows[:, None], passive_boards]
+
+        passive = np.zeros((len(rows), 2, 8, 2), dtype=np.uint16)
+        active = np.zeros((len(rows), 4, 8, 2), dtype=np.uint16)
+        for direction_index, (direction, reach_1, reach_2, reach_3) in enumerate(self.game.direction_masks):
+            reach_1, reach_2, reach_3 = np.uint16(reach_1), np.uint16(reach_2), np.uint16(reach_3)
+
+            # Passive moves need an empty path
+            movable_1 = own_passive & reach_1 & ~back(occupied_passive, direction, 1)
+            passive[:, :, direction_index, 0] = movable_1
+            passive[:, :, direction_index, 1] = movable_1 & reach_2 & ~back(occupied_passive, direction, 2)
+
+            # Active moves cannot push own stones, nor a stone that has a stone behind it
+            opponent_1 = back(opponent, direction, 1)
+            opponent_2 = back(opponent, direction, 2)
+            movable_1 = own & reach_1 & ~back(own, direction, 1) & ~(opponent_1 & reach_2 & back(occupied, direction, 2))
+            active[:, :, direction_index, 0] = movable_1
+            active[:, :, direction_index, 1] = movable_1 & reach_2 & ~back(own, direction, 2) & ~((opponent_1 | opponent_2) & reach_3 & back(occupied, direction, 3))
+
+        # Passive board j is combined with the active boards 1 - j and 3 - j
+        active_boards = np.array([[1, 3], [0, 2]])
+        passive_masks = np.broadcast_to(passive[:, :, None], (len(rows), 2, 2, 8, 2))
+        active_masks = active[:, active_boards]
+        return passive_masks.reshape(len(rows), 64), active_masks.reshape(len(rows), 64)
+
+    def count_moves(self, masks=None):
+        """Counts the legal moves of every position.
+
+        Args:
+            masks (tuple, optional): The result of `legal_move_masks`, computed if not given.
+
+        Returns:
+            np.ndarray: A (N,) array of move counts, equal to `len(state.actions)` for each position.
+        """
+        passive_masks, active_masks = self.legal_move_masks() if masks is None else masks
+        return (POPCOUNT[passive_masks] * POPCOUNT[active_masks]).sum(axis=1)
+
+    def utilities(self, counts=None):
+        """Computes the utility of every position (see `ShobuGame.compute_utility`), from the perspective of player 0.
+
+        Args:
+            counts (np.ndarray, optional): The result of `count_moves`, computed if not given.
+
+        Returns:
+            np.ndarray: A (N,) array of utilities in {-1, 0, 1}.
+        """
+        counts = self.count_moves() if counts is None else counts
+        utilities = np.zeros(len(self.to_move), dtype=np.int64)
+        # The first board with an empty side decides, white being checked before black
+        for board_id in range(3, -1, -1):
+            utilities = np.where(self.stones[:, 1, board_id] == 0, 1, utilities)
+            utilities = np.where(self.stones[:, 0, board_id] == 0, -1, utilities)
+        return np.where(counts == 0, np.where(self.to_move == 0, -1, 1), utilities)
+
+    def is_terminal(self, utilities=None):
+        """Returns a (N,) boolean array telling which positions are terminal (see `ShobuGame.is_terminal`)."""
+        utilities = self.utilities() if utilities is None else utilities
+        return (self.count_boring_actions >= self.game.max_count_boring_actions) | (utilities != 0)
+
+    def sample_moves(self, rng, masks=None, counts=None):
+        """Draws one uniformly random legal move per position.
+
+        Args:
+            rng (np.random.Generator): The random generator.
+            masks (tuple, optional): The result of `legal_move_masks`, computed if not given.
+            counts (np.ndarray, optional): The result of `count_moves`, computed if not given.
+
+        Returns:
+            np.ndarray: A (N,) uint16 array of action codes. The code of a position without legal move is meaningless.
+        """
+        passive_masks, active_masks = self.legal_move_masks() if masks is None else masks
+        passive_counts = POPCOUNT[passive_masks]
+        group_counts = passive_counts * POPCOUNT[active_masks]
+        cumulated = np.cumsum(group_counts, axis=1)
+        counts = cumulated[:, -1] if counts is None else counts
+
+        rows = np.arange(len(self.to_move))
+        picks = (rng.random(len(rows)) * np.maximum(counts, 1)).astype(np.int64)
+        groups = np.minimum((cumulated <= picks[:, None]).sum(axis=1), 63)
+        offsets = picks - (cumulated[rows, groups] - group_counts[rows, groups])
+        group_passive_counts = np.maximum(passive_counts[rows, groups], 1)
+        passive_stones = NTH_BIT[passive_masks[rows, groups], offsets % group_passive_counts].astype(np.int64)
+        active_stones = NTH_BIT[active_masks[rows, groups], np.minimum(offsets // group_passive_counts, 15)].astype(np.int64)
+
+        length_index = groups & 1
+        direction_index = (groups >> 1) & 7
+        active_board_i = (groups >> 4) & 1
+        passive_board_j = groups >> 5
+        passive_boards = 2 * self.to_move + passive_board_j
+        active_boards = 2 * active_board_i + 1 - passive_board_j
+        codes = (passive_boards << 14) | (passive_stones << 10) | (active_boards << 8) | (active_stones << 4) | (direction_index << 1) | length_index
+        return codes.astype(np.uint16)
+
+    def apply_moves(self, codes, where=None):
+        """Plays one legal move per position, in place.
+
+        Args:
+            codes (np.ndarray): A (N,) array of action codes (see `shobu.encode_action`). Their legality is not checked.
+            where (np.ndarray, optional): A (N,) boolean array of the positions to play on. Defaults to all of them.
+        """
+        rows = np.arange(len(self.to_move)) if where is None else np.flatnonzero(where)
+        codes = np.asarray(codes, dtype=np.int64)[rows]
+        passive_boards = codes >> 14
+        passive_stones = (codes >> 10) & 15
+        active_boards = (codes >> 8) & 3
+        active_stones = (codes >> 4) & 15
+        direction_index = (codes >> 1) & 7
+        length_index = codes & 1
+        players = self.to_move[rows]
+        opponents = 1 - players
+
+        passive_destinations = RAY_DESTINATIONS[passive_stones, direction_index, length_index]
+        self.stones[rows, players, passive_boards] ^= BIT[passive_stones] | BIT[passive_destinations]
+
+        active_destinations = RAY_DESTINATIONS[active_stones, direction_index, length_index]
+        self.stones[rows, players, active_boards] ^= BIT[active_stones] | BIT[active_destinations]
+
+        # At most one opponent stone lies on the path of a legal active move
+        pushed_stones = self.stones[rows, opponents, active_boards] & RAY_PATHS[active_stones, direction_index, length_index]
+        pushing = pushed_stones != 0
+        self.stones[rows, opponents, active_boards] ^= pushed_stones
+        landings = RAY_LANDINGS[active_stones, direction_index, length_index]
+        landed = pushing & (landings >= 0)
+        self.stones[rows[landed], opponents[landed], active_boards[landed]] |= BIT[landings[landed]]
+
+        self.count_boring_actions[rows] = np.where(pushing, 0, self.count_boring_actions[rows] + 1)
+        self.to_move[rows] = opponents
+
+    def playouts(self, rng, max_moves=100):
+        """Plays random games from every position of the batch until they end or `max_moves` moves were played.
+
+        The batch is modified in place and holds the final positions afterwards.
+
+        Args:
+            rng (np.random.Generator): The random generator.
+            max_moves (int, optional): The maximum number of moves played in each game. Defaults to 100.
+
+        Returns:
+            np.ndarray: A (N,) array of the final utilities, from the perspective of player 0 (0 for unfinished games).
+        """
+        for _ in range(max_moves):
+            masks = self.legal_move_masks()
+            counts = self.count_moves(masks)
+            utilities = self.utilities(counts)
+            ongoing = ~self.is_terminal(utilities)
+            if not ongoing.any():
+                return utilities
+            self.apply_moves(self.sample_moves(rng, masks, counts), where=ongoing)
+        return self.utilities()
@@ -0,0 +1,110 @@
+"""Symmetries of Shobu positions.
+
+The rules are invariant under two transformations, which generate a group of 4 symmetries:
+    - MIRROR: mirroring the columns of every board (position `k` goes to `4*(k//4) + 3 - k%4`), which mirrors the
+      horizontal component of the directions.
+    - SWAP: swapping the left and right boards of both home pairs (boards 0 <-> 1 and 2 <-> 3). The two home boards
+      of a player can both host its passive move, and the active board stays on the opposite color.
+
+A symmetry is encoded as an int holding the MIRROR and SWAP flags. Every symmetry is its own inverse, so the same
+symmetry maps a position to its image and back.
+"""
+
+from shobu import ShobuGame, compute_zobrist_key
+
+IDENTITY = 0
+MIRROR = 1
+SWAP = 2
+SYMMETRIES = (IDENTITY, MIRROR, SWAP, MIRROR | SWAP)
+
+MIRRORED_STONES = [4*(stone // 4) + 3 - stone % 4 for stone in range(16)]
+MIRRORED_DIRECTIONS = {4: 4, -4: -4, 1: -1, -1: 1, 5: 3, 3: 5, -3: -5, -5: -3}
+SWAPPED_BOARDS = [1, 0, 3, 2]
+
+# Mirror of each byte of a bitboard, a byte holding two rows of 4 positions
+MIRRORED_BYTES = [sum(1 << (4*(k // 4) + 3 - k % 4) for k in range(8) if (byte >> k) & 1) for byte in range(256)]
+
+def mirror_bitboard(stones):
+    """Mirrors the columns of every board of a player's bitboard."""
+    mirrored = 0
+    for shift in range(0, 64, 8):
+        mirrored |= MIRRORED_BYTES[(stones >> shift) & 0xFF] << shift
+    return mirrored
+
+def swap_bitboard(stones):
+    """Swaps the left and right boards of a player's bitboard."""
+    return ((stones & 0x0000FFFF0000FFFF) << 16) | ((stones >> 16) & 0x0000FFFF0000FFFF)
+
+def transform_bitboards(bitboards, symmetry):
+    """Applies a symmetry to the bitboards of both players.
+
+    Args:
+        bitboards (Tuple[int, int]): The bitboards of player 0 and player 1.
+        symmetry (int): The symmetry to apply (see `SYMMETRIES`).
+
+    Returns:
+        Tuple[int, int]: The transformed bitboards.
+    """
+    white_stones, black_stones = bitboards
+    if symmetry & MIRROR:
+        white_stones, black_stones = mirror_bitboard(white_stones), mirror_bitboard(black_stones)
+    if symmetry & SWAP:
+        white_stones, black_stones = swap_bitboard(white_stones), swap_bitboard(black_stones)
+    return white_stones, black_stones
+
+def transform_action(action, symmetry):
+    """Applies a symmetry to an action.
+
+    The action legal in a position is mapped to the corresponding action legal in the transformed position. As every
+    symmetry is its own inverse, this also maps an action found on a canonical position back to the original one.
+
+    Args:
+        action (ShobuAction): The action to transform.
+        symmetry (int): The symmetry to apply (see `SYMMETRIES`).
+
+    Returns:
+        ShobuAction: The transformed action.
+    """
+    passive_board_id, passive_stone_id, active_board_id, active_stone_id, direction, length = action
+    if symmetry & MIRROR:
+        passive_stone_id = MIRRORED_STONES[passive_stone_id]
+        active_stone_id = MIRRORED_STONES[active_stone_id]
+        direction = MIRRORED_DIRECTIONS[direction]
+    if symmetry & SWAP:
+        passive_board_id = SWAPPED_BOARDS[passive_board_id]
+        active_board_id = SWAPPED_BOARDS[active_board_id]
+    return ShobuGame.action_table[(passive_board_id, active_board_id, direction, length)][active_stone_id][passive_stone_id]
+
+def canonical_form(bitboards):
+    """Maps bitboards to the representative of their symmetry class, the smallest of their 4 images.
+
+    Args:
+        bitboards (Tuple[int, int]): The bitboards of player 0 and player 1.
+
+    Returns:
+        tuple: The canonical bitboards and the symmetry mapping the given bitboards to them. Use
+            `transform_action(action, symmetry)` to map actions between both orientations.
+    """
+    best_bitboards, best_symmetry = bitboards, IDENTITY
+    for symmetry in SYMMETRIES[1:]:
+        transformed = transform_bitboards(bitboards, symmetry)
+        if transformed < best_bitboards:
+            best_bitboards, best_symmetry = transformed, symmetry
+    return best_bitboards, best_symmetry
+
+def canonical_key(state):
+    """Returns the Zobrist key of the canonical form of a state and the symmetry leading to it.
+
+    Two states that are images of each other by a symmetry get the same key, so tables keyed on it (transposition
+    tables, opening books, shared MCTS nodes) store their symmetric positions once.
+
+    Args:
+        state (ShobuState): The state to canonicalize.
+
+    Returns:
+        tuple: The 64-bit key of the canonical position and the symmetry mapping `state` to it.
+    """
+    bitboards, symmetry = canonical_form(state.bitboards)
+    if symmetry == IDENTITY:
+        return state.zobrist_key, symmetry
+    return compute_zobrist_key(bitboards, state.to_move), symmetry
@@ -1,4 +1,11 @@
 from agent import Agent
+from shobu import ShobuPosition
+from transposition import TranspositionTable, move_first
+
+import math
+
+SEARCHES = ("minimax", "pvs")
+ASPIRATION_WINDOW = 1.0     # Half width of the first aspiration window around the previous score, doubled after each failure
 
 class AlphaBetaAgent(Agent):
     """An agent that uses the alpha-beta pruning algorithm to determine the best move.
@@ -8,18 +15,28 @@ class AlphaBetaAgent(Agent):
 
     Attributes:
         max_depth (int): The maximum depth the search algorithm will explore.
+        search (str): The search core, "minimax" for `max_value`/`min_value` or "pvs" for the negamax
+            Principal Variation Search with aspiration windows.
+        table (TranspositionTable): The transposition table of the searches, kept between two calls of play.
+        last_value (float): The value of the last search, center of the aspiration window of the next PVS search.
     """
 
-    def __init__(self, player, game, max_depth):
+    def __init__(self, player, game, max_depth, search="minimax"):
         """Initializes an AlphaBetaAgent instance with a specified player, game, and maximum search depth.
 
         Args:
             player (int): The player ID this agent represents (0 or 1).
             game (ShobuGame): The Shobu game instance the agent will play on.
             max_depth (int): The maximum depth of the search tree.
+            search (str, optional): The search core, one of `SEARCHES`. Defaults to "minimax".
         """
         super().__init__(player, game)
+        if search not in SEARCHES:
+            raise ValueError(f"Invalid search: {search}")
         self.max_depth = max_depth
+        self.search = search
+        self.table = TranspositionTable()
+        self.last_value = None
 
     def play(self, state, remaining_time):
         """Determines the best action by applying the alpha-beta pruning algorithm.
@@ -35,85 +52,96 @@ class AlphaBetaAgent(Agent):
         """
         return self.alpha_beta_search(state)
     
-    def is_cutoff(self, state, depth):
+    def is_cutoff(self, position, depth):
         """Determines if the search should be cut off at the current depth.
 
         Args:
-            state (ShobuState): The current state of the game.
+            position (ShobuPosition): The current position of the search.
             depth (int): The current depth in the search tree.
 
         Returns:
             bool: True if the search should be cut off, False otherwise.
         """
-        return (depth >= self.max_depth) or (self.game.is_terminal(state))
+        return (depth >= self.max_depth) or (position.is_terminal())
 
     
-    def eval(self, state):
+    def eval(self, position):
         """Evaluates the given state and returns a score from the perspective of the agent's player.
         Reminder : the score of the state is the difference between the minimal number of pieces of the player among all 
         the boards minus the minimal numberof pieces from the opponent among all the boards.
         Remember that the evaluation function should be relative to the player id and not to the current player.
 
         Args:
-            state (ShobuState): The game state to evaluate.
+            position (ShobuPosition): The game position to evaluate.
 
         Returns:
-            float: The evaluated score of the state.
+            float: The evaluated score of the position.
         """
-        min_pieces_player = 4
-        min_pieces_opponent = 4
-
-        for i in range(4):
-            min_pieces_player = min(min_pieces_player, len(state.board[i][self.player]))
-            min_pieces_opponent = min(min_pieces_opponent, len(state.board[i][(self.player + 1) % 2]))
+        min_pieces_player = min(position.piece_counts[self.player])
+        min_pieces_opponent = min(position.piece_counts[(self.player + 1) % 2])
 
         return (float) (min_pieces_player - min_pieces_opponent)
 
     def alpha_beta_search(self, state):
         """Implements the alpha-beta pruning algorithm to find the best action.
 
+        The search plays and takes back the actions on a single mutable position. The results of the previous
+        searches stay in the transposition table, with an older age.
+
         Args:
             state (ShobuState): The current game state.
 
         Returns:
             ShobuAction: The best action as determined by the alpha-beta algorithm.
         """
-        _, action = self.max_value(state, -float("inf"), float("inf"), 0)
+        self.table.new_search()
+        position = ShobuPosition(state, self.game)
+        if self.search == "pvs":
+            self.last_value, action = self.aspiration_search(position, self.last_value)
+        else:
+            self.last_value, action = self.max_value(position, -float("inf"), float("inf"), 0)
         return action
 
-    def max_value(self, state, alpha, beta, depth):
+    def max_value(self, position, alpha, beta, depth):
         """Computes the maximum achievable value for the current player at a given state using the alpha-beta pruning.
 
         This method recursively explores all possible actions from the current state to find the one that maximizes
         the player's score, pruning branches that cannot possibly affect the final decision.
 
         Args:
-            state (ShobuState): The current state of the game.
+            position (ShobuPosition): The current position of the search, restored before returning.
             alpha (float): The current alpha value, representing the minimum score that the maximizing player is assured of.
             beta (float): The current beta value, representing the maximum score that the minimizing player is assured of.
             depth (int): The current depth in the search tree.
 
         Returns:
             tuple: A tuple containing the best value achievable from this state and the action that leads to this value.
-                If the state is a terminal state or the depth limit is reached, the action will be None.
+                If the position is terminal or the depth limit is reached, the action will be None.
         """
-        if (self.is_cutoff(state, depth)) :
-            return (self.eval(state), None)
-        
+        if (self.is_cutoff(position, depth)) :
+            return (self.eval(position), None)
+
+        value, best_move = self.table.lookup(position.zobrist_key, alpha, beta, self.max_depth - depth)
+        if value is not None and depth > 0:
+            return (value, best_move)
+        alpha_orig = alpha
         best_value = -float("inf")
         
-        for action in state.actions :
-            value2, action2 = self.min_value(self.game.result(state, action), alpha, beta, depth + 1)
+        for action in move_first(position.actions(), best_move) :
+            token = position.make(action)
+            value2, action2 = self.min_value(position, alpha, beta, depth + 1)
+            position.unmake(token)
             if value2 > best_value:
                 best_value, best_action = value2, action
                 alpha = max(alpha, best_value)
             if best_value >= beta:
-                return (best_value, best_action)
+                break
+        self.table.save(position.zobrist_key, alpha_orig, beta, self.max_depth - depth, best_value, best_action)
         return (best_value, best_action)
     
 
 
-    def min_value(self, state, alpha, beta, depth):
+    def min_value(self, position, alpha, beta, depth):
         """Computes the minimum achievable value for the opposing player at a given state using the alpha-beta pruning.
 
         Similar to max_value, this method recursively explores all possible actions from the current state to find
@@ -121,25 +149,108 @@ class AlphaBetaAgent(Agent):
         affect the outcome.
 
         Args:
-            state (ShobuState): The current state of the game.
+            position (ShobuPosition): The current position of the search, restored before returning.
             alpha (float): The current alpha value, representing the minimum score that the maximizing player is assured of.
             beta (float): The current beta value, representing the maximum score that the minimizing player is assured of.
             depth (int): The current depth in the search tree.
 
         Returns:
             tuple: A tuple containing the best value achievable from this state for the opponent and the action that leads to this value.
-                If the state is a terminal state or the depth limit is reached, the action will be None.
+                If the position is terminal or the depth limit is reached, the action will be None.
         """
-        if (self.is_cutoff(state, depth)) :
-            return (self.eval(state), None)
-  
+        if (self.is_cutoff(position, depth)) :
+            return (self.eval(position), None)
+
+        value, best_move = self.table.lookup(position.zobrist_key, alpha, beta, self.max_depth - depth)
+        if value is not None and depth > 0:
+            return (value, best_move)
+        alpha_orig = alpha
+        beta_orig = beta
         best_value = float("inf")
 
-        for action in state.actions :
-            value2, action2 = self.max_value(self.game.result(state, action), alpha, beta, depth + 1)
+        for action in move_first(position.actions(), best_move) :
+            token = position.make(action)
+            value2, action2 = self.max_value(position, alpha, beta, depth + 1)
+            position.unmake(token)
             if value2 < best_value:
                 best_value, best_action = value2, action
                 beta = min(beta, best_value)
             if best_value <= alpha:
-                return (best_value, best_action)
-        return (best_value, best_action)
\ No newline at end of file
+                break
+        self.table.save(position.zobrist_key, alpha_orig, beta_orig, self.max_depth - depth, best_value, best_action)
+        return (best_value, best_action)
+
+    def aspiration_search(self, position, guess):
+        """Searches the root with `pvs` in a narrow window around a guess of its value, widening the window on the
+        side that fails until the value falls inside it.
+
+        Args:
+            position (ShobuPosition): The root position, with the agent's player to move.
+            guess (float or None): The expected value of the root, e.g. the value of the previous search. The first
+                search uses a full window if None.
+
+        Returns:
+            tuple: The value of the root from the perspective of the agent's player and the best action.
+        """
+        if guess is None:
+            return self.pvs(position, -float("inf"), float("inf"), 0)
+        window = ASPIRATION_WINDOW
+        alpha, beta = guess - window, guess + window
+        while True:
+            value, action = self.pvs(position, alpha, beta, 0)
+            if value <= alpha:
+                window *= 2
+                alpha = value - window
+            elif value >= beta:
+                window *= 2
+                beta = value + window
+            else:
+                return value, action
+
+    def pvs(self, position, alpha, beta, depth):
+        """Computes the value of a position with the negamax Principal Variation Search.
+
+        The first action is searched with the full window and the other ones with a null window around alpha, only
+        re-searched with the full window if they turn out to be better. Values are from the perspective of the
+        player to move, the transposition table being shared with `max_value`/`min_value` in the agent's perspective.
+
+        Args:
+            position (ShobuPosition): The current position of the search, restored before returning.
+            alpha (float): The minimum score that the player to move is assured of.
+            beta (float): The maximum score that the opponent of the player to move is assured of.
+            depth (int): The current depth in the search tree.
+
+        Returns:
+            tuple: The value of the position for the player to move and the best action, None at the leaves.
+        """
+        sign = 1 if position.to_move == self.player else -1
+        if (self.is_cutoff(position, depth)) :
+            return (sign * self.eval(position), None)
+
+        remaining_depth = self.max_depth - depth
+        value, best_move = self.table.lookup(position.zobrist_key, *((alpha, beta) if sign == 1 else (-beta, -alpha)), remaining_depth)
+        if value is not None and depth > 0:
+            return (sign * value, best_move)
+        alpha_orig = alpha
+        best_value = -float("inf")
+        best_action = None
+
+        for action in move_first(position.actions(), best_move) :
+            token = position.make(action)
+            if best_action is None:
+                value = -self.pvs(position, -beta, -alpha, depth + 1)[0]
+            else:
+                value = -self.pvs(position, -math.nextafter(alpha, float("inf")), -alpha, depth + 1)[0]
+                if alpha < value < beta:
+                    value = -self.pvs(position, -beta, -alpha, depth + 1)[0]
+            position.unmake(token)
+            if value > best_value:
+                best_value, best_action = value, action
+                alpha = max(alpha, best_value)
+            if best_value >= beta:
+                break
+        if sign == 1:
+            self.table.save(position.zobrist_key, alpha_orig, beta, remaining_depth, best_value, best_action)
+        else:
+            self.table.save(position.zobrist_key, -beta, -alpha_orig, remaining_depth, -best_value, best_action)
+        return (best_value, best_action)
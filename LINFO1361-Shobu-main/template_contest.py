@@ -1,12 +1,24 @@
 from agent import Agent
+from shobu import ShobuState
+from transposition import TranspositionTable, SharedTranspositionTable
+from move_ordering import MoveOrdering
+import multiprocessing
 import random
 import time
-import heapq
-import numpy as np
+import math
 
-totalTimeSorting = 0
 totalTimeEvaluating = 0
-MAX_DEPTH_LIMIT = 6
+MAX_DEPTH_LIMIT = 20
+MOVES_TO_GO = 30            # Expected number of moves left to play, the time of a move being remaining_time / MOVES_TO_GO
+MAX_MOVE_TIME = 10.0        # Maximum time of a move (in seconds), whatever the remaining time
+NEXT_ITERATION_FACTOR = 3   # A new iteration is only started if the last one took less than 1/NEXT_ITERATION_FACTOR of the time left
+SEARCHES = ("minimax", "pvs")
+ASPIRATION_FRACTION = 0.1   # Half width of the first aspiration window, relative to the previous score, doubled after each failure
+QUIESCENCE_DEPTH = 4        # Maximum number of pushing moves played by the quiescence search after the horizon
+HISTORY_NOISE = 64          # Exclusive upper bound of the random history scores giving every helper process its own move order
+
+class SearchTimeout(Exception):
+    """Raised inside the search when the deadline of the move is reached."""
 
 class AI(Agent):
     """An agent that plays following your algorithm.
@@ -16,25 +28,64 @@ class AI(Agent):
     Attributes:
         player (int): The player id this agent represents.
         game (ShobuGame): The game the agent is playing.
+        search (str): The search core, "minimax" for `max_value`/`min_value` or "pvs" for the negamax
+            Principal Variation Search with aspiration windows.
+        quiescence_depth (int): The maximum depth of the quiescence search at the horizon, 0 to evaluate the leaves directly.
+        max_depth (int): The depth of the current iteration of the search.
+        deadline (float): The time at which the current search must stop.
+        table (TranspositionTable): The transposition table of the searches, kept between two calls of play.
+        ordering (MoveOrdering): The killer and history tables ordering the actions of the searches.
+        pv_moves (dict): The actions of the principal variation of the last completed iteration, by Zobrist key.
+        pv_lines (List[List[ShobuAction]]): The best line found from the node searched at each depth of the current
+            iteration, `pv_lines[0]` being the principal variation of the root once the iteration completes.
+        root_action (ShobuAction): The best root action found so far by the current iteration, played if the deadline
+            is reached before the first iteration completes.
+        pondered (tuple): The Zobrist key of the state searched by the last pondering, the depth of its last completed
+            iteration, and its value and best action, or None.
+        workers (int): The number of processes of the search, the agent's one included. With more than one, the
+            other processes run `SearchHelper` searches of the same state, sharing the transposition table (Lazy SMP).
+        helpers (List[tuple]): The process and the connection of every helper, forked by the first search and
+            terminated by `close`.
+        running (multiprocessing.RawValue): The number of the current search of the helpers, negated once it ends.
     """
-    def __init__(self, player, game):
+    def __init__(self, player, game, search="minimax", quiescence_depth=QUIESCENCE_DEPTH, ponder=False, workers=1, table=None):
         """Initializes an AlphaBetaAgent instance with a specified player, game, and maximum search depth.
 
         Args:
             player (int): The player ID this agent represents (0 or 1).
             game (ShobuGame): The Shobu game instance the agent will play on.
-            max_depth (int): The maximum depth of the search tree.
+            search (str, optional): The search core, one of `SEARCHES`. Defaults to "minimax".
+            quiescence_depth (int, optional): The maximum depth of the quiescence search. Defaults to `QUIESCENCE_DEPTH`.
+            ponder (bool, optional): Whether to search the expected next state while the opponent plays. Defaults to False.
+            workers (int, optional): The number of processes of the search. Defaults to 1.
+            table (TranspositionTable, optional): The transposition table of the searches, e.g. the shared table of
+                another process. Defaults to None (a new table, in shared memory if workers > 1).
         """
-        super().__init__(player, game)
-        self.max_depth = 3
-        self.initial_max_depth = 2
-        self.time_budget = None
-        self.lastTime = 1.9
+        super().__init__(player, game, ponder)
+        if search not in SEARCHES:
+            raise ValueError(f"Invalid search: {search}")
+        self.search = search
+        self.quiescence_depth = quiescence_depth
+        self.max_depth = 1
+        self.deadline = float("inf")
+        self.table = table
+        if table is None:
+            self.table = SharedTranspositionTable() if workers > 1 else TranspositionTable()
+        self.ordering = MoveOrdering()
+        self.pv_moves = dict()
+        self.pv_lines = []
+        self.root_action = None
+        self.pondered = None
+        self.workers = workers
+        self.helpers = []
+        self.running = None
 
     def play(self, state, remaining_time):
-        """Determines the best action by applying the alpha-beta pruning algorithm.
+        """Determines the best action by applying the alpha-beta pruning algorithm with iterative deepening.
 
-        Overrides the play method in the base class.
+        Overrides the play method in the base class. The search stops after remaining_time / MOVES_TO_GO seconds, and
+        after `MAX_MOVE_TIME` seconds at most. With pondering, the state expected after the action and the reply of the
+        opponent in the principal variation is then searched in the background until the next call.
 
         Args:
             state (ShobuState): The current state of the game.
@@ -43,43 +94,16 @@ class AI(Agent):
         Returns:
             ShobuAction: The action determined to be the best by the alpha-beta algorithm.
         """
-        
-        if (self.time_budget == None) :
-            self.time_budget = remaining_time
-        start_search_depth = time.time()
-        self.adjust_search_depth(remaining_time, state)
-        #print("time to perform depth adjustment = ", time.time() - start_search_depth)
         start = time.time()
-        search = self.alpha_beta_search(state)
+        self.stop_pondering()
+        search = self.alpha_beta_search(state, start + min(remaining_time / MOVES_TO_GO, MAX_MOVE_TIME))
+        if self.ponder:
+            expected = self.expected_state(state, search)
+            if expected is not None:
+                self.start_pondering(expected)
         end = time.time()
-        self.lastTime = end - start
         print("Total time elapsed to compute next action (agentMain) = ", end - start)
         return search
-   
-    def adjust_search_depth(self, remaining_time, state):
-        if self.time_budget is not None:
-            # Calculer le temps moyen par mouvement
-            time_per_move = remaining_time / max(1, len(state.actions))
-
-            # Si le temps par mouvement est supérieur à un seuil arbitraire
-            piecesPlayer, _, totPiecesPlayer, totPiecesOpponent = self.numberOfPiece(state)
-            totPieces = totPiecesPlayer + totPiecesOpponent
-            print("total pieces = ", totPieces)
-            if ((time_per_move > self.time_budget * 0.009 and self.lastTime < 2) or (piecesPlayer < 3 and time_per_move > self.time_budget * 0.005 and self.lastTime < 4)):
-                # Augmenter la profondeur si la profondeur maximale n'a pas encore été atteinte
-                if self.max_depth < MAX_DEPTH_LIMIT:  # Définir MAX_DEPTH_LIMIT en fonction de vos besoins
-                    if((self.max_depth == MAX_DEPTH_LIMIT-3 and totPieces < 22) or (self.max_depth == MAX_DEPTH_LIMIT-2 and totPieces < 16) or (self.max_depth == MAX_DEPTH_LIMIT-1 and totPieces < 14) or (self.max_depth == MAX_DEPTH_LIMIT and totPieces < 8)):
-                        self.max_depth += 1
-                    elif(self.max_depth < MAX_DEPTH_LIMIT -3):
-                        self.max_depth += 1
-            elif (((time_per_move < self.time_budget * 0.005 or self.lastTime > 15)) and self.max_depth > self.initial_max_depth):
-                # Si le temps par mouvement est inférieur au seuil, revenir à la profondeur initiale
-                self.max_depth = self.max_depth-1
-        # Autres ajustements basés sur la phase de jeu ou la complexité (facultatif)
-        # Vous pouvez ajouter d'autres conditions pour ajuster la profondeur en fonction de certains critères
-
-        print("mainDepth = ", self.max_depth)
-
 
     def is_cutoff(self, state, depth):
         """Determines if the search should be cut off at the current depth.
@@ -93,81 +117,180 @@ class AI(Agent):
         """
         return (depth >= self.max_depth) or (self.game.is_terminal(state))
 
-    def alpha_beta_search(self, state):
-        global totalTimeSorting
+    def alpha_beta_search(self, state, deadline):
         global totalTimeEvaluating
-        """Implements the alpha-beta pruning algorithm to find the best action.
+        """Implements the alpha-beta pruning algorithm with iterative deepening to find the best action.
+
+        The state is searched at depth 1, 2, 3, ... until the deadline (see `iterative_deepening`). If the state is
+        the one searched by the last pondering, the search resumes after the last iteration completed by the pondering.
+        If the deadline is reached during the first iteration, the best root action found so far is played, or the
+        first legal action if none has been searched yet.
 
         Args:
             state (ShobuState): The current game state.
+            deadline (float): The time, as given by `time.time()`, at which the search must stop.
 
         Returns:
             ShobuAction: The best action as determined by the alpha-beta algorithm.
         """
         start = time.time()
-        _, action = self.max_value(state, -float("inf"), float("inf"), 0)
-        end = time.time()
-        print("Total time elapsed to compute alpha beta search = ", end - start)
-        print("Total time elapsed to sort = ", totalTimeSorting)
+        self.deadline = deadline
+        first_depth = 1
+        value = None
+        action = None
+        if self.pondered is not None and self.pondered[0] == state.zobrist_key:
+            _, depth, value, action = self.pondered
+            first_depth = depth + 1
+            print("ponder hit, depth = ", depth, " value = ", value)
+        else:
+            self.table.new_search()
+            self.ordering.new_search()
+            self.pv_moves = dict()
+        self.pondered = None
+        self.root_action = None
+
+        self.start_helpers(state, deadline)
+        iteration_start = start
+        for depth, value, action in self.iterative_deepening(state, first_depth, value):
+            end = time.time()
+            print("depth = ", depth, " value = ", value, " time = ", end - iteration_start)
+            if end + NEXT_ITERATION_FACTOR * (end - iteration_start) > deadline:
+                break
+            iteration_start = end
+        self.stop_helpers()
+        if action is None:
+            action = self.root_action if self.root_action is not None else state.actions[0]
+            print("deadline reached during the first iteration")
+        print("Total time elapsed to compute alpha beta search = ", time.time() - start)
         #print("Total time evaluating = ", totalTimeEvaluating)
-        #print("Time taken for agent: ", end - start)
 
         return action
-    
-    def compute_length(self,state):
-        return [len(state.board[0][0]), len(state.board[0][1]), len(state.board[1][0]), len(state.board[1][1]), len(state.board[2][0]), len(state.board[2][1]), len(state.board[3][0]), len(state.board[3][1])]  
 
-    def pushing_Test(self, move, longueurs, state):
-        listPlayer = [element for i, element in enumerate(longueurs) if i % 2 == state.to_move]  # indices pairs
-        listOpponent = [element for i, element in enumerate(longueurs) if i % 2 != state.to_move]  # indices impairs
-        
-        score = 0
-        central_positions = [5, 6, 9, 10]
-        totalPieces = sum(listPlayer)+sum(listOpponent)
-        piecesOpponent = min(listOpponent)
-        piecesPlayer = min(listPlayer)
+    def iterative_deepening(self, state, first_depth=1, value=None):
+        """Searches a state at increasing depths until the search is interrupted.
 
+        An iteration that reaches the deadline, or the end of the pondering, is abandoned. The principal variation of
+        every completed iteration is searched first by the next one, and its value centers the aspiration window of
+        the next one with the "pvs" search.
 
-        if(piecesOpponent == 1  and totalPieces < 20):
-            attack = 25
-        else :
-            attack = 1
+        Args:
+            state (ShobuState): The state to search, the agent's player being to move.
+            first_depth (int, optional): The depth of the first iteration. Defaults to 1.
+            value (float, optional): The value of the previous iteration, or None. Defaults to None.
 
-        if(piecesPlayer < 3):
-            defense = 20
-        else :
-            defense = 1
+        Yields:
+            tuple: The depth, value and best action of every completed iteration.
+        """
+        for depth in range(first_depth, MAX_DEPTH_LIMIT + 1):
+            self.max_depth = depth
+            self.pv_lines = [[] for _ in range(depth + 1)]
+            try:
+                if self.search == "pvs":
+                    value, action = self.aspiration_search(state, value)
+                else:
+                    value, action = self.max_value(state, -float("inf"), float("inf"), 0)
+            except SearchTimeout:
+                return
+            self.update_principal_variation(state, self.pv_lines[0])
+            yield depth, value, action
+
+    def expected_state(self, state, action):
+        """Returns the state expected after an action and the reply of the opponent in the principal variation.
 
+        Args:
+            state (ShobuState): The state the action is played in.
+            action (ShobuAction): The action chosen by the agent.
 
-        startOfGameWeight = 1
-        if(totalPieces >30):
-            startOfGameWeight = 10
-        if move.active_stone_id + move.length*move.direction in central_positions:
-            score+=startOfGameWeight
-        if move.active_stone_id + move.length*move.direction in state.board[move.active_board_id][(state.to_move + 1) % 2]:
-            new_opponent_active_stone = move.active_stone_id + (move.length+1) * move.direction
-            if new_opponent_active_stone < 0 or new_opponent_active_stone > 15 or abs((move.active_stone_id + move.length * move.direction)%4 - (new_opponent_active_stone)%4) > 1:
-                #score+=3
-                listOpponent[move.active_board_id] -= 1
-                score+= (defense*10*piecesPlayer - 1*attack*piecesPlayer - 4* sum(listOpponent)/attack)**3
-        if(piecesOpponent == 0):
-            score +=100000
-        if(piecesPlayer == 0):
-            score -=10000000000
-        return score
+        Returns:
+            ShobuState: The expected state, or None if the game ends before or if the reply is unknown.
+        """
+        state = self.game.unchecked_result(state, action)
+        reply = self.pv_moves.get(state.zobrist_key)
+        if reply is None or self.game.is_terminal(state):
+            return None
+        state = self.game.unchecked_result(state, reply)
+        return None if self.game.is_terminal(state) else state
+
+    def ponder_search(self, state):
+        """Searches the expected next state without deadline until `ponder_stop` is set, keeping the result of the
+        last completed iteration in `pondered`. The transposition table, the history scores and the principal
+        variation are those of the agent, so they also help the next search if the opponent plays another reply.
 
-    def order_moves_based_on_eval(self, state, isReverse):
-        longueurs  = self.compute_length(state)
-        myScores = np.array([self.pushing_Test(action,longueurs,state) for action in state.actions])
+        Args:
+            state (ShobuState): The expected next state of the agent.
+        """
+        self.deadline = float("inf")
+        self.table.new_search()
+        self.ordering.new_search()
+        self.pv_moves = dict()
+        for depth, value, action in self.iterative_deepening(state):
+            self.pondered = (state.zobrist_key, depth, value, action)
 
-        indices_tries = np.argsort(myScores)
-        if(isReverse == False):
-           ordered_moves = [state.actions[i] for i in indices_tries]
-        else:
-            ordered_moves = [state.actions[i] for i in indices_tries[::-1]]
+    def start_helpers(self, state, deadline):
+        """Starts the search of a state by the helper processes, forking them at the first call.
+
+        Args:
+            state (ShobuState): The state searched by the agent.
+            deadline (float): The time at which the helpers must stop at the latest.
+        """
+        if self.workers <= 1:
+            return
+        if not self.helpers:
+            if not isinstance(self.table, SharedTranspositionTable):
+                self.table = SharedTranspositionTable()
+            context = multiprocessing.get_context("fork")
+            self.running = context.RawValue("q", 0)
+            for index in range(1, self.workers):
+                connection, helper_connection = context.Pipe()
+                helper = SearchHelper(self.player, self.game, self.search, self.quiescence_depth, self.table, self.running, index)
+                process = context.Process(target=helper.run, args=(helper_connection,), daemon=True)
+                process.start()
+                self.helpers.append((process, connection))
+        self.running.value = abs(self.running.value) + 1
+        for _, connection in self.helpers:
+            connection.send((state.to_move, state.bitboards, state.count_boring_actions, deadline, self.running.value))
+
+    def stop_helpers(self):
+        """Makes the helper processes abandon their current search."""
+        if self.running is not None:
+            self.running.value = -abs(self.running.value)
+
+    def close(self):
+        """Terminates the helper processes and releases the shared memory of the transposition table.
+
+        The agent can still play afterwards: the next search forks new helpers with a new shared table.
+        """
+        self.stop_helpers()
+        for process, connection in self.helpers:
+            connection.send(None)
+            process.join()
+        self.helpers = []
+        self.running = None
+        if isinstance(self.table, SharedTranspositionTable):
+            self.table.close()
+            self.table = TranspositionTable()
+
+    def update_principal_variation(self, state, line):
+        """Stores the actions of a principal variation by Zobrist key of the states they are played in.
+
+        Args:
+            state (ShobuState): The root state of the search.
+            line (List[ShobuAction]): The actions of the principal variation, starting at the root.
+        """
+        self.pv_moves = dict()
+        for action in line:
+            self.pv_moves[state.zobrist_key] = action
+            state = self.game.unchecked_result(state, action)
 
-        return ordered_moves
+    def check_deadline(self):
+        """Interrupts the search if the deadline is reached or if the pondering must stop.
 
+        Raises:
+            SearchTimeout: If the search must stop.
+        """
+        if time.time() > self.deadline or self.ponder_stop.is_set():
+            raise SearchTimeout()
+    
     def shallow_eval(self, state):
         """Shallow evaluation function for move ordering."""
         # min_pieces_player = 4
@@ -193,7 +316,6 @@ class AI(Agent):
         #return float(5*min_pieces_player - min_pieces_opponent)**3
 
     def max_value(self, state, alpha, beta, depth):
-        global totalTimeSorting
         """Computes the maximum achievable value for the current player at a given state using the alpha-beta pruning.
 
         This method recursively explores all possible actions from the current state to find the one that maximizes
@@ -209,27 +331,33 @@ class AI(Agent):
             tuple: A tuple containing the best value achievable from this state and the action that leads to this value.
                 If the state is a terminal state or the depth limit is reached, the action will be None.
         """
+        self.check_deadline()
+        self.pv_lines[depth] = []
         if (self.is_cutoff(state, depth)) :
-            return (self.eval_enhanced(state), None)
+            return (self.horizon_value(state, alpha, beta), None)
         
+        value, best_move = self.table.lookup(state.zobrist_key, alpha, beta, self.max_depth - depth)
+        if value is not None and depth > 0:
+            return (value, best_move)
+        best_move = self.pv_moves.get(state.zobrist_key, best_move)
+        alpha_orig = alpha
         best_value = -float("inf")
         best_action = None
-        startTime = time.time()
-        actions = self.order_moves_based_on_eval(state, True)
-        endTime = time.time()
-        
-        totalTimeSorting += endTime - startTime
-        for action in actions:  # Ordering moves based on evaluation
-            value2, action2 = self.min_value(self.game.result(state, action), alpha, beta, depth + 1)
+        for action in self.ordering.ordered_actions(state, depth, best_move):
+            value2, action2 = self.min_value(self.game.unchecked_result(state, action), alpha, beta, depth + 1)
             if value2 > best_value:
                 best_value, best_action = value2, action
+                self.pv_lines[depth] = [action] + self.pv_lines[depth + 1]
                 alpha = max(alpha, best_value)
+                if depth == 0:
+                    self.root_action = action
             if best_value >= beta:
-                return (best_value, best_action)
+                self.ordering.record_cutoff(state, action, depth, self.max_depth - depth)
+                break
+        self.table.save(state.zobrist_key, alpha_orig, beta, self.max_depth - depth, best_value, best_action)
         return (best_value, best_action)
             
     def min_value(self, state, alpha, beta, depth):
-        global totalTimeSorting
         """Computes the minimum achievable value for the opposing player at a given state using the alpha-beta pruning.
 
         Similar to max_value, this method recursively explores all possible actions from the current state to find
@@ -246,62 +374,185 @@ class AI(Agent):
             tuple: A tuple containing the best value achievable from this state for the opponent and the action that leads to this value.
                 If the state is a terminal state or the depth limit is reached, the action will be None.
         """
+        self.check_deadline()
+        self.pv_lines[depth] = []
         if (self.is_cutoff(state, depth)) :
-            return (self.eval_enhanced(state), None)
+            return (self.horizon_value(state, alpha, beta), None)
   
+        value, best_move = self.table.lookup(state.zobrist_key, alpha, beta, self.max_depth - depth)
+        if value is not None and depth > 0:
+            return (value, best_move)
+        best_move = self.pv_moves.get(state.zobrist_key, best_move)
+        alpha_orig = alpha
+        beta_orig = beta
         best_value = float("inf")
         best_action = None
-        startTime = time.time()
-        actions = self.order_moves_based_on_eval(state, False)
-        stopTime = time.time()
-        totalTimeSorting += stopTime - startTime
-        for action in actions:  # Ordering moves based on evaluation
-            value2, action2 = self.max_value(self.game.result(state, action), alpha, beta, depth + 1)
+        for action in self.ordering.ordered_actions(state, depth, best_move):
+            value2, action2 = self.max_value(self.game.unchecked_result(state, action), alpha, beta, depth + 1)
             if value2 < best_value:
                 best_value, best_action = value2, action
+                self.pv_lines[depth] = [action] + self.pv_lines[depth + 1]
                 beta = min(beta, best_value)
             if best_value <= alpha:
-                return (best_value, best_action)
+                self.ordering.record_cutoff(state, action, depth, self.max_depth - depth)
+                break
+        self.table.save(state.zobrist_key, alpha_orig, beta_orig, self.max_depth - depth, best_value, best_action)
+        return (best_value, best_action)
+
+    def aspiration_search(self, state, guess):
+        """Searches the root with `pvs` in a narrow window around a guess of its value, widening the window on the
+        side that fails until the value falls inside it.
+
+        Args:
+            state (ShobuState): The root state, with the agent's player to move.
+            guess (float or None): The expected value of the root, e.g. the value of the previous iteration. The
+                search uses a full window if None.
+
+        Returns:
+            tuple: The value of the root from the perspective of the agent's player and the best action.
+        """
+        if guess is None:
+            return self.pvs(state, -float("inf"), float("inf"), 0)
+        window = ASPIRATION_FRACTION * abs(guess) + 1
+        alpha, beta = guess - window, guess + window
+        while True:
+            value, action = self.pvs(state, alpha, beta, 0)
+            if value <= alpha:
+                window *= 2
+                alpha = value - window
+            elif value >= beta:
+                window *= 2
+                beta = value + window
+            else:
+                return value, action
+
+    def pvs(self, state, alpha, beta, depth):
+        """Computes the value of a state with the negamax Principal Variation Search.
+
+        The first action is searched with the full window and the other ones with a null window around alpha, only
+        re-searched with the full window if they turn out to be better. Values are from the perspective of the
+        player to move, the transposition table being shared with `max_value`/`min_value` in the agent's perspective.
+
+        Args:
+            state (ShobuState): The current state of the game.
+            alpha (float): The minimum score that the player to move is assured of.
+            beta (float): The maximum score that the opponent of the player to move is assured of.
+            depth (int): The current depth in the search tree.
+
+        Returns:
+            tuple: The value of the state for the player to move and the best action, None at the leaves.
+        """
+        self.check_deadline()
+        self.pv_lines[depth] = []
+        sign = 1 if state.to_move == self.player else -1
+        if (self.is_cutoff(state, depth)) :
+            return (sign * self.horizon_value(state, *((alpha, beta) if sign == 1 else (-beta, -alpha))), None)
+
+        remaining_depth = self.max_depth - depth
+        value, best_move = self.table.lookup(state.zobrist_key, *((alpha, beta) if sign == 1 else (-beta, -alpha)), remaining_depth)
+        if value is not None and depth > 0:
+            return (sign * value, best_move)
+        best_move = self.pv_moves.get(state.zobrist_key, best_move)
+        alpha_orig = alpha
+        best_value = -float("inf")
+        best_action = None
+        for action in self.ordering.ordered_actions(state, depth, best_move):
+            next_state = self.game.unchecked_result(state, action)
+            if best_action is None:
+                value = -self.pvs(next_state, -beta, -alpha, depth + 1)[0]
+            else:
+                value = -self.pvs(next_state, -math.nextafter(alpha, float("inf")), -alpha, depth + 1)[0]
+                if alpha < value < beta:
+                    value = -self.pvs(next_state, -beta, -alpha, depth + 1)[0]
+            if value > best_value:
+                best_value, best_action = value, action
+                self.pv_lines[depth] = [action] + self.pv_lines[depth + 1]
+                alpha = max(alpha, best_value)
+                if depth == 0:
+                    self.root_action = action
+            if best_value >= beta:
+                self.ordering.record_cutoff(state, action, depth, remaining_depth)
+                break
+        if sign == 1:
+            self.table.save(state.zobrist_key, alpha_orig, beta, remaining_depth, best_value, best_action)
+        else:
+            self.table.save(state.zobrist_key, -beta, -alpha_orig, remaining_depth, -best_value, best_action)
         return (best_value, best_action)
 
+    def horizon_value(self, state, alpha, beta):
+        """Evaluates a leaf of the full-width search, resolving the pending pushes with the quiescence search.
+
+        Args:
+            state (ShobuState): The leaf state.
+            alpha (float): The current alpha value, from the perspective of the agent's player.
+            beta (float): The current beta value, from the perspective of the agent's player.
+
+        Returns:
+            float: The value of the leaf from the perspective of the agent's player.
+        """
+        if self.quiescence_depth == 0 or self.game.is_terminal(state):
+            return self.eval_enhanced(state)
+        if state.to_move == self.player:
+            return self.quiescence(state, alpha, beta, 0)
+        return -self.quiescence(state, -beta, -alpha, 0)
+
+    def quiescence(self, state, alpha, beta, depth):
+        """Searches the pushing moves of a state until the position is quiet, in negamax form.
+
+        The player to move can always stand pat, i.e. keep the static evaluation of the state instead of pushing.
+        Only the pushing actions are generated, the ones pushing a stone off a board being searched first.
+
+        Args:
+            state (ShobuState): The current state of the quiescence search.
+            alpha (float): The minimum score that the player to move is assured of.
+            beta (float): The maximum score that the opponent of the player to move is assured of.
+            depth (int): The number of pushing moves played since the horizon.
+
+        Returns:
+            float: The value of the state for the player to move.
+        """
+        self.check_deadline()
+        sign = 1 if state.to_move == self.player else -1
+        best_value = sign * self.eval_enhanced(state)
+        if best_value >= beta or depth >= self.quiescence_depth or self.game.is_terminal(state):
+            return best_value
+        alpha = max(alpha, best_value)
+
+        rays = self.game.rays
+        actions = self.game.compute_pushing_actions(state.bitboards, state.to_move)
+        actions.sort(key=lambda action: rays[(action.active_stone_id, action.direction, action.length)][2] >= 0)
+        for action in actions:
+            value = -self.quiescence(self.game.unchecked_result(state, action), -beta, -alpha, depth + 1)
+            if value > best_value:
+                best_value = value
+                alpha = max(alpha, best_value)
+            if best_value >= beta:
+                break
+        return best_value
+
     def numberOfPiece (self, state):
         """The score returned is the difference between the minimal number of pieces of the player among all 
         the boards minus the minimal numberof pieces from the opponent among all the boards.
         The evaluation function should be relative to the player id and not to the current player.
         """
-        min_pieces_player = 4
-        min_pieces_opponent = 4
-        tot_pieces_player = 0
-        tot_pieces_opponent = 0
-
-        for i in range(4):
-            min_pieces_player = min(min_pieces_player, len(state.board[i][self.player]))
-            tot_pieces_player += len(state.board[i][self.player])
-            min_pieces_opponent = min(min_pieces_opponent, len(state.board[i][(self.player + 1) % 2]))
-            tot_pieces_opponent += len(state.board[i][(self.player + 1) % 2])
-
-        return min_pieces_player, min_pieces_opponent, tot_pieces_player, tot_pieces_opponent
+        opponent = (self.player + 1) % 2
+        return state.min_pieces[self.player], state.min_pieces[opponent], sum(state.piece_counts[self.player]), sum(state.piece_counts[opponent])
 
     def degreOfMobility (self, state):
         """The score returned is the difference between the number of possible actions of the player minus the number of possible from the opponent.
         The evaluation function should be relative to the player id and not to the current player.
         """
 
-        actions_player = len(self.game.compute_actions(state.board, self.player))
-        actions_opponent = len(self.game.compute_actions(state.board, (self.player + 1) % 2))
+        actions_player = len(self.game.compute_actions(state.bitboards, self.player))
+        actions_opponent = len(self.game.compute_actions(state.bitboards, (self.player + 1) % 2))
         
         return (float) (actions_player - actions_opponent)
     
     def evaluate_board_control(self, state):
         """Evaluates the player's control over strategic board positions.
+        The central positions (5, 6, 9 and 10) of the boards are more strategic.
         """
-        control_score = 0.0
-        central_positions = [5, 6, 9, 10] # Central positions are more strategic
-        for board_id in range(4):
-            board = state.board[board_id]
-            player_positions = board[self.player]
-            control_score += sum(1 for pos in central_positions if pos in player_positions)
-        return control_score
+        return float(state.center_counts[self.player])
 
     def PotentialAttacksToOpponent (self, state):
         """The two scores returned are the number of possible attacks of the player that will eliminate or push the pieces of the opponent.
@@ -345,7 +596,7 @@ class AI(Agent):
         player = self.player
         opponent = (self.player + 1) % 2
 
-        actions = self.game.compute_actions(board, opponent)
+        actions = self.game.compute_actions(state.bitboards, opponent)
 
         for action in actions:
         
@@ -375,7 +626,7 @@ class AI(Agent):
         min_pieces_player = 4
 
         #Opponent mobility
-        actions = self.game.compute_actions(board, opponent)
+        actions = self.game.compute_actions(state.bitboards, opponent)
         actions_opponent = len(actions)
 
         #Potential Attacks Against Me
@@ -406,8 +657,6 @@ class AI(Agent):
         return min_pieces_player, actions_opponent, max_pieces_threatened, tot_pieces_threatened
 
     def eval_enhanced_attack(self, state):
-        
-        board = state.board
         if(state.to_move == self.player):
             isPlayer = 1
         else:
@@ -416,57 +665,35 @@ class AI(Agent):
         player = state.to_move
         opponent = (state.to_move + 1) % 2
 
-        #Pieces Advantage
-        totPiecesOpponent  = 0
-        totPiecesPlayer = 0
-        piecesOpponent = 4
-        piecesPlayer = 4
-
+        #Pieces Advantage, maintained by the states
+        piecesOpponent = state.min_pieces[opponent]
+        piecesPlayer = state.min_pieces[player]
+        totPiecesOpponent = sum(state.piece_counts[opponent])
+        totPiecesPlayer = sum(state.piece_counts[player])
         #Player mobility
-        #actions = self.game.compute_actions(board, player)
         actions = state.actions
         actions_player = len(actions) * isPlayer
 
-        #Board Control
-        control_score = 0.0
-        central_positions = [5, 6, 9, 10] # Central positions are more strategic
+        #Board Control, maintained by the states
+        control_score = float(state.center_counts[player])
 
-        #Potential Attacks To Opponent
-        threatenedPiecesOpponent = [[] for i in range(4)]
+        #Potential Attacks To Opponent: actions pushing a stone off a board
+        threatenedPiecesOpponent = [0, 0, 0, 0]
         max_pieces_threatened = 0
         tot_pieces_threatened = 0
 
+        rays = self.game.rays
+        opponent_stones = state.bitboards[opponent]
         for action in actions:
-        
-            passive_board_id, passive_stone_id, active_board_id, active_stone_id, direction, length = action
-            opponent_active_stones = board[active_board_id][opponent]
-
-            for l in range(1, length+1):
-                if active_stone_id + l*direction in opponent_active_stones:
-                    new_opponent_active_stone = active_stone_id + (length+1) * direction
-                    if new_opponent_active_stone < 0 or new_opponent_active_stone > 15 or abs((active_stone_id + length * direction)%4 - (new_opponent_active_stone)%4) > 1:
-                        threatenedPiecesOpponent[active_board_id].append(active_stone_id+l*direction)
+            _, _, active_board_id, active_stone_id, direction, length = action
+            _, path, landing = rays[(active_stone_id, direction, length)]
+            if landing < 0 and (opponent_stones >> (active_board_id << 4)) & path:
+                threatenedPiecesOpponent[active_board_id] += 1
 
         for i in range(4):
-            #Pieces Advantage
-            piecesOpponent = min(piecesOpponent, len(state.board[i][(player + 1) % 2]))
-            piecesPlayer = min(piecesPlayer, len(state.board[i][player]))
-
-            totPiecesOpponent += len(state.board[i][(player + 1) % 2])
-            totPiecesPlayer += len(state.board[i][player])
-            
+            max_pieces_threatened = max(max_pieces_threatened, threatenedPiecesOpponent[i]) * isPlayer
+            tot_pieces_threatened += threatenedPiecesOpponent[i] * isPlayer
 
-
-            #Potential Attacks To Opponent
-
-            max_pieces_threatened = max(max_pieces_threatened, len(threatenedPiecesOpponent[i])) * isPlayer
-            tot_pieces_threatened += len(threatenedPiecesOpponent[i]) * isPlayer
-
-            #Board Control
-            player_positions = board[i][player]
-            control_score += sum(1 for pos in central_positions if pos in player_positions)
-            
-        
         return piecesOpponent, piecesPlayer , actions_player, control_score, max_pieces_threatened, tot_pieces_threatened, totPiecesOpponent, totPiecesPlayer
 
     def eval_enhanced(self, state):
@@ -540,4 +767,61 @@ class AI(Agent):
 
         return 20*defense*(5*piecesPlayer - piecesOpponent) + 0.05*mobilityAdvantage + 4*(totPiecesOpponentThreatened - defense*totPiecesPlayerThreatened) + 1*control_score + 0.1*(piecesOpponentThreatened - piecesOpponentThreatened)
         #return 20*attack*(tot_pieces_player*piecesPlayer - tot_pieces_opponent*piecesOpponent) + 4*(tot_pieces_player*totPiecesOpponentThreatened - tot_pieces_opponent*totPiecesPlayerThreatened) + 0.05*mobilityAdvantage
-  
\ No newline at end of file
+  
+
+class SearchHelper(AI):
+    """A helper process of a Lazy SMP search.
+
+    A helper searches the same state as the agent with iterative deepening, but does not report any result: it only
+    fills the shared transposition table. The odd helpers start one ply deeper than the agent and every helper has
+    its own random history scores, so that the helpers explore the tree in different orders.
+
+    Attributes:
+        running (multiprocessing.RawValue): The number of the current search of the agent, negated once it ends.
+        index (int): The number of the helper, from 1 to `workers - 1`.
+        search_id (int): The number of the search the helper is running.
+    """
+    def __init__(self, player, game, search, quiescence_depth, table, running, index):
+        """Initializes a helper sharing the transposition table of the agent.
+
+        Args:
+            player (int): The player ID of the agent.
+            game (ShobuGame): The game of the agent.
+            search (str): The search core of the agent.
+            quiescence_depth (int): The quiescence depth of the agent.
+            table (SharedTranspositionTable): The transposition table of the agent.
+            running (multiprocessing.RawValue): The number of the current search of the agent.
+            index (int): The number of the helper, from 1 to `workers - 1`.
+        """
+        super().__init__(player, game, search, quiescence_depth, table=table)
+        self.running = running
+        self.index = index
+        self.search_id = 0
+
+    def check_deadline(self):
+        """Interrupts the search if the agent has finished its search or if the deadline is reached.
+
+        Raises:
+            SearchTimeout: If the search must stop.
+        """
+        if self.running.value != self.search_id or time.time() > self.deadline:
+            raise SearchTimeout()
+
+    def run(self, connection):
+        """Runs the searches sent by the agent until it sends None.
+
+        Args:
+            connection (multiprocessing.connection.Connection): The helper end of the pipe to the agent.
+        """
+        generator = random.Random(self.index)
+        while True:
+            message = connection.recv()
+            if message is None:
+                return
+            to_move, bitboards, count_boring_actions, self.deadline, self.search_id = message
+            state = ShobuState(to_move, None, bitboards, None, count_boring_actions, self.game)
+            self.ordering.new_search()
+            self.ordering.history = [score + generator.randrange(HISTORY_NOISE) for score in self.ordering.history]
+            self.pv_moves = dict()
+            for _ in self.iterative_deepening(state, 1 + self.index % 2):
+                pass
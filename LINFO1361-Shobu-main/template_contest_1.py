@@ -1,4 +1,5 @@
 from agent import Agent
+from transposition import TranspositionTable, move_first
 import random
 
 import time
@@ -11,6 +12,7 @@ class AI(Agent):
     Attributes:
         player (int): The player id this agent represents.
         game (ShobuGame): The game the agent is playing.
+        table (TranspositionTable): The transposition table of the searches, kept between two calls of play.
     """
     def __init__(self, player, game):
         """Initializes an AlphaBetaAgent instance with a specified player, game, and maximum search depth.
@@ -22,6 +24,7 @@ class AI(Agent):
         """
         super().__init__(player, game)
         self.max_depth = 2
+        self.table = TranspositionTable()
 
     def play(self, state, remaining_time):
         """Determines the best action by applying the alpha-beta pruning algorithm.
@@ -65,6 +68,7 @@ class AI(Agent):
             ShobuAction: The best action as determined by the alpha-beta algorithm.
         """
         start = time.time()
+        self.table.new_search()
         _, action = self.max_value(state, -float("inf"), float("inf"), 0)
         end = time.time()
         print("Time taken for agent1: ", end - start)
@@ -90,15 +94,20 @@ class AI(Agent):
         if (self.is_cutoff(state, depth)) :
             return (self.eval(state), None)
         
+        value, best_move = self.table.lookup(state.zobrist_key, alpha, beta, self.max_depth - depth)
+        if value is not None and depth > 0:
+            return (value, best_move)
+        alpha_orig = alpha
         best_value = -float("inf")
         
-        for action in state.actions :
-            value2, action2 = self.min_value(self.game.result(state, action), alpha, beta, depth + 1)
+        for action in move_first(state.actions, best_move) :
+            value2, action2 = self.min_value(self.game.unchecked_result(state, action), alpha, beta, depth + 1)
             if value2 > best_value:
                 best_value, best_action = value2, action
                 alpha = max(alpha, best_value)
             if best_value >= beta:
-                return (best_value, best_action)
+                break
+        self.table.save(state.zobrist_key, alpha_orig, beta, self.max_depth - depth, best_value, best_action)
         return (best_value, best_action)
     
 
@@ -123,15 +132,21 @@ class AI(Agent):
         if (self.is_cutoff(state, depth)) :
             return (self.eval(state), None)
   
+        value, best_move = self.table.lookup(state.zobrist_key, alpha, beta, self.max_depth - depth)
+        if value is not None and depth > 0:
+            return (value, best_move)
+        alpha_orig = alpha
+        beta_orig = beta
         best_value = float("inf")
 
-        for action in state.actions :
-            value2, action2 = self.max_value(self.game.result(state, action), alpha, beta, depth + 1)
+        for action in move_first(state.actions, best_move) :
+            value2, action2 = self.max_value(self.game.unchecked_result(state, action), alpha, beta, depth + 1)
             if value2 < best_value:
                 best_value, best_action = value2, action
                 beta = min(beta, best_value)
             if best_value <= alpha:
-                return (best_value, best_action)
+                break
+        self.table.save(state.zobrist_key, alpha_orig, beta_orig, self.max_depth - depth, best_value, best_action)
         return (best_value, best_action)
 
     def print_tree(self, state, alpha, beta, depth):
@@ -150,7 +165,7 @@ class AI(Agent):
         print(f"{'-' * depth} State: {state}")
         
         for action in state.actions:
-            value, _ = self.min_value(self.game.result(state, action), alpha, beta, depth + 1)
+            value, _ = self.min_value(self.game.unchecked_result(state, action), alpha, beta, depth + 1)
             print(f"{'-' * (depth + 1)} Action: {action}, Value: {value}")
             alpha = max(alpha, value)
             if alpha >= beta:
@@ -160,41 +175,26 @@ class AI(Agent):
         """The score returned is the difference between the minimal number of pieces of the player among all 
         the boards minus the minimal numberof pieces from the opponent among all the boards.
         The evaluation function should be relative to the player id and not to the current player.
+        The number of pieces returned with them are the ones of the last board.
         """
-        min_pieces_player = 4
-        min_pieces_opponent = 4
-        tot_pieces_player = 0
-        tot_pieces_opponent = 0
-
-        for i in range(4):
-            min_pieces_player = min(min_pieces_player, len(state.board[i][self.player]))
-            tot_pieces_player = len(state.board[i][self.player])
-            min_pieces_opponent = min(min_pieces_opponent, len(state.board[i][(self.player + 1) % 2]))
-            tot_pieces_opponent = len(state.board[i][(self.player + 1) % 2])
-
-        return min_pieces_player, min_pieces_opponent, tot_pieces_player, tot_pieces_opponent
+        opponent = (self.player + 1) % 2
+        return state.min_pieces[self.player], state.min_pieces[opponent], state.piece_counts[self.player][3], state.piece_counts[opponent][3]
 
     def degreOfMobility (self, state):
         """The score returned is the difference between the number of possible actions of the player minus the number of possible from the opponent.
         The evaluation function should be relative to the player id and not to the current player.
         """
 
-        actions_player = len(self.game.compute_actions(state.board, self.player))
-        actions_opponent = len(self.game.compute_actions(state.board, (self.player + 1) % 2))
+        actions_player = len(self.game.compute_actions(state.bitboards, self.player))
+        actions_opponent = len(self.game.compute_actions(state.bitboards, (self.player + 1) % 2))
         
         return (float) (actions_player - actions_opponent)
     
     def evaluate_board_control(self, state):
         """Evaluates the player's control over strategic board positions.
+        The central positions (5, 6, 9 and 10) of the boards are more strategic.
         """
-        control_score = 0.0
-        # Central positions are more strategic
-        central_positions = [5, 6, 9, 10]
-        for board_id in range(4):
-            board = state.board[board_id]
-            player_positions = board[self.player]
-            control_score += sum(1 for pos in central_positions if pos in player_positions)
-        return control_score
+        return float(state.center_counts[self.player])
 
     def PotentialAttacksToOpponent (self, state):
         """The two scores returned are the number of possible attacks of the player that will eliminate or push the pieces of the opponent.
@@ -251,7 +251,7 @@ class AI(Agent):
         player = self.player
         opponent = (self.player + 1) % 2
 
-        actions = self.game.compute_actions(board, opponent)
+        actions = self.game.compute_actions(state.bitboards, opponent)
 
         for action in actions:
         
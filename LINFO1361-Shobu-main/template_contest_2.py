@@ -1,10 +1,9 @@
 from agent import Agent
+from transposition import TranspositionTable
+from move_ordering import MoveOrdering
 import random
 import time
-import heapq
-import numpy as np
 
-totalTimeSorting = 0
 totalTimeEvaluating = 0
 MAX_DEPTH_LIMIT = 4
 
@@ -16,6 +15,8 @@ class AI(Agent):
     Attributes:
         player (int): The player id this agent represents.
         game (ShobuGame): The game the agent is playing.
+        table (TranspositionTable): The transposition table of the searches, kept between two calls of play.
+        ordering (MoveOrdering): The killer and history tables ordering the actions of the searches.
     """
     def __init__(self, player, game):
         """Initializes an AlphaBetaAgent instance with a specified player, game, and maximum search depth.
@@ -27,6 +28,8 @@ class AI(Agent):
         """
         super().__init__(player, game)
         self.max_depth = 3
+        self.table = TranspositionTable()
+        self.ordering = MoveOrdering()
         self.initial_max_depth = 2
         self.time_budget = None
         self.lastTime = 100
@@ -88,7 +91,6 @@ class AI(Agent):
         return (depth >= self.max_depth) or (self.game.is_terminal(state))
 
     def alpha_beta_search(self, state):
-        global totalTimeSorting
         global totalTimeEvaluating
         """Implements the alpha-beta pruning algorithm to find the best action.
 
@@ -99,51 +101,16 @@ class AI(Agent):
             ShobuAction: The best action as determined by the alpha-beta algorithm.
         """
         start = time.time()
+        self.table.new_search()
+        self.ordering.new_search()
         _, action = self.max_value(state, -float("inf"), float("inf"), 0)
         end = time.time()
         print("Total time elapsed to compute alpha beta search = ", end - start)
-        print("Total time elapsed to sort = ", totalTimeSorting)
         #print("Total time evaluating = ", totalTimeEvaluating)
         #print("Time taken for agent: ", end - start)
 
         return action
     
-    def compute_length(self,state):
-        return [len(state.board[0][0]), len(state.board[0][1]), len(state.board[1][0]), len(state.board[1][1]), len(state.board[2][0]), len(state.board[2][1]), len(state.board[3][0]), len(state.board[3][1])]  
-
-    def pushing_Test(self, move, longueurs, state):
-        listPlayer = [element for i, element in enumerate(longueurs) if i % 2 == state.to_move]  # indices pairs
-        listOpponent = [element for i, element in enumerate(longueurs) if i % 2 != state.to_move]  # indices impairs
-        
-        score = 0
-        central_positions = [5, 6, 9, 10]
-        totalPieces = sum(listPlayer)+sum(listOpponent)
-        startOfGameWeight = 1
-        if(totalPieces >30):
-            startOfGameWeight = 10
-        if move.active_stone_id + move.length*move.direction in central_positions:
-            score+=startOfGameWeight
-        if move.active_stone_id + move.length*move.direction in state.board[move.active_board_id][(state.to_move + 1) % 2]:
-            new_opponent_active_stone = move.active_stone_id + (move.length+1) * move.direction
-            if new_opponent_active_stone < 0 or new_opponent_active_stone > 15 or abs((move.active_stone_id + move.length * move.direction)%4 - (new_opponent_active_stone)%4) > 1:
-                #score+=3
-                listOpponent[move.active_board_id] -= 1
-                score+= (min(listPlayer) - min(listOpponent))**3
-                
-        return score
-
-    def order_moves_based_on_eval(self, state, isReverse):
-        longueurs  = self.compute_length(state)
-        myScores = np.array([self.pushing_Test(action,longueurs,state) for action in state.actions])
-
-        indices_tries = np.argsort(myScores)
-        if(isReverse == False):
-           ordered_moves = [state.actions[i] for i in indices_tries]
-        else:
-            ordered_moves = [state.actions[i] for i in indices_tries[::-1]]
-
-        return ordered_moves
-
     def shallow_eval(self, state):
         """Shallow evaluation function for move ordering."""
         # min_pieces_player = 4
@@ -169,7 +136,6 @@ class AI(Agent):
         #return float(5*min_pieces_player - min_pieces_opponent)**3
 
     def max_value(self, state, alpha, beta, depth):
-        global totalTimeSorting
         """Computes the maximum achievable value for the current player at a given state using the alpha-beta pruning.
 
         This method recursively explores all possible actions from the current state to find the one that maximizes
@@ -188,24 +154,24 @@ class AI(Agent):
         if (self.is_cutoff(state, depth)) :
             return (self.eval_enhanced(state), None)
         
+        value, best_move = self.table.lookup(state.zobrist_key, alpha, beta, self.max_depth - depth)
+        if value is not None and depth > 0:
+            return (value, best_move)
+        alpha_orig = alpha
         best_value = -float("inf")
         best_action = None
-        startTime = time.time()
-        actions = self.order_moves_based_on_eval(state, True)
-        endTime = time.time()
-        
-        totalTimeSorting += endTime - startTime
-        for action in actions:  # Ordering moves based on evaluation
-            value2, action2 = self.min_value(self.game.result(state, action), alpha, beta, depth + 1)
+        for action in self.ordering.ordered_actions(state, depth, best_move):
+            value2, action2 = self.min_value(self.game.unchecked_result(state, action), alpha, beta, depth + 1)
             if value2 > best_value:
                 best_value, best_action = value2, action
                 alpha = max(alpha, best_value)
             if best_value >= beta:
-                return (best_value, best_action)
+                self.ordering.record_cutoff(state, action, depth, self.max_depth - depth)
+                break
+        self.table.save(state.zobrist_key, alpha_orig, beta, self.max_depth - depth, best_value, best_action)
         return (best_value, best_action)
             
     def min_value(self, state, alpha, beta, depth):
-        global totalTimeSorting
         """Computes the minimum achievable value for the opposing player at a given state using the alpha-beta pruning.
 
         Similar to max_value, this method recursively explores all possible actions from the current state to find
@@ -225,59 +191,48 @@ class AI(Agent):
         if (self.is_cutoff(state, depth)) :
             return (self.eval_enhanced(state), None)
   
+        value, best_move = self.table.lookup(state.zobrist_key, alpha, beta, self.max_depth - depth)
+        if value is not None and depth > 0:
+            return (value, best_move)
+        alpha_orig = alpha
+        beta_orig = beta
         best_value = float("inf")
         best_action = None
-        startTime = time.time()
-        actions = self.order_moves_based_on_eval(state, False)
-        stopTime = time.time()
-        totalTimeSorting += stopTime - startTime
-        for action in actions:  # Ordering moves based on evaluation
-            value2, action2 = self.max_value(self.game.result(state, action), alpha, beta, depth + 1)
+        for action in self.ordering.ordered_actions(state, depth, best_move):
+            value2, action2 = self.max_value(self.game.unchecked_result(state, action), alpha, beta, depth + 1)
             if value2 < best_value:
                 best_value, best_action = value2, action
                 beta = min(beta, best_value)
             if best_value <= alpha:
-                return (best_value, best_action)
+                self.ordering.record_cutoff(state, action, depth, self.max_depth - depth)
+                break
+        self.table.save(state.zobrist_key, alpha_orig, beta_orig, self.max_depth - depth, best_value, best_action)
         return (best_value, best_action)
 
     def numberOfPiece (self, state):
         """The score returned is the difference between the minimal number of pieces of the player among all 
         the boards minus the minimal numberof pieces from the opponent among all the boards.
         The evaluation function should be relative to the player id and not to the current player.
+        The number of pieces returned with them are the ones of the last board.
         """
-        min_pieces_player = 4
-        min_pieces_opponent = 4
-        tot_pieces_player = 0
-        tot_pieces_opponent = 0
-
-        for i in range(4):
-            min_pieces_player = min(min_pieces_player, len(state.board[i][self.player]))
-            tot_pieces_player = len(state.board[i][self.player])
-            min_pieces_opponent = min(min_pieces_opponent, len(state.board[i][(self.player + 1) % 2]))
-            tot_pieces_opponent = len(state.board[i][(self.player + 1) % 2])
-
-        return min_pieces_player, min_pieces_opponent, tot_pieces_player, tot_pieces_opponent
+        opponent = (self.player + 1) % 2
+        return state.min_pieces[self.player], state.min_pieces[opponent], state.piece_counts[self.player][3], state.piece_counts[opponent][3]
 
     def degreOfMobility (self, state):
         """The score returned is the difference between the number of possible actions of the player minus the number of possible from the opponent.
         The evaluation function should be relative to the player id and not to the current player.
         """
 
-        actions_player = len(self.game.compute_actions(state.board, self.player))
-        actions_opponent = len(self.game.compute_actions(state.board, (self.player + 1) % 2))
+        actions_player = len(self.game.compute_actions(state.bitboards, self.player))
+        actions_opponent = len(self.game.compute_actions(state.bitboards, (self.player + 1) % 2))
         
         return (float) (actions_player - actions_opponent)
     
     def evaluate_board_control(self, state):
         """Evaluates the player's control over strategic board positions.
+        The central positions (5, 6, 9 and 10) of the boards are more strategic.
         """
-        control_score = 0.0
-        central_positions = [5, 6, 9, 10] # Central positions are more strategic
-        for board_id in range(4):
-            board = state.board[board_id]
-            player_positions = board[self.player]
-            control_score += sum(1 for pos in central_positions if pos in player_positions)
-        return control_score
+        return float(state.center_counts[self.player])
 
     def PotentialAttacksToOpponent (self, state):
         """The two scores returned are the number of possible attacks of the player that will eliminate or push the pieces of the opponent.
@@ -321,7 +276,7 @@ class AI(Agent):
         player = self.player
         opponent = (self.player + 1) % 2
 
-        actions = self.game.compute_actions(board, opponent)
+        actions = self.game.compute_actions(state.bitboards, opponent)
 
         for action in actions:
         
@@ -351,7 +306,7 @@ class AI(Agent):
         min_pieces_player = 4
 
         #Opponent mobility
-        actions = self.game.compute_actions(board, opponent)
+        actions = self.game.compute_actions(state.bitboards, opponent)
         actions_opponent = len(actions)
 
         #Potential Attacks Against Me
@@ -382,7 +337,6 @@ class AI(Agent):
         return min_pieces_player, actions_opponent, max_pieces_threatened, tot_pieces_threatened
 
     def eval_enhanced_attack(self, state):
-        board = state.board
         if(state.to_move == self.player):
             isPlayer = 1
         else:
@@ -391,52 +345,33 @@ class AI(Agent):
         player = state.to_move
         opponent = (state.to_move + 1) % 2
 
-        #Pieces Advantage
-        piecesOpponent = 4
-        piecesPlayer = 4
-
+        #Pieces Advantage, maintained by the states
+        piecesOpponent = state.min_pieces[opponent]
+        piecesPlayer = state.min_pieces[player]
         #Player mobility
-        #actions = self.game.compute_actions(board, player)
         actions = state.actions
         actions_player = len(actions) * isPlayer
 
-        #Board Control
-        control_score = 0.0
-        central_positions = [5, 6, 9, 10] # Central positions are more strategic
+        #Board Control, maintained by the states
+        control_score = float(state.center_counts[player])
 
-        #Potential Attacks To Opponent
-        threatenedPiecesOpponent = [[] for i in range(4)]
+        #Potential Attacks To Opponent: actions pushing a stone off a board
+        threatenedPiecesOpponent = [0, 0, 0, 0]
         max_pieces_threatened = 0
         tot_pieces_threatened = 0
 
+        rays = self.game.rays
+        opponent_stones = state.bitboards[opponent]
         for action in actions:
-        
-            passive_board_id, passive_stone_id, active_board_id, active_stone_id, direction, length = action
-            opponent_active_stones = board[active_board_id][opponent]
-
-            for l in range(1, length+1):
-                if active_stone_id + l*direction in opponent_active_stones:
-                    new_opponent_active_stone = active_stone_id + (length+1) * direction
-                    if new_opponent_active_stone < 0 or new_opponent_active_stone > 15 or abs((active_stone_id + length * direction)%4 - (new_opponent_active_stone)%4) > 1:
-                        threatenedPiecesOpponent[active_board_id].append(active_stone_id+l*direction)
+            _, _, active_board_id, active_stone_id, direction, length = action
+            _, path, landing = rays[(active_stone_id, direction, length)]
+            if landing < 0 and (opponent_stones >> (active_board_id << 4)) & path:
+                threatenedPiecesOpponent[active_board_id] += 1
 
         for i in range(4):
-            #Pieces Advantage
-            piecesOpponent = min(piecesOpponent, len(state.board[i][(player + 1) % 2]))
-            piecesPlayer = min(piecesPlayer, len(state.board[i][player]))
-            
-
+            max_pieces_threatened = max(max_pieces_threatened, threatenedPiecesOpponent[i]) * isPlayer
+            tot_pieces_threatened += threatenedPiecesOpponent[i] * isPlayer
 
-            #Potential Attacks To Opponent
-
-            max_pieces_threatened = max(max_pieces_threatened, len(threatenedPiecesOpponent[i])) * isPlayer
-            tot_pieces_threatened += len(threatenedPiecesOpponent[i]) * isPlayer
-
-            #Board Control
-            player_positions = board[i][player]
-            control_score += sum(1 for pos in central_positions if pos in player_positions)
-            
-        
         return piecesOpponent, piecesPlayer , actions_player, control_score, max_pieces_threatened, tot_pieces_threatened
 
     def eval_enhanced(self, state):
@@ -13,6 +13,8 @@ class Node:
         U (int): The total reward of the node. 
         N (int): The number of times the node has been visited.
         children (dict[Node, ShobuAction]): A dictionary mapping child nodes to their corresponding actions that lead to the state they represent.
+        untried_actions (List[ShobuAction]): The legal actions without a child node yet, in random order, or None until
+            the node is first expanded.
     """
     def __init__(self, parent, state):
         """Initializes a new Node object.
@@ -26,6 +28,7 @@ class Node:
         self.U = 0
         self.N = 0
         self.children = {}
+        self.untried_actions = None
 
 class UCTAgent(Agent):
     """An agent that uses the UCT algorithm to determine the best move.
@@ -37,18 +40,25 @@ class UCTAgent(Agent):
         player (int): The player id this agent represents.
         game (ShobuGame): The game the agent is playing.
         iteration (int): The number of simulations to perform in the UCT algorithm.
+        root (Node): The node of the action chosen at the last move, whose subtree is reused by the next move, or None.
+        rollout_length (int): The number of random actions of a truncated simulation, or None for full simulations.
     """
 
-    def __init__(self, player, game, iteration):
+    def __init__(self, player, game, iteration, rollout_length=None):
         """Initializes a UCTAgent with a specified player, game, and number of iterations.
 
         Args:
             player (int): The player id this agent represents.
             game (ShobuGame): The game the agent is playing.
             iteration (int): The number of simulations to perform in the UCT algorithm.
+            rollout_length (int, optional): If given, the simulations are truncated after this number of random
+                actions and the position reached is scored by a heuristic. Defaults to None (simulations of at most
+                100 actions, an unfinished game being a draw).
         """
         super().__init__(player, game)
         self.iteration = iteration
+        self.root = None
+        self.rollout_length = rollout_length
 
     def play(self, state, remaining_time):
         """Determines the next action to take in the given state.
@@ -65,28 +75,53 @@ class UCTAgent(Agent):
     def uct(self, state):
         """Executes the UCT algorithm to find the best action from the current state.
 
+        The search starts from the subtree of the previous move matching the state if there is one, so that the
+        simulations of the previous moves that went through it are not lost.
+
         Args:
             state (ShobuState): The current state of the game.
 
         Returns:
             ShobuAction: The action leading to the best-perceived outcome based on UCT algorithm.
         """
-        root = Node(None, state)
-        root.children = { Node(root, self.game.result(root.state, action)): action for action in self.game.actions(root.state) }
+        root = self.reuse_tree(state)
+        if root is None:
+            root = Node(None, state)
         for _ in range(self.iteration):
             leaf = self.select(root)
             child = self.expand(leaf)
             result = self.simulate(child.state)
             self.back_propagate(result, child)
         max_state = max(root.children, key=lambda n: n.N)
+        self.root = max_state
+        max_state.parent = None
         return root.children.get(max_state)
 
+    def reuse_tree(self, state):
+        """Finds the state among the replies of the opponent to the last action of the agent, in the previous tree.
+
+        Args:
+            state (ShobuState): The current state of the game.
+
+        Returns:
+            Node: The node of the state, detached from the previous tree so that the rest of it can be freed, or None
+                if the state was not reached in the previous tree.
+        """
+        previous, self.root = self.root, None
+        if previous is None:
+            return None
+        for child in previous.children:
+            if child.state == state:
+                child.parent = None
+                return child
+        return None
+
     def select(self, node):
         """Selects a leaf node using the UCB1 formula to maximize exploration and exploitation.
 
         The function recursively selects the children of the node that maximise the UCB1 score, exploring the most promising 
         path in the game tree. It stops when a leaf is found and returns it. A leaf is either a node in a terminal state, 
-        or a node with a child for which no simulation has yet been performed.
+        or a node with an action that has no child node yet.
         
         Args:
             node (Node): The node to select from.
@@ -97,9 +132,8 @@ class UCTAgent(Agent):
         if (self.game.is_terminal(node.state)) : 
             return node
 
-        for child in node.children:
-            if (child.N == 0) :
-                return node
+        if node.untried_actions is None or node.untried_actions :
+            return node
 
         max_UCB1_score = max(node.children, key=lambda n: self.UCB1(n))
         return self.select(max_UCB1_score)
@@ -108,8 +142,8 @@ class UCTAgent(Agent):
     def expand(self, node):
         """Expands a node by adding a child node to the tree for an unexplored action.
 
-        The function returns one of the children of the node for which no simulation has yet been performed. 
-        In addition, the function must initialize all the children of that child node in the child's "children" dictionary. 
+        The function creates the child node of one of the untried actions of the node and returns it. Only the state of
+        that child is computed, the untried actions of a node being listed at its first expansion.
         If the node is in a terminal state, the function returns itself, indicating that the node can no longer be expanded.
 
         Args:
@@ -120,18 +154,24 @@ class UCTAgent(Agent):
         """
         if (self.game.is_terminal(node.state)) : 
             return node
-        
-        for child in node.children :
-            if(child.N == 0) :
-                for action in self.game.actions(child.state) :
-                    child_child = Node(child, self.game.result(child.state, action))
-                    child.children[child_child] = action
-                return child
 
-        return node 
+        if node.untried_actions is None :
+            node.untried_actions = list(self.game.actions(node.state))
+            random.shuffle(node.untried_actions)
+        if not node.untried_actions :
+            return node
+
+        action = node.untried_actions.pop()
+        child = Node(node, self.game.unchecked_result(node.state, action))
+        node.children[child] = action
+        return child
 
     def simulate(self, state):
-        """Simulates a random play-through from the given state to a terminal state.
+        """Simulates a random play-through from the given state to a terminal state, at most 100 actions later.
+
+        The actions are played on bitboards with `ShobuGame.random_playout`, without creating the intermediate states.
+        With a `rollout_length`, the play-through stops after that number of actions and an unfinished game is scored
+        in ]-1, 1[ from the difference between the minimum stone counts of the players, as in `AlphaBetaAgent.eval`.
 
         Args:
             state (ShobuState): The state to simulate from.
@@ -139,18 +179,11 @@ class UCTAgent(Agent):
         Returns:
             float: The utility value of the resulting terminal state in the point of view of the opponent in the original state.
         """
-        sim_state = state
-
-        for _ in range (100) :
-
-            if self.game.is_terminal(sim_state) :
-                return -sim_state.utility if state.to_move == 0 else sim_state.utility
-
-            actions = self.game.actions(sim_state)
-            choosen_action = random.choice(actions)
-            sim_state = self.game.result(sim_state, choosen_action)
-        
-        return -sim_state.utility if state.to_move == 0 else sim_state.utility
+        if self.rollout_length is None:
+            utility = self.game.random_playout(state.bitboards, state.to_move, state.count_boring_actions, 100)
+        else:
+            utility = self.game.random_playout(state.bitboards, state.to_move, state.count_boring_actions, self.rollout_length, True)
+        return -utility if state.to_move == 0 else utility
 
 
     def back_propagate(self, result, node):
@@ -159,14 +192,17 @@ class UCTAgent(Agent):
         This method is responsible for updating the statistics for each node according to the result of the simulation. 
         It recursively updates the U (utility) and N (number of visits) values for each node on the path from the given 
         node to the root. The utility of a node is only updated if it is a node that must contain the win rate of the 
-        player who won the simulation, otherwise the utility is not modified.
+        player who won the simulation, otherwise the utility is not modified. The results of truncated simulations are
+        fractional, and add (1 + result) / 2 to the utility of every node instead.
 
         Args:
             result (float): The result of the simulation.
             node (Node): The node to start backpropagation from.
         """
          
-        if (result == 1) :
+        if self.rollout_length is not None :
+            node.U += (1 + result) / 2
+        elif (result == 1) :
             node.U += 1
         node.N += 1 
 
@@ -0,0 +1,72 @@
+import unittest
+import random
+from shobu import ShobuGame, ShobuState, encode_action
+from move_ordering import MoveOrdering, ACTIVE_LANDINGS
+
+def random_states(game, count, seed=1361):
+    """Returns non-terminal states reached by random actions from the initial state."""
+    generator = random.Random(seed)
+    states = []
+    while len(states) < count:
+        state = game.initial
+        for _ in range(generator.randrange(60)):
+            if game.is_terminal(state):
+                break
+            state = game.result(state, generator.choice(state.actions))
+        if not game.is_terminal(state):
+            states.append(state)
+    return states
+
+class TestMoveOrdering(unittest.TestCase):
+    def test_each_action_once(self):
+        game = ShobuGame()
+        for state in random_states(game, 30):
+            ordering = MoveOrdering()
+            ordering.killers[2] = [encode_action(state.actions[-1]), encode_action(state.actions[0])]
+            actions = list(ordering.ordered_actions(state, 2, state.actions[len(state.actions) // 2]))
+            self.assertEqual(sorted(actions), sorted(state.actions))
+            self.assertEqual(actions[0], state.actions[len(state.actions) // 2])
+
+    def test_stages(self):
+        game = ShobuGame()
+        for state in random_states(game, 30):
+            ordering = MoveOrdering()
+            quiet = [action for action in state.actions if not ordering.is_pushing(state, encode_action(action))]
+            if len(quiet) < 3:
+                continue
+            killer = quiet[1]
+            ordering.killers[0] = [encode_action(killer), -1]
+            ordering.history[encode_action(quiet[2])] = 10
+            codes = [encode_action(action) for action in ordering.ordered_actions(state, 0, None)]
+            pushing = [ordering.is_pushing(state, code) for code in codes]
+            pushing_off = [pushes and ACTIVE_LANDINGS[code & 0xFF] < 0 for code, pushes in zip(codes, pushing)]
+            # Pushes off the board, then the other pushes, the killer and the quiet moves by history
+            self.assertEqual(pushing_off, sorted(pushing_off, reverse=True))
+            self.assertEqual(pushing, sorted(pushing, reverse=True))
+            index = pushing.count(True)
+            self.assertEqual(codes[index:index + 2], [encode_action(killer), encode_action(quiet[2])])
+
+    def test_illegal_hints(self):
+        # A hinted action or killer that is not legal in the state is not yielded
+        game = ShobuGame()
+        state = game.initial
+        illegal = game.result(state, state.actions[0]).actions[0]
+        ordering = MoveOrdering()
+        ordering.killers[1] = [encode_action(illegal), -1]
+        self.assertEqual(sorted(ordering.ordered_actions(state, 1, illegal)), sorted(state.actions))
+
+    def test_codes_from_actions(self):
+        # The actions and the codes of a state are the same whichever is computed first
+        game = ShobuGame()
+        for state in random_states(game, 10):
+            actions = game.compute_actions(state.bitboards, state.to_move)
+            codes = [encode_action(action) for action in actions]
+            actions_first = ShobuState(state.to_move, None, state.bitboards, None, state.count_boring_actions, game)
+            self.assertEqual(actions_first.actions, actions)
+            self.assertEqual(list(actions_first.action_codes), codes)
+            codes_first = ShobuState(state.to_move, None, state.bitboards, None, state.count_boring_actions, game)
+            self.assertEqual(list(codes_first.action_codes), codes)
+            self.assertEqual(codes_first.actions, actions)
+
+if __name__ == '__main__':
+    unittest.main()
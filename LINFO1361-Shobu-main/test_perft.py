@@ -0,0 +1,22 @@
+import unittest
+from shobu import ShobuGame, ShobuPosition
+from perft import POSITIONS, REFERENCE_COUNTS, get_state, perft_state, perft_position, check
+
+class TestPerft(unittest.TestCase):
+    def test_reference_counts(self):
+        # Both move generation paths find the reference number of leaves
+        game = ShobuGame()
+        for name in POSITIONS:
+            for depth in range(3):
+                expected = REFERENCE_COUNTS[name][depth]
+                self.assertEqual(perft_state(game, get_state(game, name), depth), expected, (name, depth))
+                self.assertEqual(perft_position(ShobuPosition(get_state(game, name), game), depth), expected, (name, depth))
+
+    def test_reference_implementation(self):
+        # The actions, results and features match the original set-based rules
+        game = ShobuGame()
+        for name in POSITIONS:
+            self.assertEqual(check(game, get_state(game, name), 2), REFERENCE_COUNTS[name][2], name)
+
+if __name__ == '__main__':
+    unittest.main()
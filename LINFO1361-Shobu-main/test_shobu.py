@@ -0,0 +1,135 @@
+import unittest
+import math
+import random
+from shobu import ShobuGame, ShobuAction, ShobuPosition, PLAYOUT_CUTOFF_SCALE, compute_zobrist_key, compute_piece_counts, compute_center_counts
+from perft import POSITIONS, get_state
+
+def random_walk(game, state, length, generator):
+    """Returns the states reached by random actions from a state, the state included, until the game ends."""
+    states = [state]
+    for _ in range(length):
+        if game.is_terminal(state):
+            break
+        state = game.result(state, generator.choice(state.actions))
+        states.append(state)
+    return states
+
+def fields(position):
+    """Returns the fields of a position updated by `make` and `unmake`."""
+    return (position.to_move, position.bitboards, position.count_boring_actions, position.zobrist_key,
+            tuple(tuple(counts) for counts in position.piece_counts), position.center_counts)
+
+class TestShobuPosition(unittest.TestCase):
+    def setUp(self):
+        self.game = ShobuGame()
+        generator = random.Random(1361)
+        self.states = [state for name in POSITIONS for state in random_walk(self.game, get_state(self.game, name), 40, generator)]
+
+    def test_make_unmake(self):
+        # Every action played with make gives the child of unchecked_result, and unmake restores the position
+        for state in self.states:
+            position = ShobuPosition(state, self.game)
+            before = fields(position)
+            for action in state.actions:
+                token = position.make(action)
+                child = self.game.unchecked_result(state, action)
+                self.assertEqual(fields(position), (child.to_move, child.bitboards, child.count_boring_actions, child.zobrist_key, child.piece_counts, child.center_counts), action)
+                self.assertEqual(position.zobrist_key, compute_zobrist_key(position.bitboards, position.to_move))
+                self.assertEqual(position.to_state(), child)
+                position.unmake(token)
+                self.assertEqual(fields(position), before, action)
+            self.assertEqual(position.actions(), state.actions)
+
+    def test_nested_make_unmake(self):
+        # A sequence of actions taken back in reverse order restores every intermediate position
+        generator = random.Random(1361)
+        for state in self.states[::10]:
+            position = ShobuPosition(state, self.game)
+            stack = []
+            while len(stack) < 8 and not position.is_terminal():
+                before = fields(position)
+                stack.append((before, position.make(generator.choice(position.actions()))))
+                bitboards = position.bitboards
+                self.assertEqual(fields(position)[4:], (compute_piece_counts(bitboards), compute_center_counts(bitboards)))
+            while stack:
+                before, token = stack.pop()
+                position.unmake(token)
+                self.assertEqual(fields(position), before)
+
+class TestShobuGame(unittest.TestCase):
+    def setUp(self):
+        self.game = ShobuGame()
+        generator = random.Random(6)
+        self.states = [state for name in POSITIONS for state in random_walk(self.game, get_state(self.game, name), 60, generator)[::8]]
+
+    def test_is_legal(self):
+        # The constant-time check agrees with the generated actions on every encodable action
+        candidates = [action for action in ShobuGame.actions_by_code if action is not None]
+        for state in self.states:
+            legal = set(self.game.compute_actions(state.bitboards, state.to_move))
+            self.assertEqual({action for action in candidates if self.game.is_legal(state, action)}, legal, state)
+
+    def test_is_legal_malformed(self):
+        state = self.game.initial
+        action = state.actions[0]
+        self.assertTrue(self.game.is_legal(state, tuple(action)))
+        for malformed in (None, -2, action[:5], action + (0,), ShobuAction(0, 0, 1, 0, (0, 3), 1), ShobuAction(0, 0, 1, 0, (1, 0), 3)):
+            self.assertFalse(self.game.is_legal(state, malformed), malformed)
+
+    def test_result(self):
+        # result plays the legal actions like unchecked_result and ignores the illegal ones
+        for state in self.states:
+            for action in state.actions:
+                self.assertEqual(self.game.result(state, action), self.game.unchecked_result(state, action))
+            illegal = next(action for action in ShobuGame.actions_by_code if action is not None and not self.game.is_legal(state, action))
+            self.assertIs(self.game.result(state, illegal), state)
+
+    def test_sample_action(self):
+        # The sampled actions are legal, and all the legal actions end up being drawn
+        random.seed(1361)
+        for state in self.states:
+            player_stones, opponent_stones = state.bitboards[state.to_move], state.bitboards[(state.to_move + 1) % 2]
+            codes = set(state.action_codes)
+            drawn = set()
+            for _ in range(20 * len(codes)):
+                passive_offset, passive_stone, active_offset, active_stone, ray_index = self.game.sample_action(player_stones, opponent_stones, state.to_move)
+                drawn.add((passive_offset << 10) | (passive_stone << 10) | (active_offset << 4) | (active_stone << 4) | ray_index)
+            self.assertEqual(drawn, codes, state)
+
+    def test_random_playout(self):
+        # A playout from the end of a game gives its utility, and any other one a result of a finished game
+        random.seed(1361)
+        generator = random.Random(1361)
+        ends = [random_walk(self.game, self.game.initial, 500, generator)[-1] for _ in range(5)]
+        self.assertTrue(all(map(self.game.is_terminal, ends)))
+        for state in ends + self.states:
+            result = self.game.random_playout(state.bitboards, state.to_move, state.count_boring_actions)
+            self.assertIn(result, (-1, 0, 1))
+            if self.game.is_terminal(state):
+                self.assertEqual(result, state.utility)
+
+    def test_playout_cutoff(self):
+        # A truncated playout scores the unfinished game by the minimum stone counts of the players
+        for state in self.states:
+            if not self.game.is_terminal(state):
+                result = self.game.random_playout(state.bitboards, state.to_move, state.count_boring_actions, 0, True)
+                self.assertEqual(result, math.tanh((state.min_pieces[0] - state.min_pieces[1]) / PLAYOUT_CUTOFF_SCALE))
+
+        # A playout of one action is scored like the state it reaches, a draw if that action is the last one without
+        # push allowed (the seed replays the action drawn first by the playout)
+        state = next(state for state in self.states if state.min_pieces[0] != state.min_pieces[1] and not self.game.is_terminal(state))
+        state = state._replace(count_boring_actions=self.game.max_count_boring_actions - 1)
+        player_stones, opponent_stones = state.bitboards[state.to_move], state.bitboards[(state.to_move + 1) % 2]
+        draws = 0
+        for seed in range(40):
+            random.seed(seed)
+            passive_offset, passive_stone, active_offset, active_stone, ray_index = self.game.sample_action(player_stones, opponent_stones, state.to_move)
+            child = self.game.unchecked_result(state, ShobuGame.actions_by_code[(passive_offset << 10) | (passive_stone << 10) | (active_offset << 4) | (active_stone << 4) | ray_index])
+            expected = child.utility if self.game.is_terminal(child) else math.tanh((child.min_pieces[0] - child.min_pieces[1]) / PLAYOUT_CUTOFF_SCALE)
+            random.seed(seed)
+            self.assertEqual(self.game.random_playout(state.bitboards, state.to_move, state.count_boring_actions, 1, True), expected, seed)
+            draws += child.count_boring_actions == self.game.max_count_boring_actions
+        self.assertTrue(draws)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,52 @@
+import unittest
+import random
+import numpy as np
+from shobu import ShobuGame
+from shobu_batch import ShobuBatch
+
+class TestShobuBatch(unittest.TestCase):
+    def setUp(self):
+        self.game = ShobuGame()
+        generator = random.Random(1361)
+        self.states = []
+        for _ in range(10):
+            state = self.game.initial
+            while not self.game.is_terminal(state):
+                self.states.append(state)
+                state = self.game.result(state, generator.choice(state.actions))
+            self.states.append(state)
+        self.batch = ShobuBatch.from_states(self.game, self.states)
+
+    def test_states_round_trip(self):
+        self.assertEqual(self.batch.to_states(), self.states)
+
+    def test_moves_and_utilities(self):
+        # The batched generator agrees with ShobuGame on every position
+        counts = self.batch.count_moves()
+        utilities = self.batch.utilities(counts)
+        self.assertEqual(list(counts), [len(state.actions) for state in self.states])
+        self.assertEqual(list(utilities), [state.utility for state in self.states])
+        self.assertEqual(list(self.batch.is_terminal(utilities)), [self.game.is_terminal(state) for state in self.states])
+
+    def test_sample_and_apply(self):
+        # The sampled moves are legal and are played like unchecked_result
+        rng = np.random.default_rng(1361)
+        ongoing = np.array([bool(state.actions) for state in self.states])
+        for _ in range(3):
+            batch = self.batch.copy()
+            codes = batch.sample_moves(rng)
+            batch.apply_moves(codes, where=ongoing)
+            for state, code, child, moved in zip(self.states, codes, batch.to_states(), ongoing):
+                if moved:
+                    self.assertIn(code, state.action_codes)
+                    self.assertEqual(child, self.game.unchecked_result(state, ShobuGame.actions_by_code[code]))
+                else:
+                    self.assertEqual(child, state)
+
+    def test_playouts(self):
+        batch = self.batch.copy()
+        utilities = batch.playouts(np.random.default_rng(1361))
+        self.assertEqual(list(utilities), [state.utility for state in batch.to_states()])
+
+if __name__ == '__main__':
+    unittest.main()
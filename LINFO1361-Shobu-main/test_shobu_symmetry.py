@@ -0,0 +1,60 @@
+import unittest
+import random
+from shobu import ShobuGame, ShobuState, compute_zobrist_key
+from shobu_symmetry import SYMMETRIES, IDENTITY, transform_bitboards, transform_action, canonical_form, canonical_key
+from perft import POSITIONS, get_state
+
+class TestSymmetries(unittest.TestCase):
+    def setUp(self):
+        self.game = ShobuGame()
+        generator = random.Random(1361)
+        self.states = []
+        for name in POSITIONS:
+            state = get_state(self.game, name)
+            self.states.append(state)
+            for _ in range(4):
+                if self.game.is_terminal(state):
+                    break
+                state = self.game.result(state, generator.choice(state.actions))
+                self.states.append(state)
+
+    def image(self, state, symmetry):
+        """Returns the image of a state by a symmetry."""
+        return ShobuState(state.to_move, None, transform_bitboards(state.bitboards, symmetry), None, state.count_boring_actions, self.game)
+
+    def test_actions(self):
+        # The images of the legal actions are the legal actions of the image, and they play the image of every child
+        for state in self.states:
+            for symmetry in SYMMETRIES:
+                image = self.image(state, symmetry)
+                self.assertEqual(sorted(transform_action(action, symmetry) for action in state.actions), sorted(image.actions))
+                for action in state.actions:
+                    child = self.game.unchecked_result(state, action)
+                    image_child = self.game.unchecked_result(image, transform_action(action, symmetry))
+                    self.assertEqual(image_child, self.image(child, symmetry), (symmetry, action))
+                    self.assertEqual(image_child.utility, child.utility)
+
+    def test_involutions(self):
+        for state in self.states:
+            for symmetry in SYMMETRIES:
+                self.assertEqual(transform_bitboards(transform_bitboards(state.bitboards, symmetry), symmetry), state.bitboards)
+                for action in state.actions:
+                    self.assertEqual(transform_action(transform_action(action, symmetry), symmetry), action)
+
+    def test_canonical_key(self):
+        # The 4 images of a state share the canonical form and key, reached with the symmetry returned
+        for state in self.states:
+            bitboards, symmetry = canonical_form(state.bitboards)
+            self.assertEqual(transform_bitboards(state.bitboards, symmetry), bitboards)
+            self.assertEqual(bitboards, min(transform_bitboards(state.bitboards, symmetry) for symmetry in SYMMETRIES))
+            key = compute_zobrist_key(bitboards, state.to_move)
+            for symmetry in SYMMETRIES:
+                image = self.image(state, symmetry)
+                image_key, image_symmetry = canonical_key(image)
+                self.assertEqual(image_key, key)
+                self.assertEqual(transform_bitboards(image.bitboards, image_symmetry), bitboards)
+        initial = self.game.initial
+        self.assertEqual(canonical_key(initial), (initial.zobrist_key, IDENTITY))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,52 @@
+import unittest
+from shobu import ShobuGame, ShobuPosition
+from template_alphabeta import AlphaBetaAgent
+from transposition import TranspositionTable, EXACT
+from perft import POSITIONS, get_state
+
+class NoTable(TranspositionTable):
+    """A transposition table that never stores anything, for searching without one."""
+    def store(self, key, depth, flag, score, move):
+        pass
+
+def search(agent, state, depth, windows):
+    """Searches the children of the root one ply shallower with each window, then the root with a full window.
+
+    The children leave entries, exact or bounds, that settle nodes of the search of the root, whose own order of
+    actions is not changed since the root has no entry.
+    """
+    position = ShobuPosition(state, agent.game)
+    agent.max_depth = depth - 1
+    for action in state.actions:
+        token = position.make(action)
+        for alpha, beta in windows:
+            agent.min_value(position, alpha, beta, 0)
+        position.unmake(token)
+    agent.max_depth = depth
+    return agent.max_value(position, -float("inf"), float("inf"), 0)
+
+class TestAlphaBetaAgent(unittest.TestCase):
+    def test_table_keeps_search_result(self):
+        # The same root value and action must be found with and without the table
+        game = ShobuGame()
+        windows = [(-float("inf"), float("inf")), (-0.5, 0.5), (0.5, 1.5), (-1.5, -0.5)]
+        for name in POSITIONS:
+            state = get_state(game, name)
+            agent = AlphaBetaAgent(state.to_move, game, 2)
+            reference = AlphaBetaAgent(state.to_move, game, 2)
+            reference.table = NoTable(4)
+            self.assertEqual(search(agent, state, 2, windows), search(reference, state, 2, windows), name)
+
+    def test_min_node_exact(self):
+        # A node of the opponent searched with a full window has an exact value
+        game = ShobuGame()
+        for name in POSITIONS:
+            state = get_state(game, name)
+            agent = AlphaBetaAgent((state.to_move + 1) % 2, game, 2)
+            position = ShobuPosition(state, game)
+            value, _ = agent.min_value(position, -float("inf"), float("inf"), 0)
+            entry = agent.table.probe(position.zobrist_key)
+            self.assertEqual((entry.flag, entry.score), (EXACT, value), name)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,195 @@
+import unittest
+import os
+import time
+from shobu import ShobuGame
+from template_contest import AI
+from perft import get_state
+from transposition import TranspositionTable
+
+def fixed_depth_agent(game, state, depth, search):
+    """Returns a new agent playing the state, ready for a search of the given depth without quiescence nor deadline.
+
+    The leaves are scored by their Zobrist key, an arbitrary evaluation that is fast and leaves no ties.
+    """
+    agent = AI(state.to_move, game, search, quiescence_depth=0)
+    agent.eval_enhanced = lambda state: (state.zobrist_key & 0xFFFF) - 0x8000
+    agent.max_depth = depth
+    agent.pv_lines = [[] for _ in range(depth + 1)]
+    return agent
+
+def quiescence_reference(agent, state, depth):
+    """Negamax over the pushing actions without pruning, the player to move being able to stand pat."""
+    sign = 1 if state.to_move == agent.player else -1
+    value = sign * agent.eval_enhanced(state)
+    if depth >= agent.quiescence_depth or agent.game.is_terminal(state):
+        return value
+    for action in agent.game.compute_actions(state.bitboards, state.to_move):
+        child = agent.game.unchecked_result(state, action)
+        if child.count_boring_actions == 0:
+            value = max(value, -quiescence_reference(agent, child, depth + 1))
+    return value
+
+def minimax_reference(agent, state, depth):
+    """Minimax without pruning nor quiescence, the leaves being scored by `eval_enhanced`."""
+    if depth == 0 or agent.game.is_terminal(state):
+        return agent.eval_enhanced(state)
+    values = [minimax_reference(agent, agent.game.unchecked_result(state, action), depth - 1) for action in state.actions]
+    return max(values) if state.to_move == agent.player else min(values)
+
+class TestAI(unittest.TestCase):
+    def test_pvs_value(self):
+        # PVS, with a full window or an aspiration window, finds the minimax value of the root
+        game = ShobuGame()
+        for name in ("middlegame", "endgame"):
+            state = get_state(game, name)
+            value, _ = fixed_depth_agent(game, state, 3, "minimax").max_value(state, -float("inf"), float("inf"), 0)
+            self.assertEqual(fixed_depth_agent(game, state, 3, "pvs").pvs(state, -float("inf"), float("inf"), 0)[0], value)
+            for guess in (value, value + 10, value - 10):
+                self.assertEqual(fixed_depth_agent(game, state, 3, "pvs").aspiration_search(state, guess)[0], value)
+
+    def test_quiescence_stand_pat(self):
+        # Without any pushing action, the quiescence search keeps the static evaluation
+        game = ShobuGame()
+        state = game.initial
+        self.assertEqual(game.compute_pushing_actions(state.bitboards, state.to_move), [])
+        for player in range(2):
+            agent = AI(player, game)
+            self.assertEqual(agent.horizon_value(state, -float("inf"), float("inf")), agent.eval_enhanced(state))
+
+    def test_quiescence_pushing_actions(self):
+        # Only the pushing actions are searched, at most quiescence_depth of them after the horizon
+        game = ShobuGame()
+        for name in ("middlegame", "endgame"):
+            state = get_state(game, name)
+            for player, quiescence_depth in ((0, 1), (1, 1), (0, 2), (1, 2)):
+                agent = AI(player, game, quiescence_depth=quiescence_depth)
+                calls = []
+                search = agent.quiescence
+                def quiescence(state, alpha, beta, depth):
+                    calls.append((state, depth))
+                    return search(state, alpha, beta, depth)
+                agent.quiescence = quiescence
+                value = agent.horizon_value(state, -float("inf"), float("inf"))
+                sign = 1 if state.to_move == player else -1
+                self.assertEqual(value, sign * quiescence_reference(agent, state, 0), (name, player))
+                self.assertIn(max(depth for _, depth in calls), range(1, quiescence_depth + 1))
+                self.assertTrue(all(state.count_boring_actions == 0 for state, depth in calls if depth > 0))
+
+    def test_quiescence_depth_0(self):
+        # Without quiescence, the search finds the minimax value of the static evaluation at the horizon
+        game = ShobuGame()
+        state = get_state(game, "endgame")
+        agent = AI(state.to_move, game, quiescence_depth=0)
+        agent.max_depth = 2
+        agent.pv_lines = [[] for _ in range(3)]
+        agent.quiescence = None
+        self.assertEqual(agent.max_value(state, -float("inf"), float("inf"), 0)[0], minimax_reference(agent, state, 2))
+
+    def test_stop_pondering(self):
+        game = ShobuGame()
+        agent = AI(0, game, quiescence_depth=0)
+        agent.start_pondering(get_state(game, "endgame"))
+        thread = agent.ponder_thread
+        self.assertTrue(thread.is_alive())
+        agent.stop_pondering()
+        self.assertFalse(thread.is_alive())
+        self.assertIsNone(agent.ponder_thread)
+        self.assertFalse(agent.ponder_stop.is_set())
+        agent.stop_pondering()
+
+    def spy_search(self, agent):
+        """Records the first depth of the iterative deepenings and the calls of new_search of the agent."""
+        calls = {"first_depths": [], "table": 0, "ordering": 0}
+        iterative_deepening = agent.iterative_deepening
+        def spy_iterative_deepening(state, first_depth=1, value=None):
+            calls["first_depths"].append(first_depth)
+            return iterative_deepening(state, first_depth, value)
+        agent.iterative_deepening = spy_iterative_deepening
+        table_new_search = agent.table.new_search
+        ordering_new_search = agent.ordering.new_search
+        def spy_table():
+            calls["table"] += 1
+            table_new_search()
+        def spy_ordering():
+            calls["ordering"] += 1
+            ordering_new_search()
+        agent.table.new_search = spy_table
+        agent.ordering.new_search = spy_ordering
+        return calls
+
+    def test_ponder_hit(self):
+        # The search resumes after the last iteration completed by the pondering
+        game = ShobuGame()
+        state = get_state(game, "endgame")
+        agent = AI(state.to_move, game, quiescence_depth=0)
+        agent.start_pondering(state)
+        start = time.time()
+        while (agent.pondered is None or agent.pondered[1] < 2) and time.time() < start + 60:
+            time.sleep(0.01)
+        agent.stop_pondering()
+        _, depth, _, _ = agent.pondered
+        calls = self.spy_search(agent)
+        self.assertIn(agent.play(state, 3), state.actions)
+        self.assertEqual(calls["first_depths"], [depth + 1])
+        self.assertEqual((calls["table"], calls["ordering"]), (0, 0))
+        self.assertIsNone(agent.pondered)
+
+    def test_ponder_miss(self):
+        # The result of a pondering of another state is discarded and the search starts from scratch
+        game = ShobuGame()
+        state = get_state(game, "endgame")
+        agent = AI(state.to_move, game, quiescence_depth=0)
+        agent.pondered = (game.initial.zobrist_key, 5, 0.0, game.initial.actions[0])
+        agent.pv_moves = {game.initial.zobrist_key: game.initial.actions[0]}
+        calls = self.spy_search(agent)
+        self.assertIn(agent.play(state, 3), state.actions)
+        self.assertEqual(calls["first_depths"], [1])
+        self.assertEqual((calls["table"], calls["ordering"]), (1, 1))
+        self.assertIsNone(agent.pondered)
+        self.assertNotIn(game.initial.zobrist_key, agent.pv_moves)
+
+    def test_expected_state(self):
+        # The pondered state follows the action played and the reply of the principal variation
+        game = ShobuGame()
+        state = get_state(game, "endgame")
+        agent = AI(state.to_move, game, quiescence_depth=0, ponder=True)
+        pondered = []
+        agent.start_pondering = pondered.append
+        action = agent.play(state, 60)
+        after = game.unchecked_result(state, action)
+        expected = game.unchecked_result(after, agent.pv_moves[after.zobrist_key])
+        self.assertEqual(pondered, [expected])
+
+    def test_deadline_during_first_iteration(self):
+        # With almost no time left, even the first iteration is interrupted and a legal action is still played
+        game = ShobuGame()
+        for search in ("minimax", "pvs"):
+            agent = AI(0, game, search)
+            start = time.time()
+            action = agent.play(game.initial, 0.03)
+            self.assertLess(time.time() - start, 0.5)
+            self.assertIn(action, game.initial.actions)
+
+    def test_move_time_cap(self):
+        game = ShobuGame()
+        agent = AI(0, game)
+        agent.alpha_beta_search = lambda state, deadline: deadline - time.time()
+        self.assertLessEqual(agent.play(game.initial, 6000), 10.0)
+        self.assertAlmostEqual(agent.play(game.initial, 60), 2.0, places=1)
+
+    def test_close(self):
+        # Closing terminates the helpers and unlinks the shared table, and the agent can play the next game
+        game = ShobuGame()
+        agent = AI(0, game, workers=2)
+        for _ in range(2):
+            self.assertIn(agent.play(game.initial, 0.3), game.initial.actions)
+            processes = [process for process, _ in agent.helpers]
+            name = agent.table.memory.name
+            agent.close()
+            agent.close()
+            self.assertFalse(any(process.is_alive() for process in processes))
+            self.assertNotIn(name, os.listdir("/dev/shm"))
+            self.assertIs(type(agent.table), TranspositionTable)
+
+if __name__ == '__main__':
+    unittest.main()
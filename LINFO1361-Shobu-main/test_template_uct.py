@@ -0,0 +1,83 @@
+import unittest
+from shobu import ShobuGame
+from template_uct import Node, UCTAgent
+from perft import get_state
+
+def tree_size(node):
+    """Counts the nodes of the subtree of a node."""
+    return 1 + sum(tree_size(child) for child in node.children)
+
+class TestUCTAgent(unittest.TestCase):
+    def setUp(self):
+        self.game = ShobuGame()
+        self.agent = UCTAgent(0, self.game, 500, rollout_length=10)
+        self.roots = []
+        select = self.agent.select
+        def spy_select(node):
+            if node.parent is None:
+                self.roots.append(node)
+            return select(node)
+        self.agent.select = spy_select
+
+    def test_reuse_tree(self):
+        # After an action and a reply, the search goes on from the node of the reply in the previous tree
+        state = get_state(self.game, "endgame")
+        action = self.agent.uct(state)
+        kept = self.agent.root
+        self.assertIsNone(kept.parent)
+        self.assertEqual(kept.state, self.game.result(state, action))
+        child = max(kept.children, key=lambda node: node.N)
+        visits = child.N
+        state = self.game.result(kept.state, kept.children[child])
+
+        root = self.agent.reuse_tree(state)
+        self.assertIs(root, child)
+        self.assertEqual(root.state, state)
+        self.assertEqual(root.N, visits)
+        self.assertIsNone(root.parent)
+        self.assertIsNone(self.agent.root)
+
+        self.agent.root = kept
+        self.assertIn(self.agent.uct(state), state.actions)
+        self.assertIs(self.roots[-1], child)
+        self.assertEqual(child.N, visits + 500)
+
+    def test_unknown_reply(self):
+        # A reply that was not searched starts a new tree
+        state = get_state(self.game, "endgame")
+        action = self.agent.uct(state)
+        state = self.game.result(self.game.result(state, action), self.agent.root.state.actions[0])
+        self.agent.root.children.clear()
+        self.assertIn(self.agent.uct(state), state.actions)
+        root = self.roots[-1]
+        self.assertIsNot(root, self.roots[0])
+        self.assertEqual(root.state, state)
+        self.assertEqual(root.N, 500)
+
+    def test_lazy_expansion(self):
+        # Every iteration adds a single node, the actions of a node being listed at its first expansion
+        state = get_state(self.game, "endgame")
+        root = Node(None, state)
+        self.assertIsNone(root.untried_actions)
+        for iteration in range(1, len(state.actions) + 1):
+            leaf = self.agent.select(root)
+            self.assertIs(leaf, root)
+            child = self.agent.expand(leaf)
+            self.assertIs(child.parent, root)
+            self.assertIsNone(child.untried_actions)
+            self.agent.back_propagate(self.agent.simulate(child.state), child)
+            self.assertEqual(tree_size(root), iteration + 1)
+            self.assertEqual(len(root.untried_actions), len(state.actions) - iteration)
+        self.assertEqual(sorted(root.children.values()), sorted(state.actions))
+
+        # Once fully expanded, the node is left through its child of maximum UCB1 score
+        best = max(root.children, key=self.agent.UCB1)
+        leaf = self.agent.select(root)
+        self.assertIs(leaf, best)
+        child = self.agent.expand(leaf)
+        self.assertIs(child.parent, best)
+        self.assertEqual(len(best.untried_actions), len(best.state.actions) - 1)
+        self.assertEqual(tree_size(root), len(state.actions) + 2)
+
+if __name__ == '__main__':
+    unittest.main()
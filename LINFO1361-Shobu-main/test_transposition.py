@@ -0,0 +1,67 @@
+import unittest
+import multiprocessing
+from shobu import ShobuGame
+from transposition import TranspositionTable, SharedTranspositionTable, EXACT, LOWER, UPPER, move_first
+
+class TestTranspositionTable(unittest.TestCase):
+    def setUp(self):
+        self.actions = ShobuGame().initial.actions
+        self.move = self.actions[5]
+        self.tables = [TranspositionTable(4), SharedTranspositionTable(4)]
+
+    def tearDown(self):
+        self.tables[1].close()
+
+    def test_save_flags(self):
+        for table in self.tables:
+            table.save(1, -1.0, 1.0, 2, 0.0, self.move)
+            table.save(2, -1.0, 1.0, 2, -1.0, None)
+            table.save(3, -1.0, 1.0, 2, 1.5, None)
+            self.assertEqual(table.probe(1)[1:5], (2, EXACT, 0.0, self.move))
+            self.assertEqual(table.probe(2).flag, UPPER)
+            self.assertEqual(table.probe(3).flag, LOWER)
+            self.assertIsNone(table.probe(4))
+
+    def test_lookup_bounds(self):
+        for table in self.tables:
+            table.store(1, 2, LOWER, 1.0, self.move)
+            self.assertEqual(table.lookup(1, -2.0, 1.0, 2), (1.0, self.move))
+            self.assertEqual(table.lookup(1, -2.0, 2.0, 2), (None, self.move))
+            self.assertEqual(table.lookup(1, -2.0, 1.0, 3), (None, self.move))
+            table.store(1, 2, UPPER, -1.0, self.move)
+            self.assertEqual(table.lookup(1, -1.0, 2.0, 2), (-1.0, self.move))
+            self.assertEqual(table.lookup(1, -2.0, 2.0, 2), (None, self.move))
+            self.assertEqual(table.lookup(2, -2.0, 2.0, 0), (None, None))
+
+    def test_replacement(self):
+        # Keys 1, 17 and 33 share an index of a table of 16 indexes
+        for table in self.tables:
+            table.store(1, 3, EXACT, 1.0, None)
+            table.store(17, 2, EXACT, 2.0, None)
+            self.assertEqual(table.probe(1).score, 1.0)
+            self.assertEqual(table.probe(17).score, 2.0)
+            table.store(33, 1, EXACT, 3.0, None)
+            self.assertEqual(table.probe(1).score, 1.0)
+            self.assertIsNone(table.probe(17))
+            table.new_search()
+            table.store(17, 1, EXACT, 4.0, None)
+            self.assertIsNone(table.probe(1))
+            self.assertEqual(table.probe(17).score, 4.0)
+            table.clear()
+            self.assertIsNone(table.probe(33))
+
+    def test_shared_between_processes(self):
+        table = self.tables[1]
+        process = multiprocessing.get_context("fork").Process(target=table.store, args=(7, 4, LOWER, 0.5, self.move))
+        process.start()
+        process.join()
+        self.assertEqual(table.probe(7)[1:5], (4, LOWER, 0.5, self.move))
+
+    def test_move_first(self):
+        self.assertIs(move_first(self.actions, None), self.actions)
+        ordered = move_first(self.actions, self.move)
+        self.assertEqual(ordered[0], self.move)
+        self.assertEqual(sorted(ordered), sorted(self.actions))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,80 @@
+import unittest
+import time
+import numpy as np
+from shobu import ShobuGame
+from uct_array import ArrayUCTAgent, ROLLOUT_LENGTH
+
+class TestArrayUCTAgent(unittest.TestCase):
+    def check_tree(self, agent, root_state):
+        # Every child is the result of the action of its edge in the state of its parent
+        states = {0: root_state}
+        for node in range(agent.node_count):
+            state = states[node]
+            self.assertEqual(agent.node_state(node), state)
+            start = agent.first_edges[node]
+            if start < 0:
+                continue
+            self.assertEqual(sorted(agent.edge_actions[start:start + agent.edge_counts[node]]), sorted(state.action_codes))
+            for edge in range(start, start + agent.tried[node]):
+                child = int(agent.edge_children[edge])
+                self.assertEqual(agent.parents[child], node)
+                states[child] = self.game.unchecked_result(state, ShobuGame.actions_by_code[agent.edge_actions[edge]])
+        self.assertEqual(len(states), agent.node_count)
+
+    def setUp(self):
+        self.game = ShobuGame()
+
+    def test_search(self):
+        agent = ArrayUCTAgent(0, self.game, 1 << 12, 1 << 16)
+        state = self.game.initial
+        action = agent.uct(state, time.perf_counter() + 0.3)
+        self.assertIn(action, state.actions)
+        self.assertEqual(agent.visits[0], agent.iterations)
+        self.check_tree(agent, state)
+
+    def test_reuse_compacts_subtree(self):
+        agent = ArrayUCTAgent(0, self.game, 1 << 12, 1 << 16)
+        state = self.game.initial
+        action = agent.uct(state, time.perf_counter() + 0.5)
+        state = self.game.result(state, action)
+        start = agent.first_edges[agent.root]
+        self.assertGreaterEqual(start, 0)
+        reply = int(np.argmax(agent.visits[agent.edge_children[start:start + agent.tried[agent.root]]]))
+        child = int(agent.edge_children[start + reply])
+        state = self.game.result(state, ShobuGame.actions_by_code[agent.edge_actions[start + reply]])
+        visits = agent.visits[child]
+        subtree = agent.root_visits(child)
+
+        root = agent.reuse_tree(state)
+        self.assertEqual(root, 0)
+        self.assertEqual(agent.visits[root], visits)
+        self.assertEqual(agent.root_visits(root), subtree)
+        self.check_tree(agent, state)
+        self.assertIn(agent.uct(state, time.perf_counter() + 0.1), state.actions)
+
+    def test_full_tree(self):
+        # Once the capacities are reached, the leaves are simulated without being expanded
+        agent = ArrayUCTAgent(0, self.game, 64, 1 << 12)
+        state = self.game.initial
+        self.assertIn(agent.uct(state, time.perf_counter() + 0.2), state.actions)
+        self.assertLessEqual(agent.node_count, 64)
+        self.check_tree(agent, state)
+
+    def test_truncated_rollouts(self):
+        agent = ArrayUCTAgent(0, self.game, 1 << 12, 1 << 16, rollout_length=ROLLOUT_LENGTH)
+        state = self.game.initial
+        self.assertIn(agent.uct(state, time.perf_counter() + 0.3), state.actions)
+        self.check_tree(agent, state)
+        for _ in range(20):
+            self.assertTrue(-1 < agent.simulate(state) < 1)
+
+        # A fractional result counts as part of a win for both players
+        agent.clear()
+        for node in range(3):
+            agent.new_node(node - 1, state)
+        agent.back_propagate(0.5, [0, 1, 2])
+        self.assertEqual(list(agent.visits[:3]), [1, 1, 1])
+        self.assertEqual(list(agent.wins[:3]), [0.75, 0.25, 0.75])
+
+if __name__ == '__main__':
+    unittest.main()
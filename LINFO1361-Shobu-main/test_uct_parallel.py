@@ -0,0 +1,26 @@
+import unittest
+import time
+from shobu import ShobuGame
+from uct_parallel import RootParallelUCTAgent, TreeParallelUCTAgent
+
+class TestParallelUCTAgents(unittest.TestCase):
+    def test_close(self):
+        # Closing terminates the helpers, and the agent can play the next game
+        game = ShobuGame()
+        for agent in (RootParallelUCTAgent(0, game, 2), TreeParallelUCTAgent(0, game, 2, 2000, 50000)):
+            for _ in range(2):
+                state = game.initial
+                action = agent.uct(state, time.perf_counter() + 0.2)
+                self.assertIn(action, state.actions)
+                state = game.result(state, action)
+                state = game.result(state, state.actions[0])
+                self.assertIn(agent.uct(state, time.perf_counter() + 0.2), state.actions)
+                processes = [process for process, _ in agent.helpers]
+                self.assertEqual(len(processes), 1)
+                agent.close()
+                agent.close()
+                self.assertFalse(any(process.is_alive() for process in processes))
+                self.assertEqual(agent.helpers, [])
+
+if __name__ == '__main__':
+    unittest.main()
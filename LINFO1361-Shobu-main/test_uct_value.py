@@ -0,0 +1,34 @@
+import unittest
+import time
+import numpy as np
+from shobu import ShobuGame
+from uct_value import ValueUCTAgent
+
+class TestValueUCTAgent(unittest.TestCase):
+    def test_search(self):
+        game = ShobuGame()
+        agent = ValueUCTAgent(0, game, batch_size=8, node_capacity=1 << 12, edge_capacity=1 << 16)
+        state = game.initial
+        for _ in range(2):
+            action = agent.uct(state, time.perf_counter() + 0.3)
+            self.assertIn(action, state.actions)
+            self.assertEqual(agent.iterations % 8, 0)
+            self.assertFalse(np.any(agent.virtual_losses[:agent.node_count]))
+            self.assertTrue(np.all(agent.wins[:agent.node_count] <= agent.visits[:agent.node_count]))
+            state = game.result(state, action)
+            state = game.result(state, state.actions[0])
+
+    def test_evaluate(self):
+        # Terminal leaves keep their utility, the other ones get the value of the model for the player who moved
+        game = ShobuGame()
+        agent = ValueUCTAgent(1, game)
+        state = game.initial
+        root = agent.new_node(-1, state)
+        terminal = state._replace(bitboards=(state.bitboards[0], state.bitboards[1] & ~0xFFFF))
+        leaf = agent.new_node(root, terminal)
+        results = agent.evaluate([root, leaf], [state, terminal])
+        self.assertAlmostEqual(results[0], -agent.model.evaluate(np.array([[1.0] * 10 + [2.32, 2.32, 0.0, 0.0]]))[0])
+        self.assertEqual(results[1], -1)
+
+if __name__ == '__main__':
+    unittest.main()
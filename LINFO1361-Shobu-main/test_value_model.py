@@ -0,0 +1,51 @@
+import unittest
+import os
+import random
+import tempfile
+import numpy as np
+from shobu import ShobuGame
+from value_model import ValueModel, FEATURE_NAMES, threatened_stones, state_features, sample_positions
+
+class TestValueModel(unittest.TestCase):
+    def setUp(self):
+        self.game = ShobuGame()
+        random.seed(1361)
+        self.states = sample_positions(self.game, 40)
+
+    def test_initial_features(self):
+        self.assertEqual(state_features(self.game, self.game.initial), [1.0] * 10 + [2.32, 2.32, 0.0, 0.0])
+
+    def test_threatened_stones(self):
+        # The stones pushed off by the actions, as found by playing them
+        for state in self.states:
+            opponent = (state.to_move + 1) % 2
+            pushed_off = 0
+            for action in state.actions:
+                child = self.game.unchecked_result(state, action)
+                if child.piece_counts[opponent] != state.piece_counts[opponent]:
+                    pushed_off |= state.bitboards[opponent] & ~child.bitboards[opponent]
+            self.assertEqual(threatened_stones(state.actions, state.bitboards[opponent]), bin(pushed_off).count("1"))
+
+    def test_evaluate(self):
+        model = ValueModel.load()
+        features = np.array([state_features(self.game, state) for state in self.states])
+        self.assertEqual(features.shape, (len(self.states), len(FEATURE_NAMES)))
+        values = model.evaluate(features)
+        self.assertEqual(values.shape, (len(self.states),))
+        self.assertTrue(np.all(np.abs(values) <= 1))
+        for row, value in zip(features, values):
+            self.assertAlmostEqual(model.evaluate(row[None, :])[0], value)
+
+    def test_save_load(self):
+        generator = np.random.default_rng(1361)
+        model = ValueModel([generator.normal(size=(len(FEATURE_NAMES), 8)), generator.normal(size=(8, 1))], [generator.normal(size=8), generator.normal(size=1)])
+        features = generator.normal(size=(5, len(FEATURE_NAMES)))
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "model.npz")
+            model.save(path)
+            loaded = ValueModel.load(path)
+        self.assertEqual(len(loaded.weights), 2)
+        np.testing.assert_array_equal(loaded.evaluate(features), model.evaluate(features))
+
+if __name__ == '__main__':
+    unittest.main()
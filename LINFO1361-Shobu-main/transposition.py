@@ -0,0 +1,259 @@
+from shobu import ShobuGame, encode_action
+
+from multiprocessing import shared_memory
+from typing import NamedTuple
+import weakref
+
+# Bound types of a stored score
+EXACT = 0
+LOWER = 1
+UPPER = 2
+
+class TTEntry(NamedTuple):
+    """An entry of the transposition table.
+
+    Attributes:
+        key (int): The full Zobrist key of the position, to detect index collisions.
+        depth (int): The remaining search depth below the position when it was searched.
+        flag (int): The bound type of the score, `EXACT`, `LOWER` (score <= true value) or `UPPER` (score >= true value).
+        score (float): The score found by the search.
+        move (ShobuAction): The best action found by the search, or None.
+        age (int): The search during which the entry was stored (see `TranspositionTable.new_search`).
+    """
+    key: int
+    depth: int
+    flag: int
+    score: float
+    move: object
+    age: int
+
+class TranspositionTable:
+    """A fixed-size transposition table keyed by the Zobrist key of the positions.
+
+    Every index holds two entries: a depth-preferred one, which is only replaced by a deeper search of the same age or
+    by any search once it is stale, and an always-replace one, which keeps the most recent shallower entry. The age
+    is incremented at every call of `new_search`, so the table can be kept between two moves of a game without its old
+    entries blocking the depth-preferred slots.
+
+    Attributes:
+        size (int): The number of indexes of the table, a power of 2.
+        age (int): The age of the current search.
+    """
+
+    def __init__(self, size_log2=18):
+        """Initializes an empty table.
+
+        Args:
+            size_log2 (int): The base 2 logarithm of the number of indexes, each holding two entries.
+        """
+        self.size = 1 << size_log2
+        self.mask = self.size - 1
+        self.age = 0
+        self.depth_entries = [None] * self.size
+        self.recent_entries = [None] * self.size
+
+    def new_search(self):
+        """Starts a new search, making the entries of the previous searches replaceable."""
+        self.age += 1
+
+    def clear(self):
+        """Removes all the entries of the table."""
+        self.depth_entries = [None] * self.size
+        self.recent_entries = [None] * self.size
+
+    def probe(self, key):
+        """Returns the entry stored for a position, or None.
+
+        Args:
+            key (int): The Zobrist key of the position.
+
+        Returns:
+            TTEntry: The entry of the position, the deepest one if both slots hold it.
+        """
+        index = key & self.mask
+        entry = self.depth_entries[index]
+        if entry is not None and entry.key == key:
+            return entry
+        entry = self.recent_entries[index]
+        if entry is not None and entry.key == key:
+            return entry
+        return None
+
+    def store(self, key, depth, flag, score, move):
+        """Stores the result of the search of a position.
+
+        Args:
+            key (int): The Zobrist key of the position.
+            depth (int): The remaining search depth below the position.
+            flag (int): The bound type of the score (`EXACT`, `LOWER` or `UPPER`).
+            score (float): The score found by the search.
+            move (ShobuAction): The best action found, or None.
+        """
+        index = key & self.mask
+        entry = TTEntry(key, depth, flag, score, move, self.age)
+        current = self.depth_entries[index]
+        if current is None or current.key == key or current.age != self.age or depth >= current.depth:
+            self.depth_entries[index] = entry
+        else:
+            self.recent_entries[index] = entry
+
+    def lookup(self, key, alpha, beta, depth):
+        """Looks a position up before searching it with an alpha-beta window.
+
+        Args:
+            key (int): The Zobrist key of the position.
+            alpha (float): The current alpha value.
+            beta (float): The current beta value.
+            depth (int): The remaining search depth below the position.
+
+        Returns:
+            tuple: The stored score if the entry is deep enough and its bound settles the search with this window,
+                or None, and the stored best action to search first, or None.
+        """
+        entry = self.probe(key)
+        if entry is None:
+            return None, None
+        if entry.depth >= depth and (entry.flag == EXACT or (entry.flag == LOWER and entry.score >= beta) or (entry.flag == UPPER and entry.score <= alpha)):
+            return entry.score, entry.move
+        return None, entry.move
+
+    def save(self, key, alpha, beta, depth, value, move):
+        """Stores the result of an alpha-beta search of a position, deriving the bound type from its window.
+
+        Args:
+            key (int): The Zobrist key of the position.
+            alpha (float): The alpha value the search of the position started with.
+            beta (float): The beta value the search of the position started with.
+            depth (int): The remaining search depth below the position.
+            value (float): The value found by the search.
+            move (ShobuAction): The best action found by the search.
+        """
+        if value <= alpha:
+            flag = UPPER
+        elif value >= beta:
+            flag = LOWER
+        else:
+            flag = EXACT
+        self.store(key, depth, flag, value, move)
+
+def release_shared_memory(memory, *views):
+    """Releases the views of a shared memory block, then closes and destroys it."""
+    for view in views:
+        view.release()
+    memory.close()
+    memory.unlink()
+
+ENTRY_WORDS = 3  # Checksum, data and score of an entry of a SharedTranspositionTable
+
+class SharedTranspositionTable(TranspositionTable):
+    """A transposition table stored in shared memory, so that the processes of a parallel search can share it.
+
+    It has the same replacement scheme as `TranspositionTable`, and every entry is packed in three 64-bit words:
+    a checksum (the key xor the two other words), the data (`encode_action` of the move plus one, the depth, the
+    flag plus one and the age) and the score, as a float. No lock is taken: an entry torn by two processes writing it
+    at the same time fails the checksum and is read as a miss. The age is kept in a header word, so that all the
+    processes see the same one.
+
+    The processes must be forked after the table is created to share it. The shared memory is released by `close`,
+    or when the table of the creating process is garbage collected, or at the exit of that process.
+
+    Attributes:
+        size (int): The number of indexes of the table, a power of 2.
+        age (int): The age of the current search, modulo 256.
+        memory (SharedMemory): The shared memory block holding the table.
+    """
+
+    def __init__(self, size_log2=18):
+        """Initializes an empty table in a new shared memory block.
+
+        Args:
+            size_log2 (int): The base 2 logarithm of the number of indexes, each holding two entries.
+        """
+        self.size = 1 << size_log2
+        self.mask = self.size - 1
+        self.memory = shared_memory.SharedMemory(create=True, size=8 * (1 + 2 * ENTRY_WORDS * self.size))
+        self.words = self.memory.buf.cast("Q")
+        self.scores = self.memory.buf.cast("d")
+        self.clear()
+        self.release = weakref.finalize(self, release_shared_memory, self.memory, self.words, self.scores)
+
+    def close(self):
+        """Releases the shared memory of the table, which cannot be used afterwards. Further calls do nothing."""
+        self.release()
+
+    @property
+    def age(self):
+        return self.words[0]
+
+    @age.setter
+    def age(self, age):
+        self.words[0] = age & 0xFF
+
+    def clear(self):
+        """Removes all the entries of the table."""
+        self.memory.buf[8:] = bytes(len(self.memory.buf) - 8)
+
+    def unpack(self, key, data, score):
+        """Builds the entry of a key from its data word and score."""
+        code = data & 0x1FFFF
+        move = ShobuGame.actions_by_code[code - 1] if code else None
+        return TTEntry(key, (data >> 17) & 0xFF, ((data >> 25) & 0x3) - 1, score, move, data >> 27)
+
+    def probe(self, key):
+        """Returns the entry stored for a position, or None.
+
+        Args:
+            key (int): The Zobrist key of the position.
+
+        Returns:
+            TTEntry: The entry of the position, the deepest one if both slots hold it.
+        """
+        words = self.words
+        slot = 1 + 2 * ENTRY_WORDS * (key & self.mask)
+        data = words[slot + 1]
+        if data and words[slot] ^ data ^ words[slot + 2] == key:
+            return self.unpack(key, data, self.scores[slot + 2])
+        slot += ENTRY_WORDS
+        data = words[slot + 1]
+        if data and words[slot] ^ data ^ words[slot + 2] == key:
+            return self.unpack(key, data, self.scores[slot + 2])
+        return None
+
+    def store(self, key, depth, flag, score, move):
+        """Stores the result of the search of a position.
+
+        Args:
+            key (int): The Zobrist key of the position.
+            depth (int): The remaining search depth below the position, at most 255.
+            flag (int): The bound type of the score (`EXACT`, `LOWER` or `UPPER`).
+            score (float): The score found by the search.
+            move (ShobuAction): The best action found, or None.
+        """
+        words = self.words
+        age = words[0]
+        slot = 1 + 2 * ENTRY_WORDS * (key & self.mask)
+        current = words[slot + 1]
+        if current and words[slot] ^ current ^ words[slot + 2] != key and current >> 27 == age and depth < (current >> 17) & 0xFF:
+            slot += ENTRY_WORDS
+        data = (0 if move is None else encode_action(move) + 1) | depth << 17 | (flag + 1) << 25 | age << 27
+        self.scores[slot + 2] = float(score)
+        words[slot + 1] = data
+        words[slot] = key ^ data ^ words[slot + 2]
+
+def move_first(actions, move):
+    """Returns the actions with the given move in first position, leaving the list given unchanged.
+
+    Args:
+        actions (List[ShobuAction]): The legal actions of a position.
+        move (ShobuAction): The move to search first, e.g. the best move of a transposition table entry, or None.
+
+    Returns:
+        List[ShobuAction]: The reordered actions, or `actions` itself if the move is None or not among them.
+    """
+    if move is None:
+        return actions
+    try:
+        index = actions.index(move)
+    except ValueError:
+        return actions
+    return [move] + actions[:index] + actions[index+1:]
@@ -0,0 +1,337 @@
+import numpy as np
+
+from shobu import ShobuGame, ShobuState, encode_action
+from template_uct import UCTAgent
+
+import math
+import time
+
+MOVES_TO_GO = 30            # Expected number of moves left to play, the time of a move being remaining_time / MOVES_TO_GO
+NODE_CAPACITY = 1 << 18     # Maximum number of nodes of the tree
+EDGE_CAPACITY = 1 << 22     # Maximum number of actions of the expanded nodes of the tree
+EXPLORATION = 2.0           # Constant c of the UCB1 score U/N + sqrt(c * log(N_parent) / N)
+ROLLOUT_LENGTH = 10         # Number of random actions of the truncated simulations of the mcts-trunc agent
+
+def block_ranges(starts, counts):
+    """Returns the concatenation of the ranges [start, start + count) of the given starts and counts."""
+    ends = np.cumsum(counts)
+    return np.repeat(starts - ends + counts, counts) + np.arange(ends[-1] if len(ends) else 0)
+
+class ArrayUCTAgent(UCTAgent):
+    """An agent running the UCT algorithm on a tree stored in preallocated arrays, until a deadline.
+
+    The nodes are indexes in the node arrays (visits, wins, parent, ...), which also hold the position of each node:
+    its bitboards, player to move, number of boring actions and Zobrist key. No `ShobuState` is kept in the tree: the
+    state of a node is rebuilt from the arrays when it is expanded. When a node is expanded for the first time, the
+    codes of its legal actions are written in random order in a contiguous block of the edge arrays, and each
+    following expansion creates the child node of the next action of the block. The children of a fully expanded node
+    are thus the edges of its block, which lets the UCB1 scores of all of them be computed at once with NumPy.
+    Selection and backpropagation are loops instead of recursions, and the random playouts, full or truncated, are
+    those of `UCTAgent`.
+
+    The memory of the tree is bounded by the capacities: once they are reached, the leaves are simulated without being
+    expanded. The subtree of the reply of the opponent is reused by the next move, after being moved to the beginning
+    of the arrays (see `compact`), and the rest of the tree is dropped.
+
+    Attributes:
+        player (int): The player id this agent represents.
+        game (ShobuGame): The game the agent is playing.
+        root (int): The node of the action chosen at the last move, whose subtree is reused by the next move, or -1.
+        iterations (int): The number of iterations of the last search.
+        node_count (int): The number of nodes of the tree.
+        edge_count (int): The number of edges of the tree.
+        visits (np.ndarray): The number of simulations through each node.
+        wins (np.ndarray): The number of these simulations won by the player who moved to the node.
+        parents (np.ndarray): The parent of each node, -1 for the root.
+        first_edges (np.ndarray): The index of the first edge of each node, -1 until it is expanded.
+        edge_counts (np.ndarray): The number of legal actions of each expanded node.
+        tried (np.ndarray): The number of children of each node, i.e. of its edges having a node.
+        terminal (np.ndarray): Whether the state of each node is terminal (1) or not (0), -1 until it is first needed.
+        bitboards (np.ndarray): The bitboards of player 0 and player 1 of each node, of shape (node_capacity, 2).
+        players (np.ndarray): The player to move of each node.
+        boring_counts (np.ndarray): The number of consecutive actions without any pushed stone of each node.
+        zobrist_keys (np.ndarray): The Zobrist key of each node.
+        edge_actions (np.ndarray): The code of the action of each edge (see `encode_action`).
+        edge_children (np.ndarray): The child node of each edge, -1 until it is created.
+    """
+
+    def __init__(self, player, game, node_capacity=NODE_CAPACITY, edge_capacity=EDGE_CAPACITY, rollout_length=None):
+        """Initializes an ArrayUCTAgent and allocates its tree.
+
+        Args:
+            player (int): The player id this agent represents.
+            game (ShobuGame): The game the agent is playing.
+            node_capacity (int, optional): The maximum number of nodes. Defaults to `NODE_CAPACITY`.
+            edge_capacity (int, optional): The maximum number of edges. Defaults to `EDGE_CAPACITY`.
+            rollout_length (int, optional): The number of random actions of the truncated simulations (see
+                `UCTAgent.simulate`). Defaults to None (full simulations).
+        """
+        super().__init__(player, game, None, rollout_length)
+        self.root = -1
+        self.iterations = 0
+        self.generator = np.random.default_rng()
+        self.node_count = 0
+        self.edge_count = 0
+        self.visits = np.zeros(node_capacity)
+        self.wins = np.zeros(node_capacity)
+        self.parents = np.full(node_capacity, -1, dtype=np.int32)
+        self.first_edges = np.full(node_capacity, -1, dtype=np.int64)
+        self.edge_counts = np.zeros(node_capacity, dtype=np.int32)
+        self.tried = np.zeros(node_capacity, dtype=np.int32)
+        self.terminal = np.full(node_capacity, -1, dtype=np.int8)
+        self.bitboards = np.zeros((node_capacity, 2), dtype=np.uint64)
+        self.players = np.zeros(node_capacity, dtype=np.int8)
+        self.boring_counts = np.zeros(node_capacity, dtype=np.int16)
+        self.zobrist_keys = np.zeros(node_capacity, dtype=np.uint64)
+        self.edge_actions = np.zeros(edge_capacity, dtype=np.uint16)
+        self.edge_children = np.full(edge_capacity, -1, dtype=np.int32)
+
+    def play(self, state, remaining_time):
+        """Determines the next action to take in the given state, searching for remaining_time / MOVES_TO_GO seconds.
+
+        Args:
+            state (ShobuState): The current state of the game.
+            remaining_time (float): The remaining time in seconds that the agent has to make a decision.
+
+        Returns:
+            ShobuAction: The chosen action.
+        """
+        return self.uct(state, time.perf_counter() + remaining_time / MOVES_TO_GO)
+
+    def uct(self, state, deadline):
+        """Runs UCT iterations from the state until the deadline and chooses the most visited action.
+
+        Args:
+            state (ShobuState): The current state of the game.
+            deadline (float): The time, as given by `time.perf_counter()`, at which the search must stop.
+
+        Returns:
+            ShobuAction: The action of the most visited child of the root.
+        """
+        root = self.search(state, deadline)
+        start = self.first_edges[root]
+        children = self.edge_children[start:start + self.tried[root]]
+        edge = start + int(np.argmax(self.visits[children]))
+        self.root = int(self.edge_children[edge])
+        return ShobuGame.actions_by_code[self.edge_actions[edge]]
+
+    def search(self, state, deadline):
+        """Runs UCT iterations from the state until the deadline, at least until the root has a child.
+
+        Args:
+            state (ShobuState): The current state of the game.
+            deadline (float): The time, as given by `time.perf_counter()`, at which the search must stop.
+
+        Returns:
+            int: The root node of the search.
+        """
+        root = self.reuse_tree(state)
+        if root < 0:
+            self.clear()
+            root = self.new_node(-1, state)
+        iterations = 0
+        while self.tried[root] == 0 or time.perf_counter() < deadline:
+            node, path = self.select(root)
+            child, child_state = self.expand(node)
+            if child != node:
+                path.append(child)
+            self.back_propagate(self.simulate(child_state), path)
+            iterations += 1
+        self.iterations = iterations
+        return root
+
+    def root_visits(self, root):
+        """Returns the number of visits of the children of a node, by code of their action (see `encode_action`)."""
+        start = self.first_edges[root]
+        return {int(self.edge_actions[edge]): int(self.visits[self.edge_children[edge]]) for edge in range(start, start + self.tried[root])}
+
+    def follow(self, root, action):
+        """Keeps the child of a node for the given action as the subtree to reuse at the next move, if it exists."""
+        self.root = -1
+        code = encode_action(action)
+        start = self.first_edges[root]
+        for edge in range(start, start + self.tried[root]):
+            if self.edge_actions[edge] == code:
+                self.root = int(self.edge_children[edge])
+
+    def clear(self):
+        """Removes all the nodes of the tree, and the subtree kept for the next move."""
+        self.node_count = 0
+        self.edge_count = 0
+        self.root = -1
+
+    def new_node(self, parent, state):
+        """Adds a node to the tree.
+
+        Args:
+            parent (int): The parent node, -1 for a root.
+            state (ShobuState): The state of the node, of which only the position is stored.
+
+        Returns:
+            int: The new node.
+        """
+        node = self.node_count
+        self.node_count += 1
+        self.visits[node] = 0
+        self.wins[node] = 0
+        self.parents[node] = parent
+        self.first_edges[node] = -1
+        self.edge_counts[node] = 0
+        self.tried[node] = 0
+        self.terminal[node] = -1
+        self.bitboards[node] = state.bitboards
+        self.players[node] = state.to_move
+        self.boring_counts[node] = state.count_boring_actions
+        self.zobrist_keys[node] = state.zobrist_key
+        return node
+
+    def node_state(self, node):
+        """Rebuilds the state of a node from the node arrays."""
+        white_stones, black_stones = self.bitboards[node]
+        return ShobuState(int(self.players[node]), None, (int(white_stones), int(black_stones)), None, int(self.boring_counts[node]), self.game,
+                          int(self.zobrist_keys[node]))
+
+    def reuse_tree(self, state):
+        """Finds the state among the replies of the opponent to the last action of the agent, in the previous tree.
+
+        Args:
+            state (ShobuState): The current state of the game.
+
+        Returns:
+            int: The node of the state, which becomes the root of the compacted tree, or -1 if it was not reached in
+                the previous tree.
+        """
+        previous, self.root = self.root, -1
+        if previous < 0 or self.first_edges[previous] < 0:
+            return -1
+        start = self.first_edges[previous]
+        for child in self.edge_children[start:start + self.tried[previous]]:
+            if int(self.zobrist_keys[child]) == state.zobrist_key and self.boring_counts[child] == state.count_boring_actions:
+                return self.compact(int(child))
+        return -1
+
+    def compact(self, root):
+        """Moves the subtree of a node to the beginning of the arrays, dropping the other nodes and edges.
+
+        The nodes are renumbered in breadth-first order, and the edge blocks are kept in the order of their nodes.
+
+        Args:
+            root (int): The root of the subtree to keep.
+
+        Returns:
+            int: The new index of the root, i.e. 0.
+        """
+        first_edges = self.first_edges
+        tried = self.tried
+        levels = [np.array([root])]
+        while len(levels[-1]):
+            nodes = levels[-1]
+            levels.append(self.edge_children[block_ranges(first_edges[nodes], tried[nodes])])
+        order = np.concatenate(levels)
+        count = len(order)
+        renumbering = np.full(self.node_count, -1, dtype=np.int32)
+        renumbering[order] = np.arange(count)
+
+        # The edge blocks of the kept nodes, the untried edges having no child
+        expanded = first_edges[order] >= 0
+        starts = np.where(expanded, first_edges[order], 0)
+        counts = np.where(expanded, self.edge_counts[order], 0)
+        edges = block_ranges(starts, counts)
+        tried_edges = edges - np.repeat(starts, counts) < np.repeat(tried[order], counts)
+        children = np.full(len(edges), -1, dtype=np.int32)
+        children[tried_edges] = renumbering[self.edge_children[edges[tried_edges]]]
+        edge_count = len(edges)
+        self.edge_actions[:edge_count] = self.edge_actions[edges]
+        self.edge_children[:edge_count] = children
+
+        parents = self.parents[order]
+        for array in (self.visits, self.wins, self.edge_counts, self.tried, self.terminal, self.bitboards, self.players, self.boring_counts, self.zobrist_keys):
+            array[:count] = array[order]
+        self.first_edges[:count] = np.where(expanded, np.cumsum(counts) - counts, -1)
+        self.parents[:count] = np.where(parents >= 0, renumbering[parents], -1)
+        self.parents[0] = -1
+        self.node_count = count
+        self.edge_count = edge_count
+        return 0
+
+    def select(self, node):
+        """Selects a leaf from a node, following the children of maximum UCB1 score.
+
+        A leaf is a node in a terminal state, or a node with an action that has no child node yet. The nodes with
+        an edge block are not terminal, so the leaves are the nodes without a block or with an untried edge.
+
+        Args:
+            node (int): The node to select from.
+
+        Returns:
+            tuple: The selected leaf and the list of the nodes from `node` to the leaf.
+        """
+        visits = self.visits
+        wins = self.wins
+        first_edges = self.first_edges
+        edge_counts = self.edge_counts
+        tried = self.tried
+        edge_children = self.edge_children
+        path = [node]
+        while first_edges[node] >= 0 and tried[node] == edge_counts[node]:
+            start = first_edges[node]
+            children = edge_children[start:start + edge_counts[node]]
+            child_visits = visits[children]
+            scores = wins[children] / child_visits + np.sqrt(EXPLORATION * math.log(visits[node]) / child_visits)
+            node = int(children[np.argmax(scores)])
+            path.append(node)
+        return node, path
+
+    def expand(self, node):
+        """Creates the child node of the next untried action of a node, listing the actions at its first expansion.
+
+        Args:
+            node (int): The node to expand.
+
+        Returns:
+            tuple: The new child, or the node itself if it is terminal, fully expanded or if the tree is full, and
+                its state.
+        """
+        state = self.node_state(node)
+        if self.terminal[node] < 0:
+            self.terminal[node] = self.game.is_terminal(state)
+        if self.terminal[node]:
+            return node, state
+        if self.first_edges[node] < 0:
+            codes = state.action_codes
+            count = len(codes)
+            start = self.edge_count
+            if start + count > len(self.edge_actions):
+                return node, state
+            self.edge_actions[start:start + count] = self.generator.permutation(np.frombuffer(codes, dtype=np.uint16))
+            self.first_edges[node] = start
+            self.edge_counts[node] = count
+            self.edge_count += count
+        if self.tried[node] >= self.edge_counts[node] or self.node_count >= len(self.visits):
+            return node, state
+        edge = self.first_edges[node] + self.tried[node]
+        child_state = self.game.unchecked_result(state, ShobuGame.actions_by_code[self.edge_actions[edge]])
+        child = self.new_node(node, child_state)
+        self.edge_children[edge] = child
+        self.tried[node] += 1
+        return child, child_state
+
+    def back_propagate(self, result, path):
+        """Adds the result of a simulation to the statistics of the nodes of a path.
+
+        The fractional results of truncated simulations add (1 + result) / 2 wins to the nodes of the player who moved
+        to the last node, and (1 - result) / 2 to the others.
+
+        Args:
+            result (float): The result of the simulation for the player who moved to the last node of the path.
+            path (List[int]): The nodes from the root to the simulated node.
+        """
+        path = np.array(path)
+        self.visits[path] += 1
+        if self.rollout_length is not None:
+            self.wins[path[::-1][0::2]] += (1 + result) / 2
+            self.wins[path[::-1][1::2]] += (1 - result) / 2
+        elif result == 1:
+            self.wins[path[::-1][0::2]] += 1
+        elif result == -1:
+            self.wins[path[::-1][1::2]] += 1
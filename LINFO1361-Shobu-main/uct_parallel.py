@@ -0,0 +1,392 @@
+import numpy as np
+
+from agent import Agent
+from shobu import ShobuGame, ShobuState
+from template_uct import UCTAgent
+from uct_array import ArrayUCTAgent, MOVES_TO_GO, NODE_CAPACITY, EDGE_CAPACITY, EXPLORATION
+
+from collections import Counter
+import multiprocessing
+import math
+import random
+import time
+
+WORKERS = 4     # Default number of processes of the parallel agents, the agent's one included
+
+def shared_array(context, typecode, dtype, size):
+    """Allocates a zeroed NumPy array in shared memory, inherited by the processes forked afterwards."""
+    return np.frombuffer(context.RawArray(typecode, size), dtype=dtype)
+
+class RootParallelUCTAgent(Agent):
+    """An agent running root-parallel UCT: every process builds its own tree from the same root until the deadline.
+
+    The agent's process and `workers - 1` forked processes each run an `ArrayUCTAgent` search, with their own random
+    playouts. At the deadline, the visit counts of the children of the roots are summed, and the most visited action
+    is played. Every process then keeps the subtree of that action for the next move.
+
+    Attributes:
+        player (int): The player id this agent represents.
+        game (ShobuGame): The game the agent is playing.
+        workers (int): The number of processes of the search, the agent's one included.
+        tree (ArrayUCTAgent): The search of the agent's process.
+        helpers (List[tuple]): The process and the connection of every other process, forked by the first search and
+            terminated by `close`.
+        iterations (int): The number of iterations of the last search, summed over all the processes.
+    """
+
+    def __init__(self, player, game, workers=WORKERS):
+        """Initializes a RootParallelUCTAgent.
+
+        Args:
+            player (int): The player id this agent represents.
+            game (ShobuGame): The game the agent is playing.
+            workers (int, optional): The number of processes of the search. Defaults to `WORKERS`.
+        """
+        super().__init__(player, game)
+        self.workers = workers
+        self.tree = ArrayUCTAgent(player, game)
+        self.helpers = []
+        self.iterations = 0
+
+    def play(self, state, remaining_time):
+        """Determines the next action to take in the given state, searching for remaining_time / MOVES_TO_GO seconds.
+
+        Args:
+            state (ShobuState): The current state of the game.
+            remaining_time (float): The remaining time in seconds that the agent has to make a decision.
+
+        Returns:
+            ShobuAction: The chosen action.
+        """
+        return self.uct(state, time.perf_counter() + remaining_time / MOVES_TO_GO)
+
+    def uct(self, state, deadline):
+        """Searches the state in all the processes until the deadline and chooses the most visited action overall.
+
+        Args:
+            state (ShobuState): The current state of the game.
+            deadline (float): The time, as given by `time.perf_counter()`, at which the search must stop.
+
+        Returns:
+            ShobuAction: The action with the most visits summed over the trees.
+        """
+        self.start_helpers()
+        for _, connection in self.helpers:
+            connection.send(("search", state.to_move, state.bitboards, state.count_boring_actions, deadline))
+        root = self.tree.search(state, deadline)
+        visits = Counter(self.tree.root_visits(root))
+        self.iterations = self.tree.iterations
+        for _, connection in self.helpers:
+            helper_visits, iterations = connection.recv()
+            visits.update(helper_visits)
+            self.iterations += iterations
+
+        code = max(visits, key=visits.get)
+        self.tree.follow(root, ShobuGame.actions_by_code[code])
+        for _, connection in self.helpers:
+            connection.send(("follow", code))
+        return ShobuGame.actions_by_code[code]
+
+    def start_helpers(self):
+        """Forks the other processes of the search, at the first call only."""
+        if self.helpers or self.workers <= 1:
+            return
+        context = multiprocessing.get_context("fork")
+        for _ in range(1, self.workers):
+            connection, helper_connection = context.Pipe()
+            process = context.Process(target=self.run_helper, args=(helper_connection,), daemon=True)
+            process.start()
+            self.helpers.append((process, connection))
+
+    def run_helper(self, connection):
+        """Runs the searches sent by the agent in a forked process, with its own tree, until it sends None.
+
+        Args:
+            connection (multiprocessing.connection.Connection): The helper end of the pipe to the agent.
+        """
+        random.seed()
+        tree = ArrayUCTAgent(self.player, self.game)
+        root = -1
+        while True:
+            message = connection.recv()
+            if message is None:
+                return
+            if message[0] == "follow":
+                tree.follow(root, ShobuGame.actions_by_code[message[1]])
+                continue
+            _, to_move, bitboards, count_boring_actions, deadline = message
+            root = tree.search(ShobuState(to_move, None, bitboards, None, count_boring_actions, self.game), deadline)
+            connection.send((tree.root_visits(root), tree.iterations))
+
+    def close(self):
+        """Terminates the other processes of the search, freeing their trees, and clears the tree of the agent.
+
+        The agent can still play afterwards: the next search forks new processes.
+        """
+        for process, connection in self.helpers:
+            connection.send(None)
+            process.join()
+        self.helpers = []
+        self.tree.clear()
+
+class TreeParallelUCTAgent(UCTAgent):
+    """An agent running tree-parallel UCT: all the processes grow a single tree stored in shared memory.
+
+    The tree has the array layout of `ArrayUCTAgent`, without the positions of the nodes: every process replays the
+    actions from the root along its selected path. Every process runs its own
+    selection, expansion, playout and backpropagation. A virtual loss is added to the nodes of a path during its
+    iteration, so that the other processes are steered towards other paths. Only the allocation of nodes and edges
+    takes a lock. The statistics are updated without one, so a concurrent update may occasionally be lost, which UCT
+    tolerates. The tree is rebuilt at every move. Its shared memory is allocated before the processes are forked and
+    freed by `close`.
+
+    Attributes:
+        player (int): The player id this agent represents.
+        game (ShobuGame): The game the agent is playing.
+        workers (int): The number of processes of the search, the agent's one included.
+        helpers (List[tuple]): The process and the connection of every other process, forked by the first search and
+            terminated by `close`.
+        iterations (int): The number of iterations of the last search, summed over all the processes.
+        node_capacity (int): The maximum number of nodes.
+        edge_capacity (int): The maximum number of edges.
+        lock (multiprocessing.Lock): The lock of the allocations.
+        counters (np.ndarray): The number of nodes and the number of edges of the tree, or None once the tree is freed.
+        virtual_losses (np.ndarray): The number of iterations currently going through each node.
+        edge_actions (np.ndarray): The code of the action of each edge (see `encode_action`).
+        Other arrays: as in `ArrayUCTAgent`.
+    """
+
+    def __init__(self, player, game, workers=WORKERS, node_capacity=NODE_CAPACITY, edge_capacity=EDGE_CAPACITY):
+        """Initializes a TreeParallelUCTAgent and allocates its tree in shared memory.
+
+        Args:
+            player (int): The player id this agent represents.
+            game (ShobuGame): The game the agent is playing.
+            workers (int, optional): The number of processes of the search. Defaults to `WORKERS`.
+            node_capacity (int, optional): The maximum number of nodes. Defaults to `NODE_CAPACITY`.
+            edge_capacity (int, optional): The maximum number of edges. Defaults to `EDGE_CAPACITY`.
+        """
+        super().__init__(player, game, None)
+        self.workers = workers
+        self.helpers = []
+        self.iterations = 0
+        self.generator = np.random.default_rng()
+        self.node_capacity = node_capacity
+        self.edge_capacity = edge_capacity
+        self.allocate()
+
+    def allocate(self):
+        """Allocates the tree and its lock in shared memory, inherited by the processes forked afterwards."""
+        context = multiprocessing.get_context("fork")
+        self.lock = context.Lock()
+        self.counters = shared_array(context, "q", np.int64, 2)
+        self.visits = shared_array(context, "d", np.float64, self.node_capacity)
+        self.wins = shared_array(context, "d", np.float64, self.node_capacity)
+        self.virtual_losses = shared_array(context, "d", np.float64, self.node_capacity)
+        self.first_edges = shared_array(context, "q", np.int64, self.node_capacity)
+        self.edge_counts = shared_array(context, "i", np.int32, self.node_capacity)
+        self.tried = shared_array(context, "i", np.int32, self.node_capacity)
+        self.terminal = shared_array(context, "b", np.int8, self.node_capacity)
+        self.edge_actions = shared_array(context, "H", np.uint16, self.edge_capacity)
+        self.edge_children = shared_array(context, "i", np.int32, self.edge_capacity)
+
+    def play(self, state, remaining_time):
+        """Determines the next action to take in the given state, searching for remaining_time / MOVES_TO_GO seconds.
+
+        Args:
+            state (ShobuState): The current state of the game.
+            remaining_time (float): The remaining time in seconds that the agent has to make a decision.
+
+        Returns:
+            ShobuAction: The chosen action.
+        """
+        return self.uct(state, time.perf_counter() + remaining_time / MOVES_TO_GO)
+
+    def uct(self, state, deadline):
+        """Grows the shared tree of the state with all the processes until the deadline.
+
+        Args:
+            state (ShobuState): The current state of the game.
+            deadline (float): The time, as given by `time.perf_counter()`, at which the search must stop.
+
+        Returns:
+            ShobuAction: The action of the most visited child of the root.
+        """
+        self.start_helpers()
+        self.clear()
+        for _, connection in self.helpers:
+            connection.send((state.to_move, state.bitboards, state.count_boring_actions, deadline))
+        self.iterations = self.search(state, deadline)
+        for _, connection in self.helpers:
+            self.iterations += connection.recv()
+
+        start = self.first_edges[0]
+        children = self.edge_children[start:start + self.tried[0]]
+        edge = start + int(np.argmax(self.visits[children]))
+        return ShobuGame.actions_by_code[self.edge_actions[edge]]
+
+    def start_helpers(self):
+        """Allocates the tree if it was freed by `close`, then forks the other processes of the search if needed."""
+        if self.counters is None:
+            self.allocate()
+        if self.helpers or self.workers <= 1:
+            return
+        context = multiprocessing.get_context("fork")
+        for _ in range(1, self.workers):
+            connection, helper_connection = context.Pipe()
+            process = context.Process(target=self.run_helper, args=(helper_connection,), daemon=True)
+            process.start()
+            self.helpers.append((process, connection))
+
+    def run_helper(self, connection):
+        """Runs the searches sent by the agent in a forked process until it sends None.
+
+        Args:
+            connection (multiprocessing.connection.Connection): The helper end of the pipe to the agent.
+        """
+        random.seed()
+        self.generator = np.random.default_rng()
+        while True:
+            message = connection.recv()
+            if message is None:
+                return
+            to_move, bitboards, count_boring_actions, deadline = message
+            connection.send(self.search(ShobuState(to_move, None, bitboards, None, count_boring_actions, self.game), deadline))
+
+    def close(self):
+        """Terminates the other processes of the search and frees the shared memory of the tree.
+
+        The agent can still play afterwards: the next search allocates a new tree and forks new processes.
+        """
+        for process, connection in self.helpers:
+            connection.send(None)
+            process.join()
+        self.helpers = []
+        self.lock = None
+        self.counters = self.visits = self.wins = self.virtual_losses = None
+        self.first_edges = self.edge_counts = self.tried = self.terminal = None
+        self.edge_actions = self.edge_children = None
+
+    def clear(self):
+        """Resets the tree to a single root node, node 0."""
+        self.counters[:] = 0
+        self.new_node()
+
+    def new_node(self):
+        """Allocates a node, the lock being held (or the other processes idle).
+
+        Returns:
+            int: The new node.
+        """
+        node = int(self.counters[0])
+        self.visits[node] = 0
+        self.wins[node] = 0
+        self.virtual_losses[node] = 0
+        self.first_edges[node] = -1
+        self.edge_counts[node] = 0
+        self.tried[node] = 0
+        self.terminal[node] = -1
+        self.counters[0] = node + 1
+        return node
+
+    def search(self, state, deadline):
+        """Runs iterations on the shared tree from the root state until the deadline, at least until the root has a child.
+
+        Args:
+            state (ShobuState): The state of the root.
+            deadline (float): The time, as given by `time.perf_counter()`, at which the search must stop.
+
+        Returns:
+            int: The number of iterations run by this process.
+        """
+        iterations = 0
+        while self.tried[0] == 0 or time.perf_counter() < deadline:
+            path, leaf_state = self.select(state)
+            child, child_state = self.expand(path[-1], leaf_state)
+            if child != path[-1]:
+                path.append(child)
+                self.virtual_losses[child] += 1
+            self.back_propagate(self.simulate(child_state), path)
+            iterations += 1
+        return iterations
+
+    def select(self, state):
+        """Selects a leaf from the root following the children of maximum UCB1 score, counting the virtual losses.
+
+        Args:
+            state (ShobuState): The state of the root.
+
+        Returns:
+            tuple: The list of the nodes from the root to the leaf, each one holding a virtual loss, and the state
+                of the leaf.
+        """
+        visits = self.visits
+        wins = self.wins
+        virtual_losses = self.virtual_losses
+        first_edges = self.first_edges
+        edge_counts = self.edge_counts
+        tried = self.tried
+        edge_children = self.edge_children
+        actions_by_code = ShobuGame.actions_by_code
+        node = 0
+        path = [node]
+        virtual_losses[node] += 1
+        while first_edges[node] >= 0 and tried[node] == edge_counts[node]:
+            start = first_edges[node]
+            children = edge_children[start:start + edge_counts[node]]
+            child_visits = np.maximum(visits[children] + virtual_losses[children], 1)
+            scores = wins[children] / child_visits + np.sqrt(EXPLORATION * math.log(max(visits[node] + virtual_losses[node], 1)) / child_visits)
+            best = int(np.argmax(scores))
+            node = int(children[best])
+            state = self.game.unchecked_result(state, actions_by_code[self.edge_actions[start + best]])
+            path.append(node)
+            virtual_losses[node] += 1
+        return path, state
+
+    def expand(self, node, state):
+        """Creates the child node of the next untried action of a node, listing the actions at its first expansion.
+
+        Args:
+            node (int): The node to expand.
+            state (ShobuState): The state of the node.
+
+        Returns:
+            tuple: The new child and its state, or the node and its state if it is terminal, fully expanded or if
+                the tree is full.
+        """
+        if self.terminal[node] < 0:
+            self.terminal[node] = self.game.is_terminal(state)
+        if self.terminal[node]:
+            return node, state
+        with self.lock:
+            if self.first_edges[node] < 0:
+                codes = state.action_codes
+                start = int(self.counters[1])
+                if start + len(codes) > len(self.edge_actions):
+                    return node, state
+                self.edge_actions[start:start + len(codes)] = self.generator.permutation(np.frombuffer(codes, dtype=np.uint16))
+                self.edge_counts[node] = len(codes)
+                self.counters[1] = start + len(codes)
+                self.first_edges[node] = start
+            if self.tried[node] >= self.edge_counts[node] or self.counters[0] >= len(self.visits):
+                return node, state
+            edge = self.first_edges[node] + self.tried[node]
+            child = self.new_node()
+            self.edge_children[edge] = child
+            self.tried[node] += 1
+        return child, self.game.unchecked_result(state, ShobuGame.actions_by_code[self.edge_actions[edge]])
+
+    def back_propagate(self, result, path):
+        """Adds the result of a simulation to the statistics of the nodes of a path and removes their virtual losses.
+
+        Args:
+            result (float): The result of the simulation for the player who moved to the last node of the path.
+            path (List[int]): The nodes from the root to the simulated node.
+        """
+        path = np.array(path)
+        self.visits[path] += 1
+        self.virtual_losses[path] -= 1
+        if result == 1:
+            self.wins[path[::-1][0::2]] += 1
+        elif result == -1:
+            self.wins[path[::-1][1::2]] += 1
@@ -0,0 +1,144 @@
+import numpy as np
+
+from uct_array import ArrayUCTAgent, EXPLORATION, NODE_CAPACITY, EDGE_CAPACITY
+from value_model import ValueModel, VALUE_MODEL_PATH, state_features
+
+import math
+import time
+
+BATCH_SIZE = 16     # Number of leaves selected before they are evaluated together by the value model
+
+class ValueUCTAgent(ArrayUCTAgent):
+    """An agent running UCT on the tree of `ArrayUCTAgent`, evaluating the leaves with a value model instead of playouts.
+
+    Each step selects and expands a batch of leaves. A virtual loss is added to the nodes of the path of every selected
+    leaf, so that the next selections of the batch are steered towards other leaves. The features of the leaves (see
+    `state_features`) are then scored in a single matrix product by the model, the terminal leaves keeping their exact
+    utility, and the values are backpropagated as fractional wins while the virtual losses are removed.
+
+    Attributes:
+        model (ValueModel): The model evaluating the leaves.
+        batch_size (int): The number of leaves evaluated together.
+        virtual_losses (np.ndarray): The number of leaves of the current batch selected through each node.
+    """
+
+    def __init__(self, player, game, model_path=VALUE_MODEL_PATH, batch_size=BATCH_SIZE, node_capacity=NODE_CAPACITY, edge_capacity=EDGE_CAPACITY):
+        """Initializes a ValueUCTAgent, loading its value model.
+
+        Args:
+            player (int): The player id this agent represents.
+            game (ShobuGame): The game the agent is playing.
+            model_path (str, optional): The .npz file of the value model (see `ValueModel.load`). Defaults to
+                `VALUE_MODEL_PATH`.
+            batch_size (int, optional): The number of leaves evaluated together. Defaults to `BATCH_SIZE`.
+            node_capacity (int, optional): The maximum number of nodes. Defaults to `NODE_CAPACITY`.
+            edge_capacity (int, optional): The maximum number of edges. Defaults to `EDGE_CAPACITY`.
+        """
+        super().__init__(player, game, node_capacity, edge_capacity)
+        self.model = ValueModel.load(model_path)
+        self.batch_size = batch_size
+        self.virtual_losses = np.zeros(node_capacity)
+
+    def search(self, state, deadline):
+        """Runs batches of UCT iterations from the state until the deadline, at least until the root has a child.
+
+        Args:
+            state (ShobuState): The current state of the game.
+            deadline (float): The time, as given by `time.perf_counter()`, at which the search must stop.
+
+        Returns:
+            int: The root node of the search.
+        """
+        root = self.reuse_tree(state)
+        if root < 0:
+            self.clear()
+            root = self.new_node(-1, state)
+        iterations = 0
+        while self.tried[root] == 0 or time.perf_counter() < deadline:
+            paths = []
+            states = []
+            for _ in range(self.batch_size):
+                node, path = self.select(root)
+                child, child_state = self.expand(node)
+                if child != node:
+                    path.append(child)
+                path = np.array(path)
+                self.virtual_losses[path] += 1
+                paths.append(path)
+                states.append(child_state)
+            results = self.evaluate([path[-1] for path in paths], states)
+            for path, result in zip(paths, results):
+                self.virtual_losses[path] -= 1
+                self.back_propagate(result, path)
+            iterations += len(paths)
+        self.iterations = iterations
+        return root
+
+    def evaluate(self, leaves, states):
+        """Evaluates a batch of leaves, with their utility if they are terminal and with the value model otherwise.
+
+        Args:
+            leaves (List[int]): The leaves, possibly repeated.
+            states (List[ShobuState]): The state of each leaf.
+
+        Returns:
+            np.ndarray: The result of each leaf for the player who moved to it, in [-1, 1].
+        """
+        results = np.empty(len(leaves))
+        evaluated = []
+        features = []
+        for index, (leaf, state) in enumerate(zip(leaves, states)):
+            if self.terminal[leaf] < 0:
+                self.terminal[leaf] = self.game.is_terminal(state)
+            if self.terminal[leaf]:
+                utility = state.utility
+                results[index] = -utility if state.to_move == 0 else utility
+            else:
+                evaluated.append(index)
+                features.append(state_features(self.game, state))
+        if evaluated:
+            results[evaluated] = -self.model.evaluate(np.array(features))
+        return results
+
+    def new_node(self, parent, state):
+        """Adds a node to the tree, without virtual loss (see `ArrayUCTAgent.new_node`)."""
+        node = super().new_node(parent, state)
+        self.virtual_losses[node] = 0
+        return node
+
+    def select(self, node):
+        """Selects a leaf from a node like `ArrayUCTAgent.select`, counting each virtual loss as a lost visit.
+
+        Args:
+            node (int): The node to select from.
+
+        Returns:
+            tuple: The selected leaf and the list of the nodes from `node` to the leaf.
+        """
+        visits = self.visits
+        wins = self.wins
+        virtual_losses = self.virtual_losses
+        first_edges = self.first_edges
+        edge_counts = self.edge_counts
+        tried = self.tried
+        edge_children = self.edge_children
+        path = [node]
+        while first_edges[node] >= 0 and tried[node] == edge_counts[node]:
+            start = first_edges[node]
+            children = edge_children[start:start + edge_counts[node]]
+            child_visits = visits[children] + virtual_losses[children]
+            scores = wins[children] / child_visits + np.sqrt(EXPLORATION * math.log(visits[node] + virtual_losses[node]) / child_visits)
+            node = int(children[np.argmax(scores)])
+            path.append(node)
+        return node, path
+
+    def back_propagate(self, result, path):
+        """Adds a fractional result to the statistics of the nodes of a path, a draw counting as half a win.
+
+        Args:
+            result (float): The result in [-1, 1] for the player who moved to the last node of the path.
+            path (np.ndarray): The nodes from the root to the evaluated node.
+        """
+        self.visits[path] += 1
+        self.wins[path[::-1][0::2]] += (1 + result) / 2
+        self.wins[path[::-1][1::2]] += (1 - result) / 2
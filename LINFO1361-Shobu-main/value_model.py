@@ -0,0 +1,167 @@
+import numpy as np
+
+from shobu import ShobuGame
+
+import argparse
+import os
+import random
+
+VALUE_MODEL_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "value_model.npz")
+FEATURE_NAMES = (
+    "own stones on own home board 0", "own stones on own home board 1",
+    "own stones on opponent home board 0", "own stones on opponent home board 1",
+    "opponent stones on own home board 0", "opponent stones on own home board 1",
+    "opponent stones on opponent home board 0", "opponent stones on opponent home board 1",
+    "own minimum stones", "opponent minimum stones",
+    "own mobility", "opponent mobility",
+    "own stones threatened", "opponent stones threatened",
+)
+
+def threatened_stones(actions, opponent_stones):
+    """Counts the opponent stones that one of the actions pushes off the board.
+
+    Args:
+        actions (List[ShobuAction]): The legal actions of a player.
+        opponent_stones (int): The bitboard of the opponent of the player.
+
+    Returns:
+        int: The number of distinct opponent stones that can be pushed off.
+    """
+    rays = ShobuGame.rays
+    threatened = 0
+    for _, _, active_board_id, active_stone_id, direction, length in actions:
+        _, path, landing = rays[(active_stone_id, direction, length)]
+        if landing < 0:
+            active_offset = active_board_id << 4
+            threatened |= ((opponent_stones >> active_offset) & path) << active_offset
+    return bin(threatened).count("1")
+
+def state_features(game, state):
+    """Computes the features of a non-terminal state, from the point of view of the player to move.
+
+    The stone counts are divided by 4, the mobilities by 100 and the threatened stones by 4, so that all the
+    features are around 1 (see `FEATURE_NAMES` for their order).
+
+    Args:
+        game (ShobuGame): The game of the state.
+        state (ShobuState): The state, whose legal actions are computed if they are not yet.
+
+    Returns:
+        List[float]: The features of the state.
+    """
+    player = state.to_move
+    opponent = (player + 1) % 2
+    player_counts = state.piece_counts[player]
+    opponent_counts = state.piece_counts[opponent]
+    boards = (2*player, 2*player + 1, 2*opponent, 2*opponent + 1)
+    actions = state.actions
+    opponent_actions = game.compute_actions(state.bitboards, opponent)
+    return [player_counts[board] / 4 for board in boards] + [opponent_counts[board] / 4 for board in boards] + [
+        state.min_pieces[player] / 4, state.min_pieces[opponent] / 4,
+        len(actions) / 100, len(opponent_actions) / 100,
+        threatened_stones(opponent_actions, state.bitboards[player]) / 4, threatened_stones(actions, state.bitboards[opponent]) / 4,
+    ]
+
+class ValueModel:
+    """A value model scoring Shobu positions from their features, in batches.
+
+    The model is a multilayer perceptron with tanh activations, a linear model being the case of a single layer. The
+    value is the tanh of the output of the last layer, an estimate in [-1, 1] of the outcome of the game for the player
+    to move.
+
+    Attributes:
+        weights (List[np.ndarray]): The weight matrix of each layer, of shape (inputs, outputs).
+        biases (List[np.ndarray]): The bias vector of each layer.
+    """
+
+    def __init__(self, weights, biases):
+        """Initializes a model from the parameters of its layers.
+
+        Args:
+            weights (List[np.ndarray]): The weight matrix of each layer, the first one having `len(FEATURE_NAMES)`
+                rows and the last one a single column.
+            biases (List[np.ndarray]): The bias vector of each layer.
+        """
+        self.weights = weights
+        self.biases = biases
+
+    @classmethod
+    def load(cls, path=VALUE_MODEL_PATH):
+        """Loads a model from an .npz file holding the arrays `weights_0`, `biases_0`, `weights_1`, `biases_1`, ..."""
+        with np.load(path) as arrays:
+            layers = len([name for name in arrays.files if name.startswith("weights_")])
+            return cls([arrays[f"weights_{layer}"] for layer in range(layers)], [arrays[f"biases_{layer}"] for layer in range(layers)])
+
+    def save(self, path=VALUE_MODEL_PATH):
+        """Saves the model to an .npz file readable by `load`."""
+        arrays = dict()
+        for layer, (weights, biases) in enumerate(zip(self.weights, self.biases)):
+            arrays[f"weights_{layer}"] = weights
+            arrays[f"biases_{layer}"] = biases
+        np.savez(path, **arrays)
+
+    def evaluate(self, features):
+        """Scores a batch of positions.
+
+        Args:
+            features (np.ndarray): The features of the positions, of shape (positions, `len(FEATURE_NAMES)`).
+
+        Returns:
+            np.ndarray: The value of each position for its player to move, in [-1, 1].
+        """
+        values = features
+        for weights, biases in zip(self.weights, self.biases):
+            values = np.tanh(values @ weights + biases)
+        return values[:, 0]
+
+def sample_positions(game, count):
+    """Samples non-terminal states of random games, at most one per game."""
+    states = []
+    while len(states) < count:
+        state = game.initial
+        for _ in range(random.randrange(1, 120)):
+            if game.is_terminal(state):
+                break
+            state = game.unchecked_result(state, random.choice(state.actions))
+        if not game.is_terminal(state):
+            states.append(state)
+    return states
+
+def fit_linear_model(game, positions, playouts):
+    """Fits a linear value model on the mean outcome of random playouts from random positions.
+
+    The weights are the least squares fit of the mean outcome for the player to move, which is close to the fit of its
+    arctanh since the means are small.
+
+    Args:
+        game (ShobuGame): The game.
+        positions (int): The number of positions.
+        playouts (int): The number of random playouts labelling each position.
+
+    Returns:
+        ValueModel: The fitted model.
+    """
+    states = sample_positions(game, positions)
+    features = np.array([state_features(game, state) for state in states])
+    targets = np.empty(len(states))
+    for index, state in enumerate(states):
+        outcome = sum(game.random_playout(state.bitboards, state.to_move, state.count_boring_actions) for _ in range(playouts)) / playouts
+        targets[index] = outcome if state.to_move == 0 else -outcome
+    inputs = np.hstack([features, np.ones((len(states), 1))])
+    solution = np.linalg.lstsq(inputs, targets, rcond=None)[0]
+    return ValueModel([solution[:-1, None]], [solution[-1:]])
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Fits the linear value model of the batched UCT agent')
+    parser.add_argument('-p', '--positions', type=int, default=2000, help='Number of random positions')
+    parser.add_argument('-n', '--playouts', type=int, default=16, help='Number of random playouts per position')
+    parser.add_argument('-o', '--output', type=str, default=VALUE_MODEL_PATH, help='Path of the .npz file')
+    parser.add_argument('-s', '--seed', type=int, default=1361, help='Random seed')
+    args = parser.parse_args()
+
+    random.seed(args.seed)
+    model = fit_linear_model(ShobuGame(), args.positions, args.playouts)
+    model.save(args.output)
+    for name, weight in zip(FEATURE_NAMES, model.weights[0][:, 0]):
+        print(f"{name}: {weight:.4f}")
+    print(f"bias: {model.biases[0][0]:.4f}")